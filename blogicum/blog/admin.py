@@ -1,6 +1,10 @@
 from django.contrib import admin
+from django.db import transaction
+from django.utils import timezone
 
-from .models import Category, Location, Post, Comment
+from . import search
+from .models import Category, Location, Post, Comment, Job, OutgoingEmail
+from .utils import change_comment_count
 
 
 @admin.register(Category)
@@ -21,11 +25,22 @@ class LocationAdmin(admin.ModelAdmin):
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ('title', 'author', 'pub_date',
-                    'is_published', 'created_at')
+                    'is_published', 'comment_count', 'created_at')
     search_fields = ('title', 'text')
     list_filter = ('is_published', 'created_at')
     date_hierarchy = 'pub_date'
 
+    def get_search_results(self, request, queryset, search_term):
+        # search_fields нужны только для строки поиска: ищем по индексу
+        # blog.search, а не ILIKE по всему тексту
+        if not search_term.strip():
+            return queryset, False
+        # Все совпадения, а не первые SEARCH_MAX_RESULTS, — и
+        # подзапросом: список из тысяч id упёрся бы в предел переменных
+        # SQLite
+        return queryset.filter(pk__in=search.matches(search_term)), False
+
+
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     # Отображаем начало текста, пост, автора и дату
@@ -34,3 +49,54 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('created_at', 'author')
     # Поиск по тексту комментария
     search_fields = ('text',)
+
+    # Счётчик comment_count у постов меняем в той же транзакции
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        old_post_id = None
+        if change:
+            old_post_id = Comment.objects.filter(
+                pk=obj.pk
+            ).values_list('post_id', flat=True).first()
+        super().save_model(request, obj, form, change)
+        if old_post_id != obj.post_id:
+            change_comment_count([obj.post_id])
+            if old_post_id is not None:
+                change_comment_count([old_post_id], delta=-1)
+
+    @transaction.atomic
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        change_comment_count([obj.post_id], delta=-1)
+
+    @transaction.atomic
+    def delete_queryset(self, request, queryset):
+        post_ids = list(queryset.values_list('post_id', flat=True))
+        super().delete_queryset(request, queryset)
+        change_comment_count(post_ids, delta=-1)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status', 'name')
+    readonly_fields = ('locked_at', 'last_error', 'created_at')
+    actions = ('retry',)
+
+    @admin.action(description='Повторить выбранные задачи')
+    def retry(self, request, queryset):
+        queryset.filter(status=Job.FAILED).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(),
+            # Ключ мог занять новый экземпляр той же задачи
+            unique_key='',
+        )
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts',
+                    'created_at')
+    list_filter = ('status',)
+    exclude = ('message',)
+    readonly_fields = ('subject', 'recipients', 'attempts', 'last_error',
+                       'locked_at', 'created_at')
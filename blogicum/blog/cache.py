@@ -0,0 +1,336 @@
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import http_date
+
+from blogicum.metrics import record_cache
+from blogicum.routers import hold_primary
+
+# Общая версия всех карточек: меняется при правке категорий,
+# местоположений и авторов, которые показываются в каждой карточке
+CARDS_SCOPE = 'cards'
+# Версия лент целиком: меняется при любой правке, видимой в ленте
+FEED_SCOPE = 'feed'
+
+
+def _version_key(scope):
+    return f'blog:version:{scope}'
+
+
+def _bumped_key(scope):
+    return f'blog:bumped:{scope}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def get_versions(*scopes):
+    """Текущие версии областей кеша.
+
+    Пропавшая из кеша версия заменяется новой случайной, а не
+    начальной, чтобы не воскресить старые фрагменты.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            version = uuid4().hex
+            cache.add(key, version, None)
+            found[key] = cache.get(key, version)
+    return [found[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    """Инвалидирует всё, что закешировано под версиями `scopes`.
+
+    Кеши по новым версиям должны строиться с default, а не с
+    отстающей реплики — см. blogicum.routers.hold_primary.
+    """
+    hold_primary()
+    now = timezone.now()
+    values = {}
+    for scope in scopes:
+        values[_version_key(scope)] = uuid4().hex
+        values[_bumped_key(scope)] = now
+    cache.set_many(values, None)
+
+
+def bumped_at(scope):
+    """Когда последний раз сбрасывались кеши `scope`.
+
+    Если отметка пропала из кеша, ею становится текущий момент:
+    лишний 200 лучше, чем 304 с устаревшей страницей.
+    """
+    key = _bumped_key(scope)
+    cache.add(key, timezone.now(), None)
+    return cache.get(key)
+
+
+def post_card_key(post):
+    # updated_at, счётчик и копии картинок — прямо из строки: их меняют
+    # другие процессы сайта, воркер и manage.py, чьи сбросы версий не
+    # видны в кеше этого процесса. Карточки лент собираются из FeedEntry
+    # (FeedEntry.to_post), и updated_at там — время правки строки ленты
+    versions = ':'.join(get_versions(CARDS_SCOPE, post_scope(post.pk)))
+    renditions = md5(
+        json.dumps(post.image_renditions, sort_keys=True).encode()
+    ).hexdigest()[:12]
+    return (f'blog:post_card:{post.pk}:{post.updated_at.isoformat()}:'
+            f'{post.comment_count}:{renditions}:{versions}')
+
+
+def get_or_render(key, render, timeout):
+    fragment = cache.get(key)
+    record_cache('fragment', fragment is not None)
+    if fragment is None:
+        fragment = render()
+        cache.set(key, fragment, timeout)
+    return fragment
+
+
+def render_post_card(post, render):
+    return get_or_render(
+        post_card_key(post), render, settings.POST_CARD_CACHE_TIMEOUT
+    )
+
+
+def _feed_clock():
+    """Пара (якорь, ближайшая отложенная публикация) для версии лент.
+
+    Якорь — момент, на который считаются ленты. Набор видимых постов
+    меняется только в даты публикаций и при правках, а правки меняют
+    версию лент, поэтому якорь остаётся точным до ближайшей отложенной
+    публикации и кешируется ровно до неё.
+    """
+    from .models import Post
+
+    feed_version, = get_versions(FEED_SCOPE)
+    key = f'blog:feed_clock:{feed_version}'
+    clock = cache.get(key)
+    record_cache('feed_clock', clock is not None)
+    if clock is not None:
+        return clock
+    now = timezone.now()
+    upcoming = Post.objects.filter(
+        is_published=True, pub_date__gt=now
+    ).aggregate(upcoming=Min('pub_date'))['upcoming']
+    timeout = settings.FEED_PAGE_CACHE_TIMEOUT
+    if upcoming is not None:
+        timeout = min(timeout, int((upcoming - now).total_seconds()))
+    clock = (now, upcoming)
+    if timeout > 0:
+        cache.set(key, clock, timeout)
+    return clock
+
+
+def next_publication():
+    """Ближайшая дата отложенной публикации (или None)."""
+    return _feed_clock()[1]
+
+
+def feed_now():
+    """Момент времени, на который строятся ленты.
+
+    Режим задаёт settings.FEED_NOW_MODE:
+    'exact' — timezone.now();
+    'bucket' — now, округлённое вниз до FEED_NOW_BUCKET секунд;
+    'schedule' — якорь из _feed_clock(), общий до ближайшей
+    отложенной публикации или правки.
+    Во всех режимах результат не позже now, так что пост не
+    появляется раньше своей pub_date.
+    """
+    mode = settings.FEED_NOW_MODE
+    if mode == 'schedule':
+        return _feed_clock()[0]
+    now = timezone.now()
+    if mode == 'bucket':
+        bucket = settings.FEED_NOW_BUCKET
+        return now - timedelta(
+            seconds=now.timestamp() % bucket
+        )
+    return now
+
+
+def page_timeout():
+    """Время жизни страницы ленты: не дольше, чем до ближайшей
+    отложенной публикации, чтобы она появилась вовремя.
+    """
+    timeout = settings.FEED_PAGE_CACHE_TIMEOUT
+    upcoming = next_publication()
+    if upcoming is not None:
+        seconds = int((upcoming - timezone.now()).total_seconds())
+        timeout = min(timeout, seconds)
+    return max(timeout, 0)
+
+
+def _wait_for_page(key):
+    deadline = time.monotonic() + settings.FEED_PAGE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    return None
+
+
+def _restore_page(cached):
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def cache_anonymous_page(view):
+    """Кеширует страницу для анонимных GET-запросов.
+
+    Ключ включает версию лент; холодную страницу строит только тот,
+    кто взял блокировку, остальные ждут её в течение
+    FEED_PAGE_LOCK_WAIT секунд.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+        feed_version, = get_versions(FEED_SCOPE)
+        path_hash = md5(request.get_full_path().encode()).hexdigest()
+        key = f'blog:page:{feed_version}:{path_hash}'
+        cached = cache.get(key)
+        record_cache('page', cached is not None)
+        if cached is not None:
+            return _restore_page(cached)
+        lock_key = f'{key}:lock'
+        if not cache.add(lock_key, 1, settings.FEED_PAGE_LOCK_TIMEOUT):
+            cached = _wait_for_page(key)
+            if cached is not None:
+                return _restore_page(cached)
+            return view(request, *args, **kwargs)
+        try:
+            response = view(request, *args, **kwargs)
+            timeout = page_timeout()
+            if (response.status_code == 200 and not response.cookies
+                    and timeout):
+                cache.set(
+                    key,
+                    (response.content, response['Content-Type']),
+                    timeout,
+                )
+        finally:
+            cache.delete(lock_key)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
+
+
+def _last_change(last_change, feed_version, name, kwargs):
+    key = 'blog:last_change:{}:{}'.format(feed_version, md5(
+        f'{name}:{sorted(kwargs.items())}'.encode()
+    ).hexdigest())
+    cached = cache.get(key)
+    record_cache('last_change', cached is not None)
+    if cached is not None:
+        return cached
+    changes = last_change(**kwargs)
+    if changes is None:
+        found, changed = False, None
+    else:
+        # Удаления не оставляют отметок updated_at, зато сбрасывают
+        # версию
+        changes = [
+            value for value in changes.values() if value
+        ] + [bumped_at(FEED_SCOPE)]
+        found, changed = True, max(changes) if changes else None
+    timeout = page_timeout()
+    if timeout:
+        cache.set(key, (found, changed), timeout)
+    return found, changed
+
+
+def _page_validators(request, feed_version, changed):
+    user = ''
+    if request.user.is_authenticated:
+        # Формы страницы несут CSRF-токен: после нового входа он другой,
+        # и 304 оставил бы в браузере форму с недействительным токеном
+        user = ':'.join((
+            str(request.user.pk), request.session.session_key or '',
+            request.META.get('CSRF_COOKIE', ''),
+        ))
+    etag = md5(':'.join((
+        settings.PAGE_ETAG_SALT, feed_version, user,
+        request.get_full_path(), changed.isoformat() if changed else '',
+    )).encode()).hexdigest()
+    return f'W/"{etag}"', changed and int(changed.timestamp())
+
+
+def _patch_page_headers(request, response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    if request.user.is_authenticated or response.cookies:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=min(settings.FEED_HTTP_MAX_AGE, page_timeout()),
+            stale_while_revalidate=settings.FEED_STALE_WHILE_REVALIDATE,
+        )
+    patch_vary_headers(response, ('Cookie',))
+
+
+def conditional_page(last_change):
+    """Условный GET: ETag и Last-Modified, 304 без отрисовки.
+
+    `last_change(**kwargs)` получает аргументы из URL и одним
+    запросом возвращает словарь отметок времени (updated_at, pub_date)
+    того, что показывает страница, или None, если объекта страницы нет
+    или он скрыт от посторонних: тогда валидаторов нет и представление
+    само решает, отдать страницу или 404. Самая поздняя отметка и
+    время сброса версии лент — Last-Modified. Она кешируется по версии
+    лент, как страницы. Удаления отметок не оставляют, но меняют
+    версию лент, поэтому она входит и в Last-Modified, и в ETag вместе
+    с пользователем и адресом страницы.
+    Совпадение с If-None-Match или If-Modified-Since отдаёт 304
+    до вызова представления. Анонимный ответ можно кешировать
+    FEED_HTTP_MAX_AGE секунд и ещё FEED_STALE_WHILE_REVALIDATE
+    отдавать устаревшим на время перепроверки; ответ пользователю —
+    private и перепроверяется каждый раз.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            feed_version, = get_versions(FEED_SCOPE)
+            found, changed = _last_change(last_change, feed_version,
+                                          view.__name__, kwargs)
+            if not found:
+                # Нет объекта или он скрыт: If-None-Match: * и
+                # If-Modified-Since из будущего не должны дать 304
+                return view(request, *args, **kwargs)
+            etag, last_modified = _page_validators(request, feed_version,
+                                                   changed)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            _patch_page_headers(request, response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,162 @@
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from django.utils.text import Truncator
+
+from .models import FeedEntry, Post
+
+# Сколько слов текста хранить; карточка показывает первые 10
+EXCERPT_WORDS = 30
+ENTRY_FIELDS = (
+    'pub_date', 'title', 'excerpt', 'image', 'image_renditions',
+    'comment_count',
+    'is_published', 'is_visible', 'author_id', 'author_username',
+    'category_id', 'category_slug', 'category_title',
+    'category_is_published', 'location_id', 'location_name',
+    'location_is_published',
+)
+
+
+def source_posts():
+    return Post.objects.with_feed_relations()
+
+
+def entry_values(post):
+    """Поля строки ленты для поста из source_posts()."""
+    category = post.category
+    location = post.location
+    return {
+        'pub_date': post.pub_date,
+        'title': post.title,
+        'excerpt': Truncator(post.text).words(EXCERPT_WORDS),
+        'image': post.image.name or '',
+        'image_renditions': post.image_renditions,
+        # Счётчик один — Post.comment_count (blog.utils), лента его копирует
+        'comment_count': post.comment_count,
+        'is_published': post.is_published,
+        'is_visible': bool(
+            post.is_published and category and category.is_published
+        ),
+        'author_id': post.author_id,
+        'author_username': post.author.username,
+        'category_id': category.id if category else None,
+        'category_slug': category.slug if category else None,
+        'category_title': category.title if category else None,
+        'category_is_published': bool(category and category.is_published),
+        'location_id': location.id if location else None,
+        'location_name': location.name if location else None,
+        'location_is_published': bool(location and location.is_published),
+    }
+
+
+def refresh_posts(post_ids):
+    """Пересобирает строки ленты для постов `post_ids`."""
+    post_ids = set(post_ids)
+    posts = source_posts().filter(pk__in=post_ids)
+    for post in posts:
+        # UPDATE, а при его промахе INSERT — без SELECT и точки
+        # сохранения, которые делает update_or_create
+        values = entry_values(post)
+        if not FeedEntry.objects.filter(pk=post.pk).update(
+            updated_at=timezone.now(), **values
+        ):
+            FeedEntry.objects.create(post_id=post.pk, **values)
+        post_ids.discard(post.pk)
+    if post_ids:
+        FeedEntry.objects.filter(pk__in=post_ids).delete()
+
+
+def refresh_comment_count(post_ids):
+    """Копирует в ленту Post.comment_count постов `post_ids`."""
+    FeedEntry.objects.filter(pk__in=post_ids).update(
+        comment_count=Subquery(
+            Post.objects.filter(pk=OuterRef('pk')).values('comment_count')
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def touch_posts(post_ids):
+    """Отмечает правку того, что страница поста показывает помимо
+    строки ленты, — например, текста комментария.
+    """
+    FeedEntry.objects.filter(pk__in=post_ids).update(
+        updated_at=timezone.now()
+    )
+
+
+def refresh_category(category):
+    entries = FeedEntry.objects.filter(category_id=category.pk)
+    now = timezone.now()
+    if category.is_published:
+        entries.update(category_slug=category.slug,
+                       category_title=category.title,
+                       category_is_published=True,
+                       updated_at=now)
+        entries.filter(is_published=True).update(is_visible=True)
+    else:
+        entries.update(category_slug=category.slug,
+                       category_title=category.title,
+                       category_is_published=False,
+                       is_visible=False,
+                       updated_at=now)
+
+
+def detach_category(category_id):
+    # Удаление категории обнуляет Post.category без сигналов post_save
+    FeedEntry.objects.filter(category_id=category_id).update(
+        category_id=None, category_slug=None, category_title=None,
+        category_is_published=False, is_visible=False,
+        updated_at=timezone.now(),
+    )
+
+
+def refresh_location(location):
+    FeedEntry.objects.filter(location_id=location.pk).update(
+        location_name=location.name,
+        location_is_published=location.is_published,
+        updated_at=timezone.now(),
+    )
+
+
+def detach_location(location_id):
+    FeedEntry.objects.filter(location_id=location_id).update(
+        location_id=None, location_name=None, location_is_published=False,
+        updated_at=timezone.now(),
+    )
+
+
+def refresh_author(user):
+    FeedEntry.objects.filter(author_id=user.pk).exclude(
+        author_username=user.username
+    ).update(author_username=user.username, updated_at=timezone.now())
+
+
+def rebuild(batch_size=1000):
+    """Полная пересборка ленты. Вызывать в транзакции."""
+    FeedEntry.objects.all().delete()
+    batch = []
+    for post in source_posts().order_by('pk').iterator(batch_size):
+        batch.append(FeedEntry(post_id=post.pk, **entry_values(post)))
+        if len(batch) >= batch_size:
+            FeedEntry.objects.bulk_create(batch)
+            batch = []
+    FeedEntry.objects.bulk_create(batch)
+
+
+def find_inconsistencies():
+    """Пары (id поста, описание расхождения) между постами и лентой."""
+    entries = {
+        entry.pk: entry for entry in FeedEntry.objects.all().iterator()
+    }
+    for post in source_posts().iterator():
+        entry = entries.pop(post.pk, None)
+        if entry is None:
+            yield post.pk, 'нет строки ленты'
+            continue
+        expected = entry_values(post)
+        for field in ENTRY_FIELDS:
+            stored = getattr(entry, field)
+            if stored != expected[field]:
+                yield post.pk, f'{field}: {stored!r} != {expected[field]!r}'
+    for post_id in entries:
+        yield post_id, 'строка ленты без поста'
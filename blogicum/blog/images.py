@@ -0,0 +1,95 @@
+import logging
+from hashlib import sha256
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Форматы производных картинок: (ключ в image_renditions, формат Pillow,
+# расширение, MIME-тип)
+FORMATS = (
+    ('jpeg', 'JPEG', 'jpg', 'image/jpeg'),
+    ('webp', 'WEBP', 'webp', 'image/webp'),
+)
+
+
+def _encode(image, pillow_format):
+    buffer = BytesIO()
+    if pillow_format == 'JPEG':
+        image.convert('RGB').save(
+            buffer, 'JPEG', quality=settings.IMAGE_RENDITION_QUALITY,
+            optimize=True, progressive=True,
+        )
+    else:
+        image.save(buffer, pillow_format,
+                   quality=settings.IMAGE_RENDITION_QUALITY)
+    return buffer.getvalue()
+
+
+def _store(storage, source_name, extension, content):
+    """Сохраняет файл под именем с хешем содержимого.
+
+    Одинаковое содержимое получает то же имя, поэтому повторная
+    генерация ничего не перезаписывает, а файлы можно отдавать
+    с бессрочным кешированием.
+    """
+    digest = sha256(content).hexdigest()[:16]
+    stem = PurePosixPath(source_name).stem
+    name = f'{settings.IMAGE_RENDITIONS_DIR}/{stem}-{digest}.{extension}'
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(content))
+    return name
+
+
+def render_renditions(field_file):
+    """Словарь производных картинок для файла ImageField.
+
+    {'source': имя оригинала,
+     'card': {'width': .., 'height': .., 'jpeg': имя, 'webp': имя}, ...}
+    Размеры задаёт settings.IMAGE_RENDITIONS; картинки не увеличиваются.
+    """
+    renditions = {'source': field_file.name}
+    try:
+        with field_file.open('rb') as source:
+            original = ImageOps.exif_transpose(Image.open(source))
+            original.load()
+    except (OSError, ValueError):
+        logger.warning('Не удалось открыть картинку %s', field_file.name,
+                       exc_info=True)
+        return renditions
+    for label, width in settings.IMAGE_RENDITIONS.items():
+        image = original.copy()
+        image.thumbnail((width, width * 4))
+        rendition = {'width': image.width, 'height': image.height}
+        for key, pillow_format, extension, _ in FORMATS:
+            rendition[key] = _store(
+                field_file.storage, field_file.name, extension,
+                _encode(image, pillow_format),
+            )
+        renditions[label] = rendition
+    return renditions
+
+
+def needs_renditions(post):
+    return post.image_renditions.get('source', '') != (post.image.name or '')
+
+
+def refresh_renditions(post, force=False):
+    """Пересобирает производные картинки поста, если сменился оригинал.
+
+    Возвращает True, если image_renditions поста изменился. Вызывать
+    вне транзакции: кодирование картинок долгое, а запись — одна.
+    """
+    if not force and not needs_renditions(post):
+        return False
+    renditions = render_renditions(post.image) if post.image else {}
+    type(post).objects.filter(pk=post.pk).update(
+        image_renditions=renditions, updated_at=timezone.now()
+    )
+    post.image_renditions = renditions
+    return True
@@ -0,0 +1,134 @@
+"""Очередь фоновых задач в таблице Job, без внешнего брокера.
+
+Задача добавляется enqueue() в той же транзакции, что и изменение
+данных, поэтому воркер (manage.py run_worker) увидит её только после
+фиксации, а при откате она исчезнет вместе с изменением.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name, max_attempts=3):
+    """Регистрирует функцию как задачу очереди под именем `name`.
+
+    Аргументы задачи передаются через JSON, поэтому это должны быть
+    простые значения: id объектов, строки, числа. Задача выполняется
+    вне транзакции: atomic() на SQLite берёт блокировку записи сразу
+    (BEGIN IMMEDIATE), поэтому медленную работу — картинки, SMTP —
+    задача делает до или после коротких транзакций вокруг записей.
+    """
+    def decorator(func):
+        func.task_name = name
+        func.max_attempts = max_attempts
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(func, unique_key='', delay=0, **payload):
+    """Ставит задачу в очередь; возвращает Job или None.
+
+    Если задача с тем же `unique_key` ещё ждёт в очереди, новая не
+    добавляется. При settings.TASKS_EAGER задача выполняется сразу,
+    после фиксации транзакции.
+    """
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: func(**payload))
+        return None
+    job = Job(
+        name=func.task_name,
+        payload=payload,
+        unique_key=unique_key,
+        max_attempts=func.max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if not unique_key:
+        job.save()
+        return job
+    queued = Job.objects.filter(
+        unique_key=unique_key, status=Job.QUEUED
+    ).first()
+    if queued is not None:
+        return queued
+    try:
+        with transaction.atomic():
+            job.save()
+            return job
+    except IntegrityError:
+        # Параллельный запрос успел поставить такую же задачу; воркер
+        # мог уже забрать её из очереди — тогда вернётся None
+        return Job.objects.filter(
+            unique_key=unique_key, status=Job.QUEUED
+        ).first()
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи упавших воркеров."""
+    stale_before = timezone.now() - timedelta(
+        seconds=settings.TASKS_LOCK_TIMEOUT
+    )
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=stale_before
+    ).update(status=Job.QUEUED, locked_at=None)
+
+
+def claim(limit):
+    """Забирает до `limit` готовых к запуску задач; список их id.
+
+    Захват — условный UPDATE по одной задаче, так что два воркера
+    не возьмут одну задачу и без SELECT ... FOR UPDATE SKIP LOCKED.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=now
+    ).order_by('run_at', 'pk').values_list('pk', flat=True)[:limit * 2]
+    claimed = []
+    for job_id in candidates:
+        taken = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_at=now
+        )
+        if taken:
+            claimed.append(job_id)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def run_job(job_id):
+    """Выполняет захваченную задачу: успешную удаляет, упавшую
+    возвращает в очередь с экспоненциальной задержкой или помечает
+    как FAILED после max_attempts попыток.
+    """
+    job = Job.objects.get(pk=job_id)
+    attempts = job.attempts + 1
+    try:
+        TASKS[job.name](**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s упала (попытка %s)', job, attempts,
+                       exc_info=True)
+        if attempts >= job.max_attempts:
+            changes = {'status': Job.FAILED}
+        else:
+            delay = settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1)
+            changes = {
+                'status': Job.QUEUED,
+                'run_at': timezone.now() + timedelta(seconds=delay),
+            }
+        Job.objects.filter(pk=job.pk).update(
+            attempts=attempts, locked_at=None, last_error=error, **changes
+        )
+        return False
+    job.delete()
+    return True
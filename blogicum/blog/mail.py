@@ -0,0 +1,128 @@
+"""Отправка почты через очередь.
+
+QueuedEmailBackend только сохраняет письма в OutgoingEmail и ставит
+задачу blog.deliver_email; задача отправляет их пачками через
+settings.EMAIL_DELIVERY_BACKEND, открывая одно соединение на пачку.
+Пачка сначала захватывается короткой транзакцией (статус SENDING),
+поэтому два воркера не отправят одно письмо дважды, а SMTP идёт уже
+вне транзакции.
+"""
+import logging
+import pickle
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.utils import timezone
+
+from . import jobs
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        # Импорт здесь: blog.tasks тянет представления, а бэкенд почты
+        # загружается и из django.contrib.auth
+        from .tasks import deliver_email
+
+        queued = []
+        for message in email_messages:
+            if not message.recipients():
+                continue
+            # Соединение не сериализуется и в воркере будет другим
+            message.connection = None
+            queued.append(OutgoingEmail(
+                subject=str(message.subject)[:256],
+                recipients=', '.join(message.recipients()),
+                message=pickle.dumps(message),
+            ))
+        if queued:
+            with transaction.atomic():
+                OutgoingEmail.objects.bulk_create(queued)
+                jobs.enqueue(deliver_email, unique_key='mail:deliver')
+        return len(queued)
+
+
+def claim(batch_size):
+    """Забирает в отправку до `batch_size` ждущих писем.
+
+    Письма, взятые дольше TASKS_LOCK_TIMEOUT секунд назад (воркер
+    упал посреди пачки), сначала возвращаются в очередь.
+    """
+    now = timezone.now()
+    OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENDING,
+        locked_at__lt=now - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT),
+    ).update(status=OutgoingEmail.PENDING, locked_at=None)
+    with transaction.atomic():
+        candidates = list(OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING
+        ).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        # Условие на статус: письмо, которое успел взять другой
+        # воркер, не перезаписывается
+        OutgoingEmail.objects.filter(
+            pk__in=candidates, status=OutgoingEmail.PENDING
+        ).update(status=OutgoingEmail.SENDING, locked_at=now)
+    return list(OutgoingEmail.objects.filter(
+        pk__in=candidates, status=OutgoingEmail.SENDING, locked_at=now
+    ))
+
+
+def _release(emails):
+    OutgoingEmail.objects.filter(
+        pk__in=[email.pk for email in emails]
+    ).update(status=OutgoingEmail.PENDING, locked_at=None)
+
+
+def _send(connection, email):
+    """Отправляет одно взятое письмо и сразу отмечает результат."""
+    try:
+        connection.send_messages([pickle.loads(email.message)])
+    except Exception as error:
+        logger.warning('Письмо %s не отправлено', email.pk, exc_info=True)
+        attempts = email.attempts + 1
+        OutgoingEmail.objects.filter(pk=email.pk).update(
+            attempts=attempts,
+            last_error=f'{type(error).__name__}: {error}',
+            status=(
+                OutgoingEmail.FAILED
+                if attempts >= settings.EMAIL_MAX_ATTEMPTS
+                else OutgoingEmail.PENDING
+            ),
+            locked_at=None,
+        )
+        return False
+    OutgoingEmail.objects.filter(pk=email.pk).delete()
+    return True
+
+
+def deliver_pending(batch_size=None):
+    """Отправляет пачку ждущих писем через одно соединение.
+
+    Возвращает (отправлено, не отправлено, осталось в очереди).
+    Вызывать вне транзакции.
+    """
+    emails = claim(batch_size or settings.EMAIL_BATCH_SIZE)
+    if not emails:
+        return 0, 0, 0
+    connection = get_connection(settings.EMAIL_DELIVERY_BACKEND)
+    try:
+        connection.open()
+    except Exception:
+        _release(emails)
+        raise
+    sent = 0
+    try:
+        for email in emails:
+            sent += _send(connection, email)
+    finally:
+        connection.close()
+    remaining = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING
+    ).count()
+    return sent, len(emails) - sent, remaining
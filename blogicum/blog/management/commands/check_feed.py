@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog import feed
+from blog.cache import FEED_SCOPE, bump_versions
+
+
+class Command(BaseCommand):
+    help = 'Сверяет ленту FeedEntry с публикациями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Пересобрать строки ленты с расхождениями.',
+        )
+
+    def handle(self, *args, **options):
+        broken = set()
+        for post_id, problem in feed.find_inconsistencies():
+            broken.add(post_id)
+            self.stdout.write(f'Пост {post_id}: {problem}')
+        if not broken:
+            self.stdout.write(self.style.SUCCESS('Лента согласована.'))
+            return
+        if not options['repair']:
+            raise CommandError(f'Расхождений в ленте: {len(broken)}')
+        with transaction.atomic():
+            feed.refresh_posts(broken)
+        bump_versions(FEED_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено записей ленты: {len(broken)}'
+        ))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blogicum.templating import precompile
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает все шаблоны проекта и приложений; завершается с '
+        'ошибкой, если какой-то шаблон не разбирается. Запускать перед '
+        'выкладкой.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*',
+                            help='только эти шаблоны')
+
+    def handle(self, *args, **options):
+        compiled, errors = precompile(options['names'] or None)
+        for name, error in errors:
+            self.stderr.write(f'{name}: {error}')
+        if errors:
+            raise CommandError(
+                f'Шаблонов с ошибками: {len(errors)} из '
+                f'{compiled + len(errors)}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Разобрано шаблонов: {compiled}'
+        ))
@@ -0,0 +1,98 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from blog.models import Category, FeedEntry, Post
+
+# Признаки полного просмотра таблицы в планах SQLite и PostgreSQL
+FULL_SCAN_MARKERS = (
+    'SCAN blog_post\n', 'Seq Scan on blog_post',
+    'SCAN blog_feedentry\n', 'Seq Scan on blog_feedentry',
+)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает планы и время запросов лент; с --compare сравнивает '
+        'их с планами без индексов ленты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20,
+                            help='Сколько раз выполнить каждый запрос.')
+        parser.add_argument('--compare', action='store_true',
+                            help='Сначала показать планы без индексов.')
+        parser.add_argument('--strict', action='store_true',
+                            help='Ошибка, если лента читает таблицу '
+                                 'полным просмотром.')
+
+    def feed_querysets(self):
+        sources = {
+            # Ленты на сайте читают денормализованную таблицу
+            'feed': FeedEntry.objects.published().order_by(
+                '-pub_date', '-pk'
+            ),
+            # Исходный запрос по постам, из которого она строится
+            'posts': Post.objects.published().with_feed_relations(
+            ).order_by('-pub_date', '-pk'),
+        }
+        category = Category.objects.filter(is_published=True).first()
+        author = get_user_model().objects.first()
+        feeds = {}
+        for source, published in sources.items():
+            feeds[f'{source}:index'] = published
+            if category is not None:
+                feeds[f'{source}:category'] = published.filter(
+                    category_id=category.id
+                )
+            if author is not None:
+                feeds[f'{source}:profile'] = published.filter(
+                    author_id=author.id
+                )
+        return {name: qs[:11] for name, qs in feeds.items()}
+
+    def report(self, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        full_scans = []
+        for name, queryset in self.feed_querysets().items():
+            plan = queryset.explain()
+            started = time.perf_counter()
+            for _ in range(self.runs):
+                list(queryset)
+            elapsed = (time.perf_counter() - started) / self.runs * 1000
+            self.stdout.write(f'{name}: {elapsed:.2f} мс')
+            self.stdout.write(plan)
+            if any(marker in plan + '\n' for marker in FULL_SCAN_MARKERS):
+                full_scans.append(name)
+        return full_scans
+
+    def handle(self, *args, **options):
+        self.runs = options['runs']
+        if options['compare']:
+            if not connection.features.can_rollback_ddl:
+                raise CommandError(
+                    'Сравнение требует транзакционного DDL.'
+                )
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        for index in [*Post._meta.indexes,
+                                      *FeedEntry._meta.indexes]:
+                            cursor.execute('DROP INDEX %s' % (
+                                connection.ops.quote_name(index.name)
+                            ))
+                    self.report('Без индексов ленты')
+                    raise Rollback
+            except Rollback:
+                pass
+        full_scans = self.report('С индексами ленты')
+        if full_scans and options['strict']:
+            raise CommandError(
+                'Полный просмотр таблицы в лентах: ' + ', '.join(full_scans)
+            )
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import django_bootstrap5
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from blogicum.csspurge import CRITICAL_TEMPLATES, purge, used_words
+
+
+def _files(directory, suffixes):
+    return [
+        path for path in Path(directory).rglob('*')
+        if path.is_file() and path.suffix in suffixes
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает урезанный Bootstrap (settings.SITE_CSS) только с '
+        'классами из шаблонов проекта и разметки django_bootstrap5, '
+        'а с --critical — ещё и критический CSS для base.html и шапки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', default='css/bootstrap.min.css',
+            help='Полная таблица стилей среди статики.',
+        )
+        parser.add_argument(
+            '--output-dir', default=settings.STATICFILES_DIRS[0],
+            help='Каталог статики, куда записать результат.',
+        )
+        parser.add_argument('--critical', action='store_true')
+
+    def handle(self, *args, **options):
+        source = finders.find(options['source'])
+        if source is None:
+            raise CommandError(f'Не найдена статика {options["source"]}')
+        css = Path(source).read_text(encoding='utf-8')
+        templates = {
+            path.relative_to(directory).as_posix(): path
+            for directory in settings.TEMPLATES[0]['DIRS']
+            for path in _files(directory, {'.html', '.txt'})
+        }
+        # Формы django_bootstrap5 рисует и шаблонами, и из Python
+        bootstrap = _files(Path(django_bootstrap5.__file__).parent,
+                           {'.html', '.py'})
+        outputs = {
+            settings.SITE_CSS: used_words([*templates.values(), *bootstrap]),
+        }
+        if options['critical']:
+            outputs[settings.SITE_CSS_CRITICAL] = used_words(
+                templates[name] for name in CRITICAL_TEMPLATES
+            )
+        for name, words in outputs.items():
+            target = Path(options['output_dir']) / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            purged = purge(css, words)
+            target.write_text(purged, encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: {len(purged) // 1024} КиБ из {len(css) // 1024}'
+            ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import feed
+from blog.cache import FEED_SCOPE, bump_versions
+from blog.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Полностью пересобирает денормализованную ленту FeedEntry.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            feed.rebuild(batch_size=options['batch_size'])
+        bump_versions(FEED_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в ленте: {FeedEntry.objects.count()}'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from blog import feed, images
+from blog.cache import CARDS_SCOPE, FEED_SCOPE, bump_versions
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные копии фото постов, у которых их ещё нет '
+        'или которые устарели.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии у всех постов с фото, например после '
+                 'смены IMAGE_RENDITIONS.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only(
+            'pk', 'image', 'image_renditions'
+        )
+        changed = []
+        for post in posts.iterator():
+            if images.refresh_renditions(post, force=options['force']):
+                feed.refresh_posts([post.pk])
+                changed.append(post.pk)
+        if changed:
+            bump_versions(CARDS_SCOPE, FEED_SCOPE)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлены копии фото у постов: {len(changed)}'
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import search
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересобирает поисковый индекс постов текущим движком '
+        '(settings.SEARCH_BACKEND).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.rebuild(batch_size=options['batch_size'])
+        backend = type(search.get_backend()).__name__
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано постов: {Post.objects.count()} ({backend})'
+        ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from blog import feed
+from blog.cache import FEED_SCOPE, bump_versions
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Сверяет и чинит счётчик comment_count у публикаций.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не менять.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = Post.objects.with_comment_count().exclude(
+                comment_count=F('actual_comment_count')
+            ).values_list('pk', 'comment_count', 'actual_comment_count')
+            drifted = list(drifted)
+            for pk, stored, actual in drifted:
+                self.stdout.write(f'Пост {pk}: {stored} -> {actual}')
+                if not options['dry_run']:
+                    Post.objects.filter(pk=pk).update(comment_count=actual)
+            if not options['dry_run']:
+                feed.refresh_comment_count([pk for pk, _, _ in drifted])
+        if drifted and not options['dry_run']:
+            bump_versions(FEED_SCOPE)
+        action = 'Найдено' if options['dry_run'] else 'Исправлено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} расхождений: {len(drifted)}'
+        ))
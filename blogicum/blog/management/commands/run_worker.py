@@ -0,0 +1,64 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog import jobs, tasks  # noqa: F401 — регистрирует задачи
+
+
+def _close_connections():
+    # Дочерний процесс не должен пользоваться соединениями родителя
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди blog.jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=2,
+            help='Число процессов-исполнителей; 0 — выполнять задачи '
+                 'в этом процессе.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти, не дожидаясь новых.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        executor = None
+        if concurrency:
+            _close_connections()
+            executor = ProcessPoolExecutor(
+                concurrency, initializer=_close_connections
+            )
+        done = failed = 0
+        try:
+            while True:
+                jobs.requeue_stale()
+                job_ids = jobs.claim(max(concurrency, 1))
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                if executor is None:
+                    results = [jobs.run_job(job_id) for job_id in job_ids]
+                else:
+                    results = list(executor.map(jobs.run_job, job_ids))
+                done += results.count(True)
+                failed += results.count(False)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'
+        ))
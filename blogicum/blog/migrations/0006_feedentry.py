@@ -0,0 +1,88 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.text import Truncator
+
+
+def fill_feed(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    FeedEntry = apps.get_model('blog', 'FeedEntry')
+    entries = []
+    posts = Post.objects.select_related('author', 'category', 'location')
+    for post in posts.iterator():
+        category, location = post.category, post.location
+        entries.append(FeedEntry(
+            post_id=post.pk,
+            pub_date=post.pub_date,
+            title=post.title,
+            excerpt=Truncator(post.text).words(30),
+            image=post.image.name or '',
+            comment_count=post.comment_count,
+            is_published=post.is_published,
+            is_visible=bool(
+                post.is_published and category and category.is_published
+            ),
+            author_id=post.author_id,
+            author_username=post.author.username,
+            category_id=category.id if category else None,
+            category_slug=category.slug if category else None,
+            category_title=category.title if category else None,
+            category_is_published=bool(category and category.is_published),
+            location_id=location.id if location else None,
+            location_name=location.name if location else None,
+            location_is_published=bool(location and location.is_published),
+        ))
+        if len(entries) >= 1000:
+            FeedEntry.objects.bulk_create(entries)
+            entries = []
+    FeedEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feed_entry', serialize=False, to='blog.post', verbose_name='Публикация')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата и время публикации')),
+                ('title', models.CharField(max_length=256, verbose_name='Заголовок')),
+                ('excerpt', models.TextField(verbose_name='Начало текста')),
+                ('image', models.CharField(blank=True, max_length=100, verbose_name='Фото')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('is_published', models.BooleanField(verbose_name='Пост опубликован')),
+                ('is_visible', models.BooleanField(help_text='Пост и его категория опубликованы.', verbose_name='Виден в ленте')),
+                ('author_id', models.BigIntegerField(verbose_name='Автор')),
+                ('author_username', models.CharField(max_length=150, verbose_name='Имя автора')),
+                ('category_id', models.BigIntegerField(null=True, verbose_name='Категория')),
+                ('category_slug', models.SlugField(null=True, verbose_name='Идентификатор категории')),
+                ('category_title', models.CharField(max_length=256, null=True, verbose_name='Категория')),
+                ('category_is_published', models.BooleanField(default=False, verbose_name='Категория опубликована')),
+                ('location_id', models.BigIntegerField(null=True, verbose_name='Местоположение')),
+                ('location_name', models.CharField(max_length=256, null=True, verbose_name='Местоположение')),
+                ('location_is_published', models.BooleanField(default=False, verbose_name='Местоположение опубликовано')),
+            ],
+            options={
+                'verbose_name': 'запись ленты',
+                'verbose_name_plural': 'Лента',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['pub_date', 'post'], name='feed_visible_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(condition=models.Q(('is_visible', True)), fields=['category_id', 'pub_date', 'post'], name='feed_category_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['author_id', 'pub_date', 'post'], name='feed_author_pub_date_idx'),
+        ),
+        migrations.RunPython(fill_feed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,176 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:19
+
+import re
+import sqlite3
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия blog.search на момент миграции: историческая миграция не
+# должна зависеть от живого кода, который потом будет меняться
+FTS_TABLE = 'blog_post_fts'
+PG_TABLE = 'blog_post_search'
+WORD_RE = re.compile(r'\w+')
+TITLE_WEIGHT = 5
+MAX_TERM_LENGTH = 64
+
+
+def _normalize(text):
+    return text.lower().replace('ё', 'е')
+
+
+def _term_weights(title, text):
+    def tokenize(value):
+        return [
+            word[:MAX_TERM_LENGTH]
+            for word in WORD_RE.findall(_normalize(value))
+            if len(word) > 1 or word.isdigit()
+        ]
+
+    weights = Counter(text and tokenize(text))
+    for term in tokenize(title):
+        weights[term] += TITLE_WEIGHT
+    return weights
+
+
+def _fts5_supported():
+    probe = sqlite3.connect(':memory:')
+    try:
+        probe.execute('CREATE VIRTUAL TABLE probe USING fts5(text)')
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def _backend_name(connection):
+    name = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if name != 'auto':
+        return name
+    if connection.vendor == 'sqlite' and _fts5_supported():
+        return 'sqlite'
+    if connection.vendor == 'postgresql':
+        return 'postgres'
+    return 'simple'
+
+
+def _install_sqlite(cursor):
+    cursor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING '
+        "fts5(title, text, tokenize='unicode61 remove_diacritics 2')"
+    )
+
+
+def _index_sqlite(cursor, rows):
+    cursor.executemany(
+        f'INSERT INTO {FTS_TABLE} (rowid, title, text) VALUES (%s, %s, %s)',
+        [(pk, _normalize(title), _normalize(text))
+         for pk, title, text in rows],
+    )
+
+
+def _install_postgres(cursor):
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {PG_TABLE} ('
+        'post_id bigint PRIMARY KEY REFERENCES blog_post (id) '
+        'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+        'document tsvector NOT NULL)'
+    )
+    cursor.execute(
+        f'CREATE INDEX IF NOT EXISTS {PG_TABLE}_document_idx '
+        f'ON {PG_TABLE} USING GIN (document)'
+    )
+
+
+def _index_postgres(cursor, rows):
+    cursor.executemany(
+        f'INSERT INTO {PG_TABLE} (post_id, document) VALUES (%s, '
+        "setweight(to_tsvector('russian', %s), 'A') || "
+        "setweight(to_tsvector('russian', %s), 'B')) "
+        'ON CONFLICT (post_id) DO NOTHING',
+        [(pk, _normalize(title), _normalize(text))
+         for pk, title, text in rows],
+    )
+
+
+def _index_simple(token_model, alias, rows):
+    token_model.objects.using(alias).bulk_create([
+        token_model(post_id=pk, term=term, weight=weight)
+        for pk, title, text in rows
+        for term, weight in _term_weights(title, text).items()
+    ])
+
+
+def _index(name, cursor, token_model, alias, rows):
+    if not rows:
+        return
+    if name == 'simple':
+        _index_simple(token_model, alias, rows)
+    elif name == 'sqlite':
+        _index_sqlite(cursor, rows)
+    else:
+        _index_postgres(cursor, rows)
+
+
+def build_index(apps, schema_editor, batch_size=1000):
+    connection = schema_editor.connection
+    alias = connection.alias
+    Post = apps.get_model('blog', 'Post')
+    token_model = apps.get_model('blog', 'SearchToken')
+    name = _backend_name(connection)
+    rows = Post.objects.using(alias).order_by('pk').values_list(
+        'pk', 'title', 'text'
+    ).iterator(batch_size)
+    with connection.cursor() as cursor:
+        if name == 'postgres':
+            _install_postgres(cursor)
+        elif name == 'sqlite':
+            _install_sqlite(cursor)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                _index(name, cursor, token_model, alias, batch)
+                batch = []
+        _index(name, cursor, token_model, alias, batch)
+
+
+def drop_index(apps, schema_editor):
+    connection = schema_editor.connection
+    table = {'sqlite': FTS_TABLE, 'postgres': PG_TABLE}.get(
+        _backend_name(connection)
+    )
+    if table:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_feedentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveIntegerField(verbose_name='Вес')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'слово поиска',
+                'verbose_name_plural': 'Слова поиска',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchtoken',
+            index=models.Index(fields=['term', 'post'], name='search_term_post_idx'),
+        ),
+        migrations.RunPython(build_index, drop_index),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-18 05:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedentry',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Уменьшенные копии фото'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Заполняется автоматически, см. blog.images.', verbose_name='Уменьшенные копии фото'),
+        ),
+    ]
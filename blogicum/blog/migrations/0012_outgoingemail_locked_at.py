@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-18 06:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outgoingemail',
+            name='locked_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Взято в отправку'),
+        ),
+        migrations.AlterField(
+            model_name='outgoingemail',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ждёт отправки'), ('sending', 'Отправляется'), ('failed', 'Не отправлено')], default='pending', max_length=10, verbose_name='Состояние'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.shortcuts import redirect
+
+
+class OwnerRequiredMixin:
+    """Доступ к объекту только для его автора.
+
+    Объект выбирается один раз и запоминается на view: проверка
+    владельца в dispatch и сам generic view работают с одним
+    экземпляром. Чужих пользователей перенаправляет на
+    get_owner_redirect_url(). Проверка и редирект используют только
+    *_id поля, поэтому связанные объекты не подгружаются; то, что
+    нужно шаблону, перечисляется в select_related.
+    """
+
+    owner_field = 'author'
+    select_related = ()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        return queryset
+
+    def get_object(self, queryset=None):
+        if queryset is not None:
+            return super().get_object(queryset)
+        if not hasattr(self, '_owned_object'):
+            self._owned_object = super().get_object()
+        return self._owned_object
+
+    def is_owner(self, obj):
+        owner_id = getattr(obj, f'{self.owner_field}_id')
+        return owner_id == self.request.user.pk
+
+    def get_owner_redirect_url(self, obj):
+        raise NotImplementedError
+
+    def dispatch(self, request, *args, **kwargs):
+        # LoginRequiredMixin стоит раньше, поэтому гость сюда не дойдёт
+        if request.user.is_authenticated:
+            obj = self.get_object()
+            if not self.is_owner(obj):
+                return redirect(self.get_owner_redirect_url(obj))
+        return super().dispatch(request, *args, **kwargs)
@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.query import ModelIterable
+from django.utils import timezone
+
+from .cache import feed_now
 
 User = get_user_model()
 
@@ -16,6 +20,11 @@ class PublishedModel(models.Model):
                                        ))
     created_at = models.DateTimeField(auto_now_add=True,
                                       verbose_name='Добавлено')
+    # По отметкам правок считается Last-Modified страниц, см.
+    # blog.cache.conditional_page
+    updated_at = models.DateTimeField(auto_now=True,
+                                      db_index=True,
+                                      verbose_name='Изменено')
 
     class Meta:
         abstract = True
@@ -53,6 +62,31 @@ class Location(PublishedModel):
         return self.name[:MAX_DISPLAY_LENGTH]
 
 
+class PostQuerySet(models.QuerySet):
+    def published(self, now=None):
+        """Посты, видимые всем: опубликованы, дата наступила,
+        категория опубликована.
+
+        По умолчанию «сейчас» берётся из feed_now(), чтобы одинаковые
+        запросы в пределах окна давали одинаковый SQL.
+        """
+        return self.filter(
+            is_published=True,
+            pub_date__lte=now or feed_now(),
+            category__is_published=True,
+        )
+
+    def with_feed_relations(self):
+        """Всё, что читает карточка поста, одним JOIN."""
+        return self.select_related('author', 'category', 'location')
+
+    def with_comment_count(self):
+        """Фактическое число комментариев (агрегат) в
+        `actual_comment_count`; хранимый счётчик — поле comment_count.
+        """
+        return self.annotate(actual_comment_count=models.Count('comments'))
+
+
 class Post(PublishedModel):
     title = models.CharField(max_length=MAX_TITLE_LENGTH,
                              verbose_name='Заголовок')
@@ -76,10 +110,41 @@ class Post(PublishedModel):
                                  verbose_name='Категория')
 
     image = models.ImageField('Фото', upload_to='posts_images', blank=True)
+    image_renditions = models.JSONField(
+        'Уменьшенные копии фото',
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text='Заполняется автоматически, см. blog.images.',
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+        help_text=(
+            'Денормализованный счётчик; пересчитывается командой '
+            'recount_comments.'
+        ))
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            # Лента: is_published=True, pub_date <= now, по убыванию даты
+            models.Index(fields=('is_published', 'pub_date'),
+                         name='post_published_pub_date_idx'),
+            models.Index(fields=('category', 'is_published', 'pub_date'),
+                         name='post_category_pub_date_idx'),
+            models.Index(fields=('author', 'pub_date'),
+                         name='post_author_pub_date_idx'),
+            # Частичный индекс только по опубликованным постам; на СУБД
+            # без поддержки частичных индексов Django его пропускает
+            models.Index(fields=('pub_date',),
+                         condition=models.Q(is_published=True),
+                         name='post_live_pub_date_idx'),
+        )
 
     def __str__(self):
         return self.title[:MAX_DISPLAY_LENGTH]
@@ -97,5 +162,242 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            models.Index(fields=('post', 'created_at'),
+                         name='comment_post_created_idx'),
+        )
+
+
+class PostFromEntryIterable(ModelIterable):
+    """Отдаёт вместо записей ленты готовые к выводу объекты Post."""
+
+    def __iter__(self):
+        for entry in super().__iter__():
+            yield entry.to_post()
+
+
+class FeedEntryQuerySet(models.QuerySet):
+    def published(self, now=None):
+        return self.filter(is_visible=True, pub_date__lte=now or feed_now())
+
+    def as_posts(self):
+        """Выдаёт Post со связанными author/category/location,
+        собранные из строки ленты без обращения к другим таблицам.
+        """
+        clone = self._chain()
+        clone._iterable_class = PostFromEntryIterable
+        return clone
+
 
+class FeedEntry(models.Model):
+    """Денормализованная строка ленты: всё, что показывает карточка
+    поста. Поддерживается сигналами (blog/signals.py), пересобирается
+    командой rebuild_feed, проверяется командой check_feed.
+    """
 
+    post = models.OneToOneField(Post,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='feed_entry',
+                                verbose_name='Публикация')
+    pub_date = models.DateTimeField('Дата и время публикации')
+    title = models.CharField('Заголовок', max_length=MAX_TITLE_LENGTH)
+    excerpt = models.TextField('Начало текста')
+    image = models.CharField('Фото', max_length=100, blank=True)
+    image_renditions = models.JSONField(
+        'Уменьшенные копии фото', default=dict, blank=True
+    )
+    comment_count = models.PositiveIntegerField('Комментариев', default=0)
+    is_published = models.BooleanField('Пост опубликован')
+    is_visible = models.BooleanField(
+        'Виден в ленте',
+        help_text='Пост и его категория опубликованы.'
+    )
+    author_id = models.BigIntegerField('Автор')
+    author_username = models.CharField('Имя автора', max_length=150)
+    category_id = models.BigIntegerField('Категория', null=True)
+    category_slug = models.SlugField('Идентификатор категории', null=True)
+    category_title = models.CharField('Категория',
+                                      max_length=MAX_TITLE_LENGTH,
+                                      null=True)
+    category_is_published = models.BooleanField('Категория опубликована',
+                                                default=False)
+    location_id = models.BigIntegerField('Местоположение', null=True)
+    location_name = models.CharField('Местоположение',
+                                     max_length=MAX_TITLE_LENGTH,
+                                     null=True)
+    location_is_published = models.BooleanField(
+        'Местоположение опубликовано', default=False
+    )
+    # queryset.update() не трогает auto_now: blog.feed ставит сам
+    updated_at = models.DateTimeField('Изменено', auto_now=True,
+                                      db_index=True)
+
+    objects = FeedEntryQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Лента'
+        # Порядок ленты (pub_date, post) целиком лежит в индексах;
+        # видимые записи — частичными индексами по is_visible
+        indexes = (
+            models.Index(fields=('pub_date', 'post'),
+                         condition=models.Q(is_visible=True),
+                         name='feed_visible_pub_date_idx'),
+            models.Index(fields=('category_id', 'pub_date', 'post'),
+                         condition=models.Q(is_visible=True),
+                         name='feed_category_pub_date_idx'),
+            models.Index(fields=('author_id', 'pub_date', 'post'),
+                         name='feed_author_pub_date_idx'),
+        )
+
+    def __str__(self):
+        return self.title[:MAX_DISPLAY_LENGTH]
+
+    def to_post(self):
+        post = Post(
+            id=self.post_id,
+            title=self.title,
+            text=self.excerpt,
+            pub_date=self.pub_date,
+            is_published=self.is_published,
+            image=self.image,
+            image_renditions=self.image_renditions,
+            comment_count=self.comment_count,
+            # Для ключа кеша карточки (blog.cache.post_card_key)
+            updated_at=self.updated_at,
+        )
+        post.author = User(id=self.author_id, username=self.author_username)
+        post.category = None
+        if self.category_id is not None:
+            post.category = Category(id=self.category_id,
+                                     slug=self.category_slug,
+                                     title=self.category_title,
+                                     is_published=self.category_is_published)
+        post.location = None
+        if self.location_id is not None:
+            post.location = Location(id=self.location_id,
+                                     name=self.location_name,
+                                     is_published=self.location_is_published)
+        post._state.adding = False
+        post._state.db = self._state.db
+        return post
+
+
+class SearchToken(models.Model):
+    """Слово поста для запасного движка поиска (blog.search.simple)."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+        verbose_name='Публикация',
+    )
+    term = models.CharField('Слово', max_length=64)
+    weight = models.PositiveIntegerField('Вес')
+
+    class Meta:
+        verbose_name = 'слово поиска'
+        verbose_name_plural = 'Слова поиска'
+        indexes = (
+            models.Index(fields=('term', 'post'),
+                         name='search_term_post_idx'),
+        )
+
+
+class Job(models.Model):
+    """Фоновая задача очереди blog.tasks.
+
+    Выполненные задачи удаляются; в таблице остаются ждущие,
+    выполняемые и окончательно упавшие.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=100)
+    payload = models.JSONField('Аргументы', default=dict, blank=True)
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUS_CHOICES, default=QUEUED
+    )
+    unique_key = models.CharField(
+        'Ключ уникальности',
+        max_length=200,
+        blank=True,
+        help_text='Пока задача с этим ключом в очереди, такая же '
+                  'не добавляется.',
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveIntegerField('Предел попыток', default=3)
+    run_at = models.DateTimeField('Выполнить не раньше', default=timezone.now)
+    locked_at = models.DateTimeField('Взята в работу', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('run_at', 'pk')
+        indexes = (
+            models.Index(fields=('run_at', 'id'),
+                         name='job_queued_run_at_idx',
+                         condition=models.Q(status='queued')),
+        )
+        constraints = (
+            models.UniqueConstraint(
+                fields=('unique_key',),
+                name='job_queued_unique_key',
+                condition=(models.Q(status='queued')
+                           & ~models.Q(unique_key='')),
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (blog.mail.QueuedEmailBackend).
+
+    Отправленные письма удаляются; остаются ждущие, взятые в
+    отправку и те, что не ушли за EMAIL_MAX_ATTEMPTS попыток.
+    """
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ждёт отправки'),
+        (SENDING, 'Отправляется'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField('Тема', max_length=256, blank=True)
+    recipients = models.TextField('Получатели')
+    message = models.BinaryField('Письмо')
+    status = models.CharField(
+        'Состояние', max_length=10, choices=STATUS_CHOICES, default=PENDING
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    locked_at = models.DateTimeField('Взято в отправку', null=True,
+                                     blank=True)
+    created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('pk',)
+        indexes = (
+            models.Index(fields=('id',), name='email_pending_idx',
+                         condition=models.Q(status='pending')),
+        )
+
+    def __str__(self):
+        return f'{self.subject[:MAX_DISPLAY_LENGTH]} → {self.recipients}'
@@ -0,0 +1,283 @@
+import base64
+import binascii
+import json
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from blogicum.metrics import record_cache
+
+from .cache import FEED_SCOPE, get_versions
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPaginator:
+    """Постраничный вывод по ключу (seek-пагинация).
+
+    Вместо OFFSET страница выбирается условием по последнему показанному
+    ключу `ordering`, поэтому стоимость любой страницы — O(per_page).
+    Курсоры непрозрачны: это base64 от значений полей ключа.
+    """
+
+    def __init__(self, object_list, per_page,
+                 ordering=('-pub_date', '-pk'), with_count=False):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.with_count = with_count
+
+    @cached_property
+    def count(self):
+        """Общее число объектов; в режиме без подсчёта — None."""
+        if not self.with_count:
+            return None
+        return self.object_list.count()
+
+    def _fields(self):
+        return [
+            (name.lstrip('-'), name.startswith('-'))
+            for name in self.ordering
+        ]
+
+    def _model_field(self, name):
+        model = self.object_list.model
+        if name == 'pk':
+            return model._meta.pk
+        return model._meta.get_field(name)
+
+    def encode_cursor(self, obj):
+        values = [
+            self._model_field(name).value_to_string(obj)
+            if name != 'pk' else obj.pk
+            for name, _ in self._fields()
+        ]
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, binascii.Error, UnicodeDecodeError):
+            raise InvalidCursor(cursor)
+        fields = self._fields()
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise InvalidCursor(cursor)
+        try:
+            return [
+                self._model_field(name).to_python(value)
+                for (name, _), value in zip(fields, values)
+            ]
+        except ValidationError:
+            raise InvalidCursor(cursor)
+
+    def _seek(self, values, forward):
+        """Условие «строго после ключа `values`» в направлении обхода."""
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self._fields(), values):
+            lookup = 'lt' if descending == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def _order(self, forward):
+        if forward:
+            return self.ordering
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in self.ordering
+        )
+
+    def _fetch(self, values, forward):
+        queryset = self.object_list.order_by(*self._order(forward))
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        return rows, has_more
+
+    def page(self, after=None, before=None):
+        """Страница после курсора `after` или перед курсором `before`.
+
+        Пустой `before` означает последнюю страницу.
+        Некорректный курсор приводит к исключению InvalidCursor.
+        """
+        if before is not None:
+            values = self.decode_cursor(before) if before else None
+            rows, has_previous = self._fetch(values, forward=False)
+            return KeysetPage(rows, self, has_previous=has_previous,
+                              has_next=bool(before))
+        values = self.decode_cursor(after) if after else None
+        rows, has_next = self._fetch(values, forward=True)
+        return KeysetPage(rows, self, has_previous=bool(after),
+                          has_next=has_next)
+
+    def get_page(self, after=None, before=None):
+        """Как page(), но при некорректном курсоре отдаёт первую страницу."""
+        try:
+            return self.page(after=after, before=before)
+        except InvalidCursor:
+            return self.page()
+
+
+class KeysetPage:
+    """Страница seek-пагинации.
+
+    Повторяет интерфейс django.core.paginator.Page, который нужен
+    шаблонам, и добавляет курсоры соседних страниц.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @cached_property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @cached_property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator, который кеширует COUNT(*) выборки.
+
+    Ключ — версия лент и SQL выборки, поэтому у каждой ленты и фильтра
+    свой счётчик, а любая правка постов сбрасывает их все.
+    """
+
+    @cached_property
+    def count(self):
+        try:
+            sql = str(self.object_list.query)
+        except EmptyResultSet:
+            return 0
+        except AttributeError:
+            # Не QuerySet (список и т. п.) — считать дёшево
+            return len(self.object_list)
+        feed_version, = get_versions(FEED_SCOPE)
+        key = f'blog:count:{feed_version}:{md5(sql.encode()).hexdigest()}'
+        count = cache.get(key)
+        record_cache('count', count is not None)
+        if count is None:
+            count = self.object_list.count()
+            cache.set(key, count, settings.FEED_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class ProbePaginator(Paginator):
+    """Нумерованные страницы без COUNT(*).
+
+    Страница выбирается с одной лишней строкой: по ней видно, есть ли
+    следующая. Общее число страниц неизвестно, поэтому count и
+    num_pages равны None, а ссылки ведут не дальше следующей страницы.
+    """
+
+    count = None
+    num_pages = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Сколько страниц заведомо существует после последнего page()
+        self.known_pages = 1
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым.')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1.')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет результатов.')
+        has_next = len(rows) > self.per_page
+        self.known_pages = number + 1 if has_next else number
+        return ProbePage(rows[:self.per_page], number, self, has_next)
+
+    def get_page(self, number):
+        """Как page(), но вместо несуществующей страницы отдаёт первую."""
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            return self.page(1)
+
+    @property
+    def page_range(self):
+        return range(1, self.known_pages + 1)
+
+    def get_elided_page_range(self, number=1, *, on_each_side=3, on_ends=2):
+        number = self.validate_number(number)
+        if number > on_each_side + on_ends + 2:
+            yield from range(1, on_ends + 1)
+            yield self.ELLIPSIS
+            yield from range(number - on_each_side, self.known_pages + 1)
+        else:
+            yield from self.page_range
+
+
+class ProbePage(Page):
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        if not self._has_next:
+            raise EmptyPage('На этой странице нет результатов.')
+        return self.number + 1
+
+    def end_index(self):
+        return self.start_index() + len(self) - 1 if len(self) else 0
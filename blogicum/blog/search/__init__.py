@@ -0,0 +1,84 @@
+"""Полнотекстовый поиск по постам.
+
+Движок выбирается settings.SEARCH_BACKEND: 'sqlite' (FTS5),
+'postgres' (tsvector + GIN), 'simple' (таблица слов на любой БД)
+или 'auto' — по типу БД. После смены движка индекс нужно
+пересобрать командой rebuild_search_index.
+"""
+from django.conf import settings
+from django.db import connections, router
+
+from .postgres import PostgresBackend
+from .simple import SimpleBackend
+from .sqlite import SQLiteBackend, fts5_supported
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgres': PostgresBackend,
+    'simple': SimpleBackend,
+}
+
+
+def backend_name(connection):
+    name = settings.SEARCH_BACKEND
+    if name != 'auto':
+        return name
+    if connection.vendor == 'sqlite' and fts5_supported():
+        return 'sqlite'
+    if connection.vendor == 'postgresql':
+        return 'postgres'
+    return 'simple'
+
+
+def get_backend(connection=None):
+    if connection is None:
+        from blog.models import Post
+
+        connection = connections[router.db_for_write(Post)]
+    return BACKENDS[backend_name(connection)](connection)
+
+
+def _rows(post_ids):
+    from blog.models import Post
+
+    return Post.objects.filter(pk__in=post_ids).values_list(
+        'pk', 'title', 'text'
+    )
+
+
+def index_posts(post_ids):
+    """Переиндексирует посты `post_ids`."""
+    get_backend().index(_rows(post_ids))
+
+
+def remove_posts(post_ids):
+    get_backend().remove(post_ids)
+
+
+def search(query, limit=None):
+    """Посты под запрос: id от лучших к худшим, любой видимости."""
+    return get_backend().search(query, limit)
+
+
+def matches(query):
+    """Все посты под запрос подзапросом для pk__in (см.
+    SearchBackend.matches).
+    """
+    return get_backend().matches(query)
+
+
+def rebuild(batch_size=1000):
+    """Полная пересборка индекса. Вызывать в транзакции."""
+    from blog.models import Post
+
+    backend = get_backend()
+    backend.install()
+    backend.clear()
+    batch = []
+    rows = Post.objects.order_by('pk').values_list('pk', 'title', 'text')
+    for row in rows.iterator(batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            backend.index(batch)
+            batch = []
+    backend.index(batch)
@@ -0,0 +1,65 @@
+import re
+from collections import Counter
+
+WORD_RE = re.compile(r'\w+')
+# Во сколько раз слово из заголовка весомее слова из текста
+TITLE_WEIGHT = 5
+MAX_TERM_LENGTH = 64
+
+
+def normalize(text):
+    return text.lower().replace('ё', 'е')
+
+
+def tokenize(text):
+    """Слова текста в нижнем регистре, без однобуквенных."""
+    return [
+        word[:MAX_TERM_LENGTH] for word in WORD_RE.findall(normalize(text))
+        if len(word) > 1 or word.isdigit()
+    ]
+
+
+def term_weights(title, text):
+    weights = Counter(text and tokenize(text))
+    for term in tokenize(title):
+        weights[term] += TITLE_WEIGHT
+    return weights
+
+
+class SearchBackend:
+    """Обратный индекс постов.
+
+    Индексируются все посты, видимость проверяет вызывающий код:
+    она зависит от времени, а индекс — только от текста. Поиск
+    требует все слова запроса; последнее ищется как префикс, чтобы
+    подсказки работали по мере набора.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self):
+        """Создаёт таблицы индекса, если их ещё нет."""
+
+    def uninstall(self):
+        """Удаляет таблицы индекса."""
+
+    def index(self, rows):
+        """Индексирует (или переиндексирует) строки (id, title, text)."""
+        raise NotImplementedError
+
+    def remove(self, post_ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, limit=None):
+        """Посты, подходящие под `query`: id от лучших к худшим."""
+        raise NotImplementedError
+
+    def matches(self, query):
+        """Все подходящие под `query` id без ранжирования и лимита —
+        подзапросом для pk__in, без списка id в памяти.
+        """
+        raise NotImplementedError
@@ -0,0 +1,90 @@
+from django.db.models.expressions import RawSQL
+
+from .base import SearchBackend, normalize, tokenize
+
+TABLE = 'blog_post_search'
+# Конфигурация текстового поиска PostgreSQL: стемминг русского языка
+CONFIG = 'russian'
+
+
+def _tsquery(query):
+    terms = tokenize(query)
+    if not terms:
+        return None
+    # Слова состоят только из \w, поэтому кавычек достаточно
+    return ' & '.join(f"'{term}'" for term in terms) + ':*'
+
+
+class PostgresBackend(SearchBackend):
+    """Индекс в столбце tsvector с GIN-индексом.
+
+    Заголовок получает вес A, текст — вес B; строки удаляются
+    каскадом вместе с постом.
+    """
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {TABLE} ('
+                'post_id bigint PRIMARY KEY REFERENCES blog_post (id) '
+                'ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, '
+                'document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {TABLE}_document_idx '
+                f'ON {TABLE} USING GIN (document)'
+            )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def index(self, rows):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (post_id, document) VALUES (%s, '
+                f"setweight(to_tsvector('{CONFIG}', %s), 'A') || "
+                f"setweight(to_tsvector('{CONFIG}', %s), 'B')) "
+                'ON CONFLICT (post_id) DO UPDATE '
+                'SET document = EXCLUDED.document',
+                [
+                    (post_id, normalize(title), normalize(text))
+                    for post_id, title, text in rows
+                ],
+            )
+
+    def remove(self, post_ids):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE post_id = ANY(%s)',
+                [list(post_ids)],
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {TABLE}')
+
+    def search(self, query, limit=None):
+        tsquery = _tsquery(query)
+        if tsquery is None:
+            return []
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM {TABLE}, '
+                f"to_tsquery('{CONFIG}', %s) AS query "
+                'WHERE document @@ query '
+                'ORDER BY ts_rank(document, query) DESC, post_id DESC '
+                'LIMIT %s',
+                [tsquery, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def matches(self, query):
+        tsquery = _tsquery(query)
+        if tsquery is None:
+            return []
+        return RawSQL(
+            f'SELECT post_id FROM {TABLE} '
+            f"WHERE document @@ to_tsquery('{CONFIG}', %s)",
+            [tsquery],
+        )
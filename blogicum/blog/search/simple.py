@@ -0,0 +1,72 @@
+from django.db.models import Count, Q, Sum
+
+from .base import SearchBackend, term_weights, tokenize
+
+
+class SimpleBackend(SearchBackend):
+    """Индекс в обычной таблице SearchToken: (слово, пост, вес).
+
+    Работает на любой БД; запасной вариант, когда нет FTS5
+    и PostgreSQL.
+    """
+
+    def __init__(self, connection, token_model=None):
+        super().__init__(connection)
+        if token_model is None:
+            from blog.models import SearchToken
+            token_model = SearchToken
+        self.tokens = token_model.objects.using(connection.alias)
+
+    def index(self, rows):
+        rows = list(rows)
+        self.remove([post_id for post_id, _, _ in rows])
+        self.tokens.bulk_create([
+            self.tokens.model(post_id=post_id, term=term, weight=weight)
+            for post_id, title, text in rows
+            for term, weight in term_weights(title, text).items()
+        ], batch_size=1000)
+
+    def remove(self, post_ids):
+        self.tokens.filter(post_id__in=list(post_ids)).delete()
+
+    def clear(self):
+        self.tokens.all().delete()
+
+    def search(self, query, limit=None):
+        post_ids = self._matching(query)
+        if post_ids is None:
+            return []
+        post_ids = post_ids.order_by(
+            '-score', '-post_id'
+        ).values_list('post_id', flat=True)
+        if limit is not None:
+            post_ids = post_ids[:limit]
+        return list(post_ids)
+
+    def matches(self, query):
+        post_ids = self._matching(query)
+        if post_ids is None:
+            return []
+        return post_ids.values('post_id')
+
+    def _matching(self, query):
+        """Строки (post_id, score) постов, где есть все слова запроса."""
+        terms = tokenize(query)
+        if not terms:
+            return None
+        matches = [Q(term=term) for term in terms[:-1]]
+        # Префикс через диапазон, а не LIKE, — так работает индекс term
+        last = terms[-1]
+        matches.append(Q(term__gte=last, term__lt=last + '\uffff'))
+        condition = Q()
+        for match in matches:
+            condition |= match
+        counts = {
+            f'match_{i}': Count('pk', filter=match)
+            for i, match in enumerate(matches)
+        }
+        return self.tokens.filter(condition).values('post_id').annotate(
+            score=Sum('weight'), **counts
+        ).filter(
+            **{f'{name}__gt': 0 for name in counts}
+        )
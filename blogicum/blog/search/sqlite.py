@@ -0,0 +1,91 @@
+import sqlite3
+from functools import lru_cache
+
+from django.db.models.expressions import RawSQL
+
+from .base import TITLE_WEIGHT, SearchBackend, normalize, tokenize
+
+TABLE = 'blog_post_fts'
+
+
+@lru_cache(maxsize=None)
+def fts5_supported():
+    """Собран ли SQLite с модулем FTS5."""
+    probe = sqlite3.connect(':memory:')
+    try:
+        probe.execute('CREATE VIRTUAL TABLE probe USING fts5(text)')
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def _match(query):
+    terms = tokenize(query)
+    if not terms:
+        return None
+    # Слова берутся в кавычки, чтобы не разбирались как синтаксис FTS5
+    return ' AND '.join(f'"{term}"' for term in terms) + '*'
+
+
+class SQLiteBackend(SearchBackend):
+    """Индекс в виртуальной таблице FTS5, rowid — id поста."""
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING '
+                "fts5(title, text, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def index(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        self.remove([post_id for post_id, _, _ in rows])
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, title, text) '
+                'VALUES (%s, %s, %s)',
+                [
+                    (post_id, normalize(title), normalize(text))
+                    for post_id, title, text in rows
+                ],
+            )
+
+    def remove(self, post_ids):
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {TABLE} WHERE rowid = %s',
+                [(post_id,) for post_id in post_ids],
+            )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+
+    def search(self, query, limit=None):
+        match = _match(query)
+        if match is None:
+            return []
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+                f'ORDER BY bm25({TABLE}, {TITLE_WEIGHT}.0, 1.0), rowid DESC '
+                'LIMIT %s',
+                [match, -1 if limit is None else limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def matches(self, query):
+        match = _match(query)
+        if match is None:
+            return []
+        return RawSQL(
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [match]
+        )
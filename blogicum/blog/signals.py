@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import feed, images, jobs, search, tasks
+from .cache import CARDS_SCOPE, FEED_SCOPE, bump_versions, post_scope
+from .models import Category, Comment, Location, Post
+
+User = get_user_model()
+
+
+def invalidate(*scopes):
+    bump_versions(*scopes)
+    # Повторно после фиксации транзакции: до неё параллельный запрос
+    # мог закешировать страницу по ещё старым данным
+    transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+@receiver(post_save, sender=Post)
+def sync_post(sender, instance, update_fields=None, **kwargs):
+    if images.needs_renditions(instance):
+        jobs.enqueue(tasks.build_renditions,
+                     unique_key=f'renditions:{instance.pk}',
+                     post_id=instance.pk)
+    feed.refresh_posts([instance.pk])
+    if not update_fields or {'title', 'text'} & set(update_fields):
+        search.index_posts([instance.pk])
+    invalidate(post_scope(instance.pk), FEED_SCOPE)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    # Строка ленты удаляется каскадом вместе с постом, а FTS5 про
+    # внешние ключи не знает — из поиска пост убираем сами
+    search.remove_posts([instance.pk])
+    invalidate(post_scope(instance.pk), FEED_SCOPE)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def sync_comment_post(sender, instance, created=True, **kwargs):
+    # Добавление и удаление меняют счётчик в ленте вместе с её
+    # updated_at (change_comment_count в blog.utils); правке текста
+    # отметку ставим сами — по ней Last-Modified и ETag страницы поста
+    # меняются во всех процессах, а не только там, где сброшен кеш
+    if not created:
+        feed.touch_posts([instance.post_id])
+    invalidate(post_scope(instance.post_id), FEED_SCOPE)
+
+
+@receiver(post_save, sender=Category)
+def sync_category(sender, instance, **kwargs):
+    feed.refresh_category(instance)
+    invalidate(CARDS_SCOPE, FEED_SCOPE)
+
+
+@receiver(post_delete, sender=Category)
+def detach_category(sender, instance, **kwargs):
+    feed.detach_category(instance.pk)
+    invalidate(CARDS_SCOPE, FEED_SCOPE)
+
+
+@receiver(post_save, sender=Location)
+def sync_location(sender, instance, **kwargs):
+    feed.refresh_location(instance)
+    invalidate(CARDS_SCOPE, FEED_SCOPE)
+
+
+@receiver(post_delete, sender=Location)
+def detach_location(sender, instance, **kwargs):
+    feed.detach_location(instance.pk)
+    invalidate(CARDS_SCOPE, FEED_SCOPE)
+
+
+# Поля пользователя, которые видны на страницах: имя — в карточках,
+# на странице поста и в комментариях, остальные — только в профиле
+AUTHOR_FIELDS = ('username',)
+PROFILE_FIELDS = ('first_name', 'last_name', 'is_staff')
+
+
+@receiver(pre_save, sender=User)
+def remember_author(sender, instance, using, update_fields=None,
+                    **kwargs):
+    # Вход на сайт сохраняет только last_login, форма профиля — все
+    # поля разом: сбрасывать кеши стоит, только если видимое изменилось
+    fields = AUTHOR_FIELDS + PROFILE_FIELDS
+    if update_fields is not None:
+        fields = [field for field in fields if field in update_fields]
+    instance._changed_display = set()
+    if not fields or instance.pk is None:
+        return
+    old = User.objects.using(using).filter(pk=instance.pk).values(
+        *fields
+    ).first()
+    instance._changed_display = {
+        field for field in fields
+        if old is None or old[field] != getattr(instance, field)
+    }
+
+
+@receiver(post_save, sender=User)
+def sync_author(sender, instance, **kwargs):
+    changed = getattr(instance, '_changed_display', set())
+    instance._changed_display = set()
+    if changed & set(AUTHOR_FIELDS):
+        feed.refresh_author(instance)
+        invalidate(CARDS_SCOPE, FEED_SCOPE)
+    elif changed:
+        invalidate(FEED_SCOPE)
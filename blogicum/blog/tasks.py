@@ -0,0 +1,85 @@
+"""Фоновые задачи блога; выполняет их manage.py run_worker."""
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.mail import send_mail
+from django.http import Http404, HttpRequest
+from django.urls import reverse
+
+from . import feed, images, jobs, mail
+from .cache import FEED_SCOPE, bump_versions, post_scope
+from .models import Comment, Post
+
+
+@jobs.task('blog.build_renditions')
+def build_renditions(post_id):
+    post = Post.objects.filter(pk=post_id).only(
+        'pk', 'image', 'image_renditions'
+    ).first()
+    if post is None or not images.refresh_renditions(post):
+        return
+    feed.refresh_posts([post.pk])
+    # Дойдёт до сайта только через общий кеш; карточки сбросятся и без
+    # него — копии фото входят в ключ (blog.cache.post_card_key)
+    bump_versions(post_scope(post.pk), FEED_SCOPE)
+
+
+@jobs.task('blog.notify_comment', max_attempts=5)
+def notify_comment(comment_id):
+    """Письмо автору поста о новом комментарии."""
+    comment = Comment.objects.select_related(
+        'author', 'post__author'
+    ).filter(pk=comment_id).first()
+    if comment is None:
+        return
+    recipient = comment.post.author
+    if not recipient.email or recipient.pk == comment.author_id:
+        return
+    url = reverse('blog:post_detail', kwargs={'pk': comment.post_id})
+    send_mail(
+        f'Новый комментарий к «{comment.post.title}»',
+        f'@{comment.author.username} пишет:\n\n{comment.text}\n\n'
+        f'{url}#comment_{comment.pk}',
+        settings.DEFAULT_FROM_EMAIL,
+        [recipient.email],
+    )
+
+
+def _warm(view, path, **kwargs):
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.META = {'SERVER_NAME': 'localhost', 'SERVER_PORT': '80'}
+    request.user = AnonymousUser()
+    try:
+        view(request, **kwargs)
+    except Http404:
+        pass
+
+
+@jobs.task('blog.warm_feed_cache', max_attempts=1)
+def warm_feed_cache(category_slug=None):
+    """Заранее строит первые страницы лент для анонимных посетителей.
+
+    Имеет смысл только с общим для воркера и сайта кешем
+    (BLOGICUM_CACHE_BACKEND), иначе прогреется кеш самого воркера.
+    """
+    from .views import category_posts, index
+
+    _warm(index, reverse('blog:index'))
+    if category_slug:
+        _warm(
+            category_posts,
+            reverse('blog:category_posts', kwargs={'slug': category_slug}),
+            slug=category_slug,
+        )
+
+
+@jobs.task('blog.deliver_email', max_attempts=5)
+def deliver_email():
+    """Отправляет пачку писем из очереди и, если письма остались,
+    ставит себя снова: сразу или, если пачка целиком не ушла, с паузой.
+    """
+    sent, failed, remaining = mail.deliver_pending()
+    if remaining:
+        delay = settings.TASKS_RETRY_DELAY if failed and not sent else 0
+        jobs.enqueue(deliver_email, unique_key='mail:deliver', delay=delay)
@@ -0,0 +1,135 @@
+import re
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from django_bootstrap5.templatetags.django_bootstrap5 import bootstrap_css
+
+from blog.cache import render_post_card
+from blog.images import FORMATS
+from blogicum.csspurge import critical_css, purged_available
+
+register = template.Library()
+
+# Закрывающий тег внутри CSS оборвал бы <style> раньше времени
+_STYLE_END_RE = re.compile(r'</(style)', re.I)
+
+
+class PostCardCacheNode(template.Node):
+
+    def __init__(self, nodelist, post):
+        self.nodelist = nodelist
+        self.post = post
+
+    def render(self, context):
+        post = self.post.resolve(context)
+        return render_post_card(
+            post, lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag
+def postcardcache(parser, token):
+    """Кеширует содержимое блока как карточку поста.
+
+    {% postcardcache post %}...{% endpostcardcache %}
+    Ключ учитывает updated_at строки, версию поста, общую версию
+    карточек, comment_count и копии фото: сброс идёт по сигналам
+    моделей, а правки других процессов видны и без общего кеша.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' принимает ровно один аргумент — пост."
+        )
+    nodelist = parser.parse(('endpostcardcache',))
+    parser.delete_first_token()
+    return PostCardCacheNode(nodelist, parser.compile_filter(bits[1]))
+
+
+@register.simple_tag
+def page_window(page_obj, on_each_side=2, on_ends=1):
+    """Номера страниц вокруг текущей с многоточиями вместо пропусков.
+
+    {% page_window page_obj as pages %}
+    """
+    return list(page_obj.paginator.get_elided_page_range(
+        page_obj.number, on_each_side=on_each_side, on_ends=on_ends
+    ))
+
+
+@register.simple_tag
+def site_css():
+    """Стили сайта: урезанный Bootstrap, если он собран, иначе
+    полный с CDN; при SITE_CSS_INLINE_CRITICAL критический CSS
+    встраивается, а остальной грузится без блокировки отрисовки.
+    """
+    if not purged_available():
+        return bootstrap_css()
+    href = static(settings.SITE_CSS)
+    critical = critical_css()
+    if critical is None:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    # CSS не экранируется как HTML: &gt; сломал бы селекторы
+    # потомков, а &quot; — строки в content и атрибутах
+    critical = mark_safe(_STYLE_END_RE.sub(r'<\\/\1', critical))
+    return format_html(
+        '<style>{}</style>'
+        '<link rel="preload" href="{}" as="style" '
+        'onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        critical, href, href,
+    )
+
+
+def _srcset(storage, sizes, key):
+    # У маленьких фото копии совпадают по содержимому, а значит и по
+    # имени — повторы в srcset недопустимы
+    candidates = {}
+    for value in sizes:
+        candidates.setdefault(storage.url(value[key]), value['width'])
+    return ', '.join(f'{url} {width}w' for url, width in candidates.items())
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, rendition='card', css_class=''):
+    """Картинка поста: <picture> с WebP и JPEG в srcset.
+
+    {% post_image post 'card' 'img-fluid' %}
+    `rendition` задаёт копию для src; в srcset попадают все копии, и
+    браузер выбирает по ширине экрана. Пока копий нет (старые посты
+    до rebuild_renditions), выводится оригинал.
+    """
+    renditions = post.image_renditions or {}
+    storage = post.image.storage
+    sizes = [
+        value for key, value in renditions.items()
+        if key != 'source' and isinstance(value, dict)
+    ]
+    context = {
+        'post': post,
+        'css_class': css_class,
+        'original_url': post.image.url,
+        'has_renditions': bool(sizes) and rendition in renditions,
+    }
+    if not context['has_renditions']:
+        return context
+    sizes.sort(key=lambda value: value['width'])
+    default = renditions[rendition]
+    context.update(
+        src=storage.url(default['jpeg']),
+        width=default['width'],
+        height=default['height'],
+        sources=[
+            {
+                'type': mime_type,
+                'srcset': _srcset(storage, sizes, key),
+            }
+            for key, _, _, mime_type in FORMATS
+        ],
+        sizes=f'(max-width: {default["width"]}px) 100vw, '
+              f'{default["width"]}px',
+    )
+    return context
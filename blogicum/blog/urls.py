@@ -12,6 +12,8 @@ urlpatterns = [
         name='category_posts'
     ),
 
+    path('search/', views.search_posts, name='search'),
+
     path('edit_profile/', views.UserUpdateView.as_view(), name='edit_profile'),
 
     # 2. Профиль пользователя (например: /profile/admin/)
@@ -25,6 +27,9 @@ urlpatterns = [
 
     # Добавление комментария
     path('posts/<int:pk>/comment/', views.add_comment, name='add_comment'),
+    # Следующие комментарии для «Показать ещё»
+    path('posts/<int:pk>/comments/', views.post_comments,
+         name='post_comments'),
 
     path('posts/<int:post_id>/edit_comment/<int:pk>/', views.CommentUpdateView.as_view(), name='edit_comment'),
     path('posts/<int:post_id>/delete_comment/<int:pk>/', views.CommentDeleteView.as_view(), name='delete_comment'),
@@ -1,11 +1,71 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import F
 from django.utils import timezone
 
+from . import feed
 from .models import Post
+from .paginators import CachedCountPaginator, KeysetPaginator, ProbePaginator
+
+POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+# Классы нумерованной пагинации по значению settings.FEED_PAGE_COUNT
+PAGE_COUNT_PAGINATORS = {
+    'cached': CachedCountPaginator,
+    'probe': ProbePaginator,
+    'exact': Paginator,
+}
 
 
 def get_published_posts():
-    return Post.objects.filter(
-        pub_date__lte=timezone.now(),
-        is_published=True,
-        category__is_published=True
-    ).order_by('-pub_date')
+    return Post.objects.published().order_by('-pub_date')
+
+
+def paginate(request, queryset, per_page=POSTS_PER_PAGE):
+    """Страница выборки по параметрам запроса.
+
+    Старые ссылки вида ?page=N обслуживаются нумерованной пагинацией
+    (см. settings.FEED_PAGE_COUNT), всё остальное — seek-пагинацией
+    по курсорам ?after= / ?before=.
+    """
+    if 'page' in request.GET:
+        paginator_class = PAGE_COUNT_PAGINATORS[settings.FEED_PAGE_COUNT]
+        paginator = paginator_class(queryset, per_page)
+        return paginator.get_page(request.GET.get('page'))
+    paginator = KeysetPaginator(queryset, per_page)
+    return paginator.get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+
+
+def comments_page(post, after=None, per_page=COMMENTS_PER_PAGE):
+    """Страница комментариев поста после курсора `after`.
+
+    Комментарии идут по (created_at, id), так что «показать ещё»
+    стоит O(per_page) при любом их числе.
+    """
+    paginator = KeysetPaginator(
+        post.comments.select_related('author'), per_page,
+        ordering=('created_at', 'pk'),
+    )
+    return paginator.get_page(after=after)
+
+
+def change_comment_count(post_ids, delta=1):
+    """Сдвигает счётчик комментариев у постов на `delta` за каждое
+    вхождение id поста в `post_ids`.
+
+    Обновление идёт через F(), поэтому безопасно при конкурентной записи;
+    вызывать внутри той же транзакции, что и изменение комментариев.
+    Строки ленты копируют новый счётчик.
+    """
+    counts = Counter(post_ids)
+    for post_id, times in counts.items():
+        Post.objects.filter(pk=post_id).update(
+            comment_count=F('comment_count') + delta * times,
+            updated_at=timezone.now(),
+        )
+    feed.refresh_comment_count(counts)
@@ -1,55 +1,136 @@
-from django.shortcuts import render, get_object_or_404, redirect
-from django.utils import timezone
+from django.conf import settings
 from django.core.paginator import Paginator
+from django.shortcuts import render, get_object_or_404, redirect
+from django.http import Http404, HttpResponse, JsonResponse
+from django.template.loader import render_to_string
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.http import urlencode
 from django.views.generic import UpdateView, CreateView, DeleteView
 from django.contrib.auth.models import User
-from django.db.models import Count
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Q, Subquery
 
-from .models import Post, Category, Comment
+from blogicum.routers import replica_reads
+
+from .models import Post, Category, Comment, FeedEntry
+from .cache import cache_anonymous_page, conditional_page, feed_now
 from .forms import CommentForm
+from .mixins import OwnerRequiredMixin
+from . import jobs, search, tasks
+from .utils import (
+    POSTS_PER_PAGE, change_comment_count, comments_page, paginate
+)
+
+
+def _latest(entries, field):
+    return Subquery(entries.order_by(f'-{field}').values(field)[:1])
+
+
+def feed_changes(entries):
+    """Отметка правок строк ленты `entries` и дата свежего поста —
+    подзапросами к строке категории или автора.
+
+    `entries` — все строки ленты страницы, и скрытые тоже: снятие с
+    публикации меняет updated_at уже невидимой строки.
+    """
+    return {
+        'updated': _latest(entries, 'updated_at'),
+        'published': _latest(entries.filter(
+            is_visible=True, pub_date__lte=feed_now()
+        ), 'pub_date'),
+    }
+
+
+def index_changes():
+    return FeedEntry.objects.aggregate(
+        updated=Max('updated_at'),
+        published=Max('pub_date', filter=Q(
+            is_visible=True, pub_date__lte=feed_now()
+        )),
+    )
+
+
+# Для страницы, которой нет или которая скрыта, *_changes возвращают
+# None: conditional_page тогда не отвечает 304, а вызывает
+# представление, и то отдаёт 404
 
 
+def category_changes(slug):
+    return Category.objects.filter(
+        slug=slug, is_published=True
+    ).values(
+        category=F('updated_at'),
+        **feed_changes(FeedEntry.objects.filter(category_id=OuterRef('pk'))),
+    ).first()
+
+
+def profile_changes(username):
+    # Все посты автора: сам он видит и скрытые
+    return User.objects.filter(username=username).values(
+        **feed_changes(FeedEntry.objects.filter(author_id=OuterRef('pk'))),
+    ).first()
+
+
+def post_changes(pk):
+    # Скрытый пост видит только автор, и ему страница отрисовывается
+    # заново. Строка ленты меняется вместе с комментариями
+    changes = Post.objects.published(now=timezone.now()).filter(
+        pk=pk
+    ).aggregate(
+        post=Max('updated_at'),
+        comments=Max('feed_entry__updated_at'),
+        category=Max('category__updated_at'),
+        location=Max('location__updated_at'),
+    )
+    return changes if changes['post'] else None
+
+
+@replica_reads
+@conditional_page(index_changes)
+@cache_anonymous_page
 def index(request):
     """Главная страница."""
 
-    post_list = Post.objects.select_related(
-        'author', 'category', 'location'
-    ).filter(
-        is_published=True,
-        pub_date__lte=timezone.now(),
-        category__is_published=True
-    ).annotate(
-        comment_count=Count('comments')
-    ).order_by('-pub_date')
+    post_list = FeedEntry.objects.published().as_posts().order_by(
+        '-pub_date'
+    )
 
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, post_list)
 
     return render(request, 'blog/index.html', {'page_obj': page_obj})
 
 
-def post_detail(request, pk):
+def get_visible_post(request, pk):
+    """Пост, который может видеть пользователь запроса, иначе 404."""
     post = get_object_or_404(
-        Post.objects.select_related('author', 'category', 'location'),
+        Post.objects.with_feed_relations(),
         pk=pk,
 
     )
 
     # ПРОВЕРКА ДОСТУПА К ДЕТАЛЯМ ПОСТА
+    # Точное время, а не feed_now(): якорь лент кешируется в процессе
+    # и не знает о публикациях из других процессов
     if post.author != request.user:
         if (not post.is_published or
                 not post.category.is_published or
                 post.pub_date > timezone.now()):
             # Если пост скрыт и смотрит не автор — 404
-            from django.http import Http404
             raise Http404
+    return post
+
+
+@replica_reads
+@conditional_page(post_changes)
+def post_detail(request, pk):
+    post = get_visible_post(request, pk)
 
     form = CommentForm()
-    comments = post.comments.select_related('author')
+    # Без JavaScript «Показать ещё» ведёт сюда же с ?comments=<курсор>
+    comments = comments_page(post, after=request.GET.get('comments'))
 
     context = {
         'post': post,
@@ -59,6 +140,31 @@ def post_detail(request, pk):
     return render(request, 'blog/detail.html', context)
 
 
+@replica_reads
+def post_comments(request, pk):
+    """Следующая страница комментариев для кнопки «Показать ещё».
+
+    Отдаёт HTML-фрагмент, а при Accept: application/json — JSON
+    с этим фрагментом и курсором следующей страницы.
+    """
+    post = get_visible_post(request, pk)
+    comments = comments_page(post, after=request.GET.get('after'))
+    html = render_to_string(
+        'includes/comment_list.html',
+        {'post': post, 'comments': comments},
+        request=request,
+    )
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({
+            'html': html,
+            'next_cursor': comments.next_cursor,
+        })
+    return HttpResponse(html)
+
+
+@replica_reads
+@conditional_page(category_changes)
+@cache_anonymous_page
 def category_posts(request, slug):
     """Страница категории."""
     category = get_object_or_404(
@@ -66,19 +172,11 @@ def category_posts(request, slug):
         slug=slug,
         is_published=True
     )
-    post_list = Post.objects.select_related(
-        'author', 'location'
-    ).filter(
-        category=category,
-        is_published=True,
-        pub_date__lte=timezone.now()
-    ).annotate(
-        comment_count=Count('comments')
+    post_list = FeedEntry.objects.published().as_posts().filter(
+        category_id=category.id
     ).order_by('-pub_date')
 
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, post_list)
 
     return render(
         request,
@@ -87,29 +185,51 @@ def category_posts(request, slug):
     )
 
 
+@replica_reads
+def search_posts(request):
+    """Поиск по опубликованным постам."""
+    query = request.GET.get('q', '').strip()
+    found = search.search(query, settings.SEARCH_MAX_RESULTS) if query else []
+    # Видимость проверяется по ленте: индекс хранит и скрытые посты
+    visible = set(FeedEntry.objects.published().filter(
+        pk__in=found
+    ).values_list('pk', flat=True))
+    page_obj = Paginator(
+        [pk for pk in found if pk in visible], POSTS_PER_PAGE
+    ).get_page(request.GET.get('page'))
+    posts = FeedEntry.objects.as_posts().in_bulk(page_obj.object_list)
+    page_obj.object_list = [posts[pk] for pk in page_obj.object_list]
+
+    return render(
+        request,
+        'blog/search.html',
+        {
+            'query': query,
+            'page_obj': page_obj,
+            # Ссылки пагинатора должны сохранять запрос
+            'page_query': urlencode({'q': query}) + '&',
+        }
+    )
+
+
+@replica_reads
+@conditional_page(profile_changes)
 def profile(request, username):
     """Профиль пользователя."""
     profile_user = get_object_or_404(User, username=username)
 
     if request.user == profile_user:
         # Если я смотрю свой профиль — показывай всё (скрытые, будущие)
-        post_list = Post.objects.filter(author=profile_user)
+        post_list = FeedEntry.objects.all()
     else:
         # Если я смотрю чужой — только опубликованное
-        post_list = Post.objects.filter(
-            author=profile_user,
-            is_published=True,
-            category__is_published=True,
-            pub_date__lte=timezone.now()
-        )
-
-    post_list = post_list.annotate(
-        comment_count=Count('comments')
+        post_list = FeedEntry.objects.published()
+
+    post_list = post_list.as_posts().filter(
+        author_id=profile_user.id
     ).order_by('-pub_date')
 
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, post_list)
 
     context = {
         'profile': profile_user,
@@ -126,10 +246,20 @@ def add_comment(request, pk):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
+            change_comment_count([post.pk])
+            jobs.enqueue(tasks.notify_comment, comment_id=comment.pk)
     return redirect('blog:post_detail', pk=pk)
 
 
+def warm_feeds(post):
+    """Прогрев лент, где появится пост, — в фоне, после фиксации."""
+    slug = post.category.slug if post.category_id else ''
+    jobs.enqueue(tasks.warm_feed_cache, unique_key=f'warm:{slug}',
+                 category_slug=slug or None)
+
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
     template_name = 'blog/create.html'
@@ -137,68 +267,64 @@ class PostCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        warm_feeds(self.object)
+        return response
 
     def get_success_url(self):
         return reverse_lazy('blog:profile', kwargs={'username': self.request.user.username})
 
 
-class PostUpdateView(LoginRequiredMixin, UpdateView):
+class PostOwnerMixin(OwnerRequiredMixin):
     model = Post
+
+    def get_owner_redirect_url(self, obj):
+        return reverse_lazy('blog:post_detail', kwargs={'pk': obj.pk})
+
+
+class CommentOwnerMixin(OwnerRequiredMixin):
+    model = Comment
+
+    def get_owner_redirect_url(self, obj):
+        return reverse_lazy('blog:post_detail', kwargs={'pk': obj.post_id})
+
+    def get_success_url(self):
+        return reverse_lazy('blog:post_detail', kwargs={'pk': self.object.post_id})
+
+
+class PostUpdateView(LoginRequiredMixin, PostOwnerMixin, UpdateView):
     template_name = 'blog/create.html'
     fields = ['title', 'text', 'image', 'category', 'location', 'pub_date']
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = self.get_object()
-        if instance.author != request.user:
-            return redirect('blog:post_detail', pk=instance.pk)
-        return super().dispatch(request, *args, **kwargs)
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        warm_feeds(self.object)
+        return response
 
     def get_success_url(self):
         return reverse_lazy('blog:post_detail', kwargs={'pk': self.object.pk})
 
 
-class PostDeleteView(LoginRequiredMixin, DeleteView):
-    model = Post
+class PostDeleteView(LoginRequiredMixin, PostOwnerMixin, DeleteView):
     template_name = 'blog/create.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = self.get_object()
-        if instance.author != request.user:
-            return redirect('blog:post_detail', pk=instance.pk)
-        return super().dispatch(request, *args, **kwargs)
-
     def get_success_url(self):
         return reverse_lazy('blog:profile', kwargs={'username': self.request.user.username})
 
 
-class CommentUpdateView(LoginRequiredMixin, UpdateView):
-    model = Comment
+class CommentUpdateView(LoginRequiredMixin, CommentOwnerMixin, UpdateView):
     form_class = CommentForm
     template_name = 'blog/comment.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = self.get_object()
-        if instance.author != request.user:
-            return redirect('blog:post_detail', pk=instance.post.pk)
-        return super().dispatch(request, *args, **kwargs)
-
-    def get_success_url(self):
-        return reverse_lazy('blog:post_detail', kwargs={'pk': self.object.post.pk})
-
 
-class CommentDeleteView(LoginRequiredMixin, DeleteView):
-    model = Comment
+class CommentDeleteView(LoginRequiredMixin, CommentOwnerMixin, DeleteView):
     template_name = 'blog/comment.html'
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = self.get_object()
-        if instance.author != request.user:
-            return redirect('blog:post_detail', pk=instance.post.pk)
-        return super().dispatch(request, *args, **kwargs)
-
-    def get_success_url(self):
-        return reverse_lazy('blog:post_detail', kwargs={'pk': self.object.post.pk})
+    @transaction.atomic
+    def delete(self, request, *args, **kwargs):
+        response = super().delete(request, *args, **kwargs)
+        change_comment_count([self.object.post_id], delta=-1)
+        return response
 
 
 class UserUpdateView(LoginRequiredMixin, UpdateView):
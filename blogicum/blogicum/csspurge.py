@@ -0,0 +1,164 @@
+"""Урезанный Bootstrap под шаблоны проекта.
+
+purge() оставляет в таблице стилей только правила, все классы
+селектора которых встречаются в шаблонах или в коде, который
+генерирует разметку (django_bootstrap5 рисует формы из Python).
+Селекторы без классов — по тегам, атрибутам, :root — остаются все.
+Классы ищутся грубо, как у PurgeCSS: любое слово из букв, цифр и
+дефисов — лишнее слово только оставит лишнее правило.
+
+Результат пишет команда purge_css; тег {% site_css %} подключает его
+вместо Bootstrap с CDN, а при SITE_CSS_INLINE_CRITICAL встраивает в
+страницу критический CSS (правила для base.html и шапки).
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+_WORD_RE = re.compile(r'[A-Za-z][A-Za-z0-9_-]*')
+_CLASS_RE = re.compile(r'\.(-?[_A-Za-z][_A-Za-z0-9-]*)')
+_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_LICENSE_RE = re.compile(r'/\*!.*?\*/', re.S)
+# @-правила, внутри которых снова правила со селекторами
+NESTED_AT_RULES = ('@media', '@supports', '@document', '@layer')
+# Шаблоны над первым экраном: их правила встраиваются в страницу
+CRITICAL_TEMPLATES = ('base.html', 'includes/header.html')
+
+
+def used_words(paths):
+    """Все слова-кандидаты в классы из файлов `paths`."""
+    words = set()
+    for path in paths:
+        words.update(_WORD_RE.findall(
+            Path(path).read_text(encoding='utf-8', errors='ignore')
+        ))
+    return words
+
+
+def _split_top_level(text, separator=','):
+    parts, depth, start = [], 0, 0
+    for index, char in enumerate(text):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:index])
+            start = index + 1
+    parts.append(text[start:])
+    return parts
+
+
+def _find(css, index, chars):
+    """Индекс первого символа из `chars` вне строк в кавычках."""
+    while index < len(css) and css[index] not in chars:
+        if css[index] in '"\'':
+            quote = css[index]
+            index += 1
+            while index < len(css) and css[index] != quote:
+                index += 2 if css[index] == '\\' else 1
+        index += 1
+    return index
+
+
+def _closing_brace(css, index):
+    depth = 0
+    while index < len(css):
+        index = _find(css, index, '{}')
+        if index < len(css):
+            depth += 1 if css[index] == '{' else -1
+            if not depth:
+                break
+            index += 1
+    return index
+
+
+def _blocks(css):
+    """Пары (заголовок, тело) верхнего уровня; тело None у
+    @-правил без блока вроде @charset.
+    """
+    index = 0
+    while index < len(css):
+        end = _find(css, index, '{;')
+        prelude = css[index:end].strip()
+        if end >= len(css) or css[end] == ';':
+            if prelude:
+                yield prelude, None
+            index = end + 1
+            continue
+        close = _closing_brace(css, end)
+        yield prelude, css[end + 1:close]
+        index = close + 1
+
+
+def _keep_selector(selector, words):
+    return all(name in words for name in _CLASS_RE.findall(selector))
+
+
+def purge(css, words):
+    """Таблица стилей `css` без правил, чьи классы не встречаются в
+    `words`. Лицензионные комментарии /*! */ сохраняются.
+    """
+    rules = _purge_rules(_COMMENT_RE.sub('', css), words)
+    charset = ''
+    if rules.startswith('@charset'):
+        charset, _, rules = rules.partition(';')
+        charset += ';'
+    return charset + ''.join(_LICENSE_RE.findall(css)) + rules
+
+
+def _purge_rules(css, words):
+    out = []
+    for prelude, body in _blocks(css):
+        if body is None:
+            out.append(f'{prelude};')
+        elif prelude.startswith(NESTED_AT_RULES):
+            inner = _purge_rules(body, words)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@'):
+            # @font-face, @keyframes, @page — без селекторов классов
+            out.append(f'{prelude}{{{body}}}')
+        else:
+            selectors = [
+                selector for selector in _split_top_level(prelude)
+                if _keep_selector(selector, words)
+            ]
+            if selectors:
+                out.append(f'{",".join(selectors)}{{{body}}}')
+    return ''.join(out)
+
+
+def _static_text(name):
+    path = finders.find(name)
+    if path:
+        return Path(path).read_text(encoding='utf-8')
+    if staticfiles_storage.exists(name):
+        with staticfiles_storage.open(name) as stored:
+            return stored.read().decode('utf-8')
+    return None
+
+
+@lru_cache(maxsize=None)
+def purged_available():
+    """Собран ли урезанный CSS (manage.py purge_css)."""
+    name = settings.SITE_CSS
+    return bool(name) and (
+        finders.find(name) is not None or staticfiles_storage.exists(name)
+    )
+
+
+@lru_cache(maxsize=None)
+def _critical_text(name):
+    return _static_text(name)
+
+
+def critical_css():
+    """Текст критического CSS для встраивания или None."""
+    if not settings.SITE_CSS_INLINE_CRITICAL:
+        return None
+    return _critical_text(settings.SITE_CSS_CRITICAL)
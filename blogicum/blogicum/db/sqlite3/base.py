@@ -0,0 +1,62 @@
+"""SQLite для продакшена.
+
+Обёртка над django.db.backends.sqlite3: на каждом новом соединении
+выставляет PRAGMA (WAL — читатели не ждут писателя, synchronous=NORMAL,
+mmap, кеш страниц, busy_timeout) и умеет открывать транзакции
+BEGIN IMMEDIATE, чтобы писатели вставали в очередь через busy_timeout,
+а не падали с «database is locked» при повышении блокировки.
+
+В OPTIONS базы, помимо аргументов sqlite3.connect, понимает:
+    'pragmas': {'cache_size': -64000, ...} — поверх PRAGMAS;
+    'transaction_mode': 'IMMEDIATE' — режим BEGIN для atomic().
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Миллисекунды ожидания чужой блокировки записи
+    'busy_timeout': 5000,
+    # Отрицательное значение — в КиБ: 64 МиБ кеша страниц на соединение
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+# Для :memory: журнал и mmap не имеют смысла
+FILE_ONLY_PRAGMAS = frozenset({'journal_mode', 'mmap_size'})
+TRANSACTION_MODES = frozenset({'DEFERRED', 'IMMEDIATE', 'EXCLUSIVE'})
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pragmas = PRAGMAS
+    transaction_mode = None
+
+    def get_connection_params(self):
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = {**PRAGMAS, **options.get('pragmas', {})}
+        mode = options.get('transaction_mode')
+        if mode and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f'Неизвестный transaction_mode SQLite: {mode}'
+            )
+        self.transaction_mode = mode.upper() if mode else None
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('transaction_mode', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        in_memory = self.is_in_memory_db()
+        for name, value in self.pragmas.items():
+            if in_memory and name in FILE_ONLY_PRAGMAS:
+                continue
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,156 @@
+"""Отдача загруженных файлов (MEDIA_ROOT) в продакшене.
+
+serve_media проверяет ETag/Last-Modified (304 и 412 по условным
+заголовкам), ставит Cache-Control на MEDIA_MAX_AGE, а производным
+картинкам с хешем в имени — immutable. Сами байты:
+
+- при MEDIA_OFFLOAD = 'x-accel' — заголовок X-Accel-Redirect на
+  внутренний location nginx (MEDIA_ACCEL_PREFIX), диапазоны и
+  отправку делает nginx;
+- при 'x-sendfile' — X-Sendfile с полным путём (Apache, lighttpd);
+- иначе сам Django: один диапазон Range отдаётся ответом 206, а
+  FileResponse с fileno() WSGI-сервер (gunicorn, uWSGI) отправляет
+  через os.sendfile без копирования в Python.
+"""
+import mimetypes
+import os
+import re
+from stat import S_ISREG
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class UnsatisfiableRange(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """Пара (начало, конец) включительно для Range: bytes=...
+
+    None — отдать файл целиком: заголовка нет, он с ошибкой или
+    просит несколько диапазонов (это разрешено RFC 9110).
+    UnsatisfiableRange — диапазон целиком за концом файла (416).
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-N — последние N байт
+        if not int(last) or not size:
+            raise UnsatisfiableRange
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise UnsatisfiableRange
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+class FileRange:
+    """Окно файла для FileResponse.
+
+    read() не выходит за окно, а fileno() позволяет WSGI-серверу
+    отправить окно через sendfile: с текущей позиции файла и не
+    больше Content-Length.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _cache_control(path):
+    immutable = path.startswith(f'{settings.IMAGE_RENDITIONS_DIR}/')
+    return (
+        f'public, max-age={settings.MEDIA_MAX_AGE}'
+        + (', immutable' if immutable else '')
+    )
+
+
+def _offload(path, full_path):
+    response = HttpResponse()
+    if settings.MEDIA_OFFLOAD == 'x-accel':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(path)
+        )
+    else:
+        response['X-Sendfile'] = full_path
+    # Тип и длину выставит прокси по самому файлу
+    del response['Content-Type']
+    return response
+
+
+def _file_response(request, full_path, size, etag):
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if 'HTTP_RANGE' in request.META and if_range in (None, etag):
+        try:
+            byte_range = parse_range(request.META['HTTP_RANGE'], size)
+        except UnsatisfiableRange:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    start, end = byte_range or (0, size - 1)
+    length = max(end - start + 1, 0)
+    content_type, _ = mimetypes.guess_type(full_path)
+    response = FileResponse(
+        FileRange(open(full_path, 'rb'), start, length),
+        content_type=content_type or 'application/octet-stream',
+    )
+    response['Content-Length'] = length
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def serve_media(request, path):
+    """Файл `path` из MEDIA_ROOT."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat = os.stat(full_path)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404
+    if not S_ISREG(stat.st_mode):
+        raise Http404
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        if settings.MEDIA_OFFLOAD:
+            response = _offload(path, full_path)
+        else:
+            response = _file_response(request, full_path, stat.st_size,
+                                      etag)
+        response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = _cache_control(path)
+    return response
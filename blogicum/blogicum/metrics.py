@@ -0,0 +1,280 @@
+"""Замеры запросов к сайту.
+
+PerformanceMiddleware раскладывает каждый запрос на время SQL
+(число запросов, сумма, самый медленный), отрисовку шаблонов (по
+имени шаблона, включая вложенные include) и попадания в кеш, отдаёт
+разбивку заголовком Server-Timing и копит по имени представления
+гистограммы длительности. Сводка — на странице metrics_view для
+персонала, в JSON или в текстовом формате Prometheus (?format=prometheus).
+
+Счётчики живут в памяти процесса: каждый воркер отдаёт свои.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
+from django.template import base as template_base
+
+from .middleware import QueryCounter
+
+# Верхние границы корзин гистограммы, секунды
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+_TOKEN_RE = re.compile(r'[^A-Za-z0-9_-]+')
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Замеры одного запроса к сайту."""
+
+    def __init__(self):
+        self.templates = defaultdict(lambda: [0, 0.0])
+        self.cache = defaultdict(lambda: [0, 0])
+
+    def add_template(self, name, seconds):
+        stats = self.templates[name]
+        stats[0] += 1
+        stats[1] += seconds
+
+    def add_cache(self, name, hit):
+        self.cache[name][0 if hit else 1] += 1
+
+
+def record_cache(name, hit):
+    """Отмечает попадание (hit) или промах кеша `name` в текущем
+    запросе; вне запроса ничего не делает.
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.add_cache(name, hit)
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        timings = _current.get()
+        if timings is None:
+            return render(self, context)
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            name = self.origin.template_name or self.name or '<string>'
+            timings.add_template(name, time.perf_counter() - started)
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument_templates():
+    """Оборачивает Template.render замером времени (один раз)."""
+    render = template_base.Template.render
+    if not getattr(render, 'timed', False):
+        template_base.Template.render = _timed_render(render)
+
+
+class Histogram:
+    """Гистограмма длительностей с накопительными корзинами BUCKETS."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(BUCKETS + ('+Inf',), self.counts):
+            running += count
+            yield bound, running
+
+
+class ViewStats:
+
+    def __init__(self):
+        self.duration = Histogram()
+        self.db_seconds = 0.0
+        self.queries = 0
+        self.template_seconds = 0.0
+        self.cache = defaultdict(lambda: [0, 0])
+
+    def as_dict(self):
+        return {
+            'requests': self.duration.count,
+            'seconds': round(self.duration.total, 6),
+            'buckets': {
+                str(bound): count
+                for bound, count in self.duration.cumulative()
+            },
+            'queries': self.queries,
+            'db_seconds': round(self.db_seconds, 6),
+            'template_seconds': round(self.template_seconds, 6),
+            'cache': {
+                name: {'hits': hits, 'misses': misses}
+                for name, (hits, misses) in self.cache.items()
+            },
+        }
+
+
+class Registry:
+    """Сводка по представлениям за время жизни процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.views = defaultdict(ViewStats)
+
+    def observe(self, view, seconds, counter, timings):
+        with self._lock:
+            stats = self.views[view]
+            stats.duration.observe(seconds)
+            stats.queries += len(counter)
+            stats.db_seconds += sum(took for _, took in counter.queries)
+            # Вложенные шаблоны входят во время внешнего — берём
+            # самый долгий, а не сумму
+            stats.template_seconds += max(
+                (total for _, total in timings.templates.values()),
+                default=0,
+            )
+            for name, (hits, misses) in timings.cache.items():
+                stats.cache[name][0] += hits
+                stats.cache[name][1] += misses
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                view: stats.as_dict()
+                for view, stats in sorted(self.views.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self.views.clear()
+
+    def prometheus(self):
+        """Сводка в текстовом формате Prometheus."""
+        lines = [
+            '# HELP blogicum_request_seconds Время ответа по представлениям.',
+            '# TYPE blogicum_request_seconds histogram',
+        ]
+        snapshot = self.snapshot()
+        for view, stats in snapshot.items():
+            for bound, count in stats['buckets'].items():
+                lines.append(
+                    f'blogicum_request_seconds_bucket{{view="{view}",'
+                    f'le="{bound}"}} {count}'
+                )
+            lines.append(f'blogicum_request_seconds_sum{{view="{view}"}} '
+                         f'{stats["seconds"]}')
+            lines.append(f'blogicum_request_seconds_count{{view="{view}"}} '
+                         f'{stats["requests"]}')
+        for name, kind, help_text in (
+            ('db_seconds', 'counter', 'Время SQL-запросов.'),
+            ('queries', 'counter', 'Число SQL-запросов.'),
+            ('template_seconds', 'counter', 'Время отрисовки шаблонов.'),
+        ):
+            lines.append(f'# HELP blogicum_{name}_total {help_text}')
+            lines.append(f'# TYPE blogicum_{name}_total {kind}')
+            for view, stats in snapshot.items():
+                lines.append(
+                    f'blogicum_{name}_total{{view="{view}"}} {stats[name]}'
+                )
+        lines.append('# HELP blogicum_cache_total Обращения к кешу.')
+        lines.append('# TYPE blogicum_cache_total counter')
+        for view, stats in snapshot.items():
+            for cache_name, result in stats['cache'].items():
+                for outcome, label in (('hits', 'hit'), ('misses', 'miss')):
+                    lines.append(
+                        f'blogicum_cache_total{{view="{view}",'
+                        f'cache="{cache_name}",result="{label}"}} '
+                        f'{result[outcome]}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def _token(name):
+    return _TOKEN_RE.sub('-', name).strip('-')
+
+
+def server_timing(total, counter, timings):
+    """Значение заголовка Server-Timing для запроса."""
+    db_seconds = sum(took for _, took in counter.queries)
+    slowest = max((took for _, took in counter.queries), default=0)
+    entries = [
+        f'total;dur={total * 1000:.1f}',
+        f'db;dur={db_seconds * 1000:.1f};desc="{len(counter)} queries, '
+        f'slowest {slowest * 1000:.1f}ms"',
+    ]
+    for name, (count, seconds) in timings.templates.items():
+        entries.append(
+            f'tpl-{_token(name)};dur={seconds * 1000:.1f};'
+            f'desc="{name} x{count}"'
+        )
+    for name, (hits, misses) in timings.cache.items():
+        entries.append(
+            f'cache-{_token(name)};desc="hits={hits} misses={misses}"'
+        )
+    return ', '.join(entries)
+
+
+def _show_timing(request):
+    mode = settings.SERVER_TIMING
+    if mode == 'staff':
+        user = getattr(request, 'user', None)
+        return bool(user and user.is_staff)
+    return bool(mode)
+
+
+class PerformanceMiddleware:
+    """Замеряет запрос, пишет Server-Timing и копит сводку в registry.
+
+    Заголовок получают все при SERVER_TIMING = True, только персонал
+    при 'staff'; False отключает заголовок, но не сводку.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_templates()
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            with QueryCounter() as counter:
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        registry.observe(view, total, counter, timings)
+        if _show_timing(request):
+            response['Server-Timing'] = server_timing(
+                total, counter, timings
+            )
+        return response
+
+
+@staff_member_required
+def metrics_view(request):
+    if request.GET.get('format') == 'prometheus':
+        return HttpResponse(
+            registry.prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
+    return JsonResponse(
+        registry.snapshot(), json_dumps_params={'ensure_ascii': False}
+    )
@@ -0,0 +1,102 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('blogicum.queries')
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)')
+_SPACE_RE = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """SQL без литералов и параметров: одинаковые по форме запросы
+    дают одинаковый отпечаток.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryCounter:
+    """Обёртка для connection.execute_wrapper: копит SQL и время."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - started))
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def top_fingerprints(self, n=5):
+        return Counter(
+            fingerprint(sql) for sql, _ in self.queries
+        ).most_common(n)
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL-запросы на каждый запрос к сайту и сообщает о
+    представлениях, превысивших бюджет.
+
+    Бюджет — settings.QUERY_BUDGET (None отключает проверку), для
+    отдельных представлений — QUERY_BUDGET_VIEWS по имени из URLconf.
+    При QUERY_BUDGET_RAISE превышение приводит к QueryBudgetExceeded,
+    что роняет тесты.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.QUERY_BUDGET is None:
+            return self.get_response(request)
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+        self.check_budget(request, counter)
+        return response
+
+    def check_budget(self, request, counter):
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        budget = settings.QUERY_BUDGET_VIEWS.get(
+            view_name, settings.QUERY_BUDGET
+        )
+        if len(counter) <= budget:
+            return
+        offenders = '\n'.join(
+            f'  {times} x {sql}'
+            for sql, times in counter.top_fingerprints()
+        )
+        message = (
+            f'{view_name}: {len(counter)} SQL-запросов при бюджете '
+            f'{budget}\n{offenders}'
+        )
+        logger.warning(message)
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
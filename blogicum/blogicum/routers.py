@@ -0,0 +1,113 @@
+"""Чтение с реплик БД.
+
+Страницы, помеченные @replica_reads, читают с реплик из
+settings.DATABASE_REPLICAS; всё остальное, включая любые записи,
+идёт в default. После записи (не-GET запрос) сессия «прикрепляется»
+к default на REPLICA_PIN_SECONDS, чтобы пользователь сразу видел
+свои изменения, даже если реплики отстают. А после сброса кешей
+(hold_primary) все страницы REPLICA_MAX_LAG секунд читают с default,
+чтобы кеши по новым версиям не заполнились данными отставшей реплики.
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+PRIMARY = 'default'
+PIN_SESSION_KEY = 'db_pinned_until'
+HOLD_KEY = 'replicas:hold'
+# Сессии и пользователи всегда с default: отставшая реплика
+# разлогинила бы только что вошедшего пользователя
+PRIMARY_ONLY_APPS = frozenset({'sessions', 'auth'})
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def choose_replica():
+    replicas = settings.DATABASE_REPLICAS
+    return random.choice(replicas) if replicas else PRIMARY
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if (_replica_reads.get()
+                and model._meta.app_label not in PRIMARY_ONLY_APPS):
+            return choose_replica()
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты с любой из них совместимы
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == PRIMARY
+
+
+def is_pinned(request):
+    session = getattr(request, 'session', None)
+    if session is None:
+        return False
+    return session.get(PIN_SESSION_KEY, 0) > time.time()
+
+
+def pin_to_primary(request):
+    session = getattr(request, 'session', None)
+    if session is not None:
+        session[PIN_SESSION_KEY] = time.time() + settings.REPLICA_PIN_SECONDS
+
+
+def hold_primary():
+    """Отправляет чтения всех страниц в default на REPLICA_MAX_LAG
+    секунд; вызывать, когда запись сбрасывает кеши.
+    """
+    if settings.DATABASE_REPLICAS and settings.REPLICA_MAX_LAG > 0:
+        cache.set(HOLD_KEY, True, settings.REPLICA_MAX_LAG)
+
+
+def is_held():
+    return bool(settings.DATABASE_REPLICAS) and bool(cache.get(HOLD_KEY))
+
+
+def replica_reads(view):
+    """Читает данные страницы с реплики, если сессия не прикреплена
+    и недавно не сбрасывались кеши.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if is_pinned(request) or is_held():
+            return view(request, *args, **kwargs)
+        token = _replica_reads.set(True)
+        try:
+            response = view(request, *args, **kwargs)
+            # TemplateResponse (generic views) отрисуется уже после
+            # выхода из view — рисуем здесь, пока чтение идёт с реплики
+            if callable(getattr(response, 'render', None)):
+                response = response.render()
+            return response
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+class ReplicaPinMiddleware:
+    """Прикрепляет сессию к default после успешного изменяющего
+    запроса: следующий за ним редирект и страницы покажут запись.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (request.method not in ('GET', 'HEAD', 'OPTIONS')
+                and response.status_code < 400
+                and settings.DATABASE_REPLICAS):
+            pin_to_primary(request)
+        return response
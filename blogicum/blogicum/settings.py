@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,8 +43,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blogicum.metrics.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'blogicum.staticfiles.StaticFilesMiddleware',
+    'blogicum.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'blogicum.routers.ReplicaPinMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -55,12 +60,29 @@ ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
+# Продакшен-режим шаблонов (BLOGICUM_TEMPLATE_CACHE=1, по умолчанию
+# при DEBUG=False): кеширующий загрузчик разбирает каждый шаблон один
+# раз на процесс, а wsgi.py и asgi.py заранее разбирают все
+# (blogicum.templating.warm_up)
+TEMPLATE_CACHE = os.environ.get(
+    'BLOGICUM_TEMPLATE_CACHE', '0' if DEBUG else '1'
+) == '1'
+TEMPLATE_PRECOMPILE = TEMPLATE_CACHE
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+if TEMPLATE_CACHE:
+    TEMPLATE_LOADERS = [
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    ]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -77,13 +99,111 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# blogicum.db.sqlite3 — SQLite с WAL, mmap и busy_timeout (PRAGMAS в
+# модуле, переопределяются OPTIONS['pragmas']); atomic() открывает
+# BEGIN IMMEDIATE, чтобы конкурирующие записи ждали, а не падали.
+# Соединения живут CONN_MAX_AGE секунд и переиспользуются запросами
+SQLITE_OPTIONS = {'transaction_mode': 'IMMEDIATE'}
+CONN_MAX_AGE = int(os.environ.get('BLOGICUM_CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'blogicum.db.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+    }
+}
+
+# Реплики только для чтения (см. blogicum.routers). Локально
+# BLOGICUM_REPLICAS=N добавляет N SQLite-файлов db.replicaI.sqlite3,
+# которые копирует из основной БД manage.py sync_replicas; в тестах
+# они зеркалят default
+DATABASE_REPLICAS = []
+for number in range(1, int(os.environ.get('BLOGICUM_REPLICAS', 0)) + 1):
+    DATABASES[f'replica_{number}'] = {
+        'ENGINE': 'blogicum.db.sqlite3',
+        'NAME': BASE_DIR / f'db.replica{number}.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+
+DATABASE_ROUTERS = ['blogicum.routers.ReplicaRouter']
+# Сколько секунд после записи пользователь читает только с default
+REPLICA_PIN_SECONDS = 10
+# Сколько секунд после сброса кешей (blog.cache.bump_versions) все
+# читают с default: не меньше наибольшего отставания реплик
+REPLICA_MAX_LAG = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# По умолчанию кеш в памяти процесса; общий для всех воркеров кеш
+# задаётся переменными окружения, например FileBasedCache с каталогом
+# или DatabaseCache с таблицей (после manage.py createcachetable)
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'BLOGICUM_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('BLOGICUM_CACHE_LOCATION', 'blogicum'),
     }
 }
 
+# Сколько секунд хранить отрисованную карточку поста; сброс по сигналам
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+# Кеш страниц лент для анонимных посетителей: время жизни (не дольше,
+# чем до ближайшей отложенной публикации), срок блокировки на
+# перестроение и сколько секунд ждать чужого перестроения
+FEED_PAGE_CACHE_TIMEOUT = 60 * 5
+FEED_PAGE_LOCK_TIMEOUT = 10
+FEED_PAGE_LOCK_WAIT = 2
+# Условный GET лент и страницы поста (blog.cache.conditional_page):
+# сколько секунд анонимный ответ свеж в браузере и прокси и сколько
+# ещё его можно отдавать устаревшим, пока идёт перепроверка; выпуск
+# (BLOGICUM_RELEASE) входит в ETag, чтобы новые шаблоны не
+# прятались за 304
+FEED_HTTP_MAX_AGE = 60
+FEED_STALE_WHILE_REVALIDATE = 60 * 10
+PAGE_ETAG_SALT = os.environ.get('BLOGICUM_RELEASE', '')
+# На какой момент строить ленты: 'exact' — текущее время, 'bucket' —
+# время, округлённое вниз до FEED_NOW_BUCKET секунд, 'schedule' — общий
+# момент до ближайшей отложенной публикации (одинаковый SQL и ключи кеша)
+FEED_NOW_MODE = 'schedule'
+FEED_NOW_BUCKET = 60
+# Число постов для нумерованных страниц (?page=N): 'cached' — COUNT(*)
+# кешируется по версии лент на FEED_COUNT_CACHE_TIMEOUT секунд,
+# 'probe' — без подсчёта, следующая страница проверяется лишней строкой,
+# 'exact' — COUNT(*) на каждый запрос
+FEED_PAGE_COUNT = 'cached'
+FEED_COUNT_CACHE_TIMEOUT = 60 * 60
+# Движок поиска: 'auto' — FTS5 на SQLite, tsvector на PostgreSQL,
+# иначе 'simple'; после смены — manage.py rebuild_search_index
+SEARCH_BACKEND = 'auto'
+# Сколько лучших совпадений показывает страница поиска
+SEARCH_MAX_RESULTS = 200
+# Производные картинки постов: имя -> ширина в пикселях; каждая
+# сохраняется в JPEG и WebP в каталоге IMAGE_RENDITIONS_DIR внутри
+# MEDIA_ROOT
+IMAGE_RENDITIONS = {'card': 640, 'detail': 1280}
+IMAGE_RENDITION_QUALITY = 80
+IMAGE_RENDITIONS_DIR = 'renditions'
+# Фоновые задачи (blog.jobs) выполняет manage.py run_worker — он
+# должен работать рядом с сайтом, иначе письма (в том числе сброс
+# пароля), копии фото и прогрев кеша останутся в очереди (см.
+# README.md). При TASKS_EAGER (BLOGICUM_TASKS_EAGER=1, например для
+# runserver без воркера) задачи выполняются сразу в процессе сайта.
+# Задержка перед повтором упавшей задачи удваивается с каждой попыткой;
+# задача, взятая в работу дольше TASKS_LOCK_TIMEOUT секунд назад,
+# считается брошенной и возвращается в очередь
+TASKS_EAGER = os.environ.get('BLOGICUM_TASKS_EAGER', '0') == '1'
+TASKS_RETRY_DELAY = 30
+TASKS_LOCK_TIMEOUT = 60 * 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -132,6 +252,26 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# BLOGICUM_STATIC_PIPELINE=1 — продакшен-статика без отдельного
+# сервера: collectstatic складывает в STATIC_ROOT файлы с хешем в имени
+# и сжатые копии .gz/.br (blogicum.staticfiles), а StaticFilesMiddleware
+# отдаёт их сама. Файлы с хешем кешируются навсегда, остальные —
+# на STATIC_MAX_AGE секунд
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATIC_PIPELINE = os.environ.get('BLOGICUM_STATIC_PIPELINE') == '1'
+if STATIC_PIPELINE:
+    STATICFILES_STORAGE = 'blogicum.staticfiles.CompressedManifestStorage'
+STATIC_SERVE = STATIC_PIPELINE
+STATIC_MAX_AGE = 60 * 60
+
+# Урезанный Bootstrap (manage.py purge_css перед collectstatic): пока
+# файла SITE_CSS нет среди статики, {% site_css %} подключает полный
+# Bootstrap с CDN. SITE_CSS_INLINE_CRITICAL встраивает в страницу
+# SITE_CSS_CRITICAL (purge_css --critical), а остальное грузит отложенно
+SITE_CSS = 'css/bootstrap.purged.css'
+SITE_CSS_CRITICAL = 'css/bootstrap.critical.css'
+SITE_CSS_INLINE_CRITICAL = False
+
 
 # После входа перебрасываем на главную
 LOGIN_REDIRECT_URL = 'blog:index'
@@ -141,10 +281,36 @@ LOGIN_URL = 'login'
 
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
-
-# Эмуляция отправки писем в папку
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Загрузки отдаёт blogicum.media.serve_media (Range, ETag, кеширование
+# на MEDIA_MAX_AGE секунд). MEDIA_OFFLOAD перекладывает отправку байтов
+# на прокси: 'x-accel' — nginx с internal location MEDIA_ACCEL_PREFIX
+# на MEDIA_ROOT, 'x-sendfile' — Apache/lighttpd. MEDIA_SERVE = False
+# убирает маршрут, если прокси отдаёт MEDIA_URL сам
+MEDIA_SERVE = True
+MEDIA_MAX_AGE = 60 * 60 * 24 * 30
+MEDIA_OFFLOAD = os.environ.get('BLOGICUM_MEDIA_OFFLOAD') or None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Письма ставятся в очередь (blog.mail) и уходят из воркера
+# (manage.py run_worker) пачками через EMAIL_DELIVERY_BACKEND —
+# эмуляцию отправки писем в папку
+EMAIL_BACKEND = 'blog.mail.QueuedEmailBackend'
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # Папка, куда будут падать письма
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
-
-CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
\ No newline at end of file
+# Писем в одной пачке (одно соединение) и попыток на письмо
+EMAIL_BATCH_SIZE = 100
+EMAIL_MAX_ATTEMPTS = 5
+
+CSRF_FAILURE_VIEW = 'pages.views.csrf_failure'
+
+# Бюджет SQL-запросов на один запрос к сайту; None — не проверять
+QUERY_BUDGET = 20 if DEBUG else None
+# Отдельные бюджеты по имени представления, например {'blog:index': 3}
+QUERY_BUDGET_VIEWS = {}
+# Превышение бюджета — исключение (для тестов и CI), а не только лог
+QUERY_BUDGET_RAISE = False
+# Заголовок Server-Timing с разбивкой запроса (SQL, шаблоны, кеш):
+# True — всем, 'staff' — только персоналу, False — никому. Сводка по
+# представлениям — на /metrics/ (JSON или ?format=prometheus)
+SERVER_TIMING = 'staff'
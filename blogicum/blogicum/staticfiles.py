@@ -0,0 +1,152 @@
+"""Статика без отдельного веб-сервера.
+
+CompressedManifestStorage при collectstatic даёт файлам имена с
+хешем содержимого (как ManifestStaticFilesStorage) и кладёт рядом
+сжатые копии .gz и, если установлен пакет brotli, .br.
+StaticFilesMiddleware отдаёт файлы из STATIC_ROOT: выбирает сжатую
+копию по Accept-Encoding, ставит на файлы с хешем в имени вечный
+Cache-Control и отвечает FileResponse, который WSGI-сервер может
+отправить через sendfile без копирования в Python.
+"""
+import gzip
+import mimetypes
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import (
+    ManifestStaticFilesStorage, staticfiles_storage,
+)
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import cached_property
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Что имеет смысл сжимать: картинки PNG/JPEG/WebP уже сжаты
+COMPRESSIBLE = frozenset({
+    '.css', '.js', '.map', '.svg', '.ico', '.txt', '.html', '.json',
+    '.xml', '.woff', '.ttf', '.eot',
+})
+# Сжатая копия сохраняется, только если заметно меньше исходника
+MIN_RATIO = 0.95
+FOREVER = 60 * 60 * 24 * 365
+
+
+def _compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', lambda data: brotli.compress(data)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    """Манифест с хешами плюс .gz/.br рядом с каждым сжимаемым файлом."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if Path(name).suffix.lower() not in COMPRESSIBLE:
+                continue
+            for processed in self.compress(name):
+                yield name, processed, True
+
+    def compress(self, name):
+        path = Path(self.path(name))
+        data = path.read_bytes()
+        for suffix, compress in _compressors():
+            packed = compress(data)
+            if len(packed) < len(data) * MIN_RATIO:
+                path.with_name(path.name + suffix).write_bytes(packed)
+                yield name + suffix
+
+
+# Кодировки в порядке предпочтения -> суффикс сжатой копии
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Отдаёт STATIC_URL из STATIC_ROOT при settings.STATIC_SERVE."""
+
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = str(settings.STATIC_ROOT)
+
+    def __call__(self, request):
+        if (request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(self.prefix)):
+            response = self.serve(request,
+                                  request.path_info[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    @cached_property
+    def hashed_names(self):
+        """Имена с хешем из манифеста: содержимое по ним не меняется."""
+        hashed = getattr(staticfiles_storage, 'hashed_files', {})
+        return frozenset(hashed.values())
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        content_type, _ = mimetypes.guess_type(path)
+        encoding, served = None, path
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        for coding, suffix in ENCODINGS:
+            if coding in accepted and os.path.isfile(path + suffix):
+                encoding, served = coding, path + suffix
+                break
+        stat = os.stat(served)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                open(served, 'rb'),
+                content_type=content_type or 'application/octet-stream',
+            )
+            # Статика открывается в браузере, а не скачивается
+            if response.has_header('Content-Disposition'):
+                del response['Content-Disposition']
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if name in self.hashed_names:
+            response['Cache-Control'] = (
+                f'public, max-age={FOREVER}, immutable'
+            )
+        else:
+            response['Cache-Control'] = (
+                f'public, max-age={settings.STATIC_MAX_AGE}'
+            )
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
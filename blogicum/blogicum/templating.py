@@ -0,0 +1,85 @@
+"""Шаблоны в продакшене.
+
+При TEMPLATE_CACHE шаблоны загружаются через кеширующий загрузчик:
+каждый читается с диска и разбирается один раз на процесс.
+precompile() заранее разбирает все шаблоны из каталогов загрузчиков,
+чтобы первый запрос воркера не платил за разбор (см. warm_up());
+команда compile_templates делает то же перед выкладкой и
+завершается с ошибкой, если какой-то шаблон не разбирается.
+"""
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.template import (
+    TemplateDoesNotExist, TemplateSyntaxError, engines,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _loader_dirs(loaders):
+    for loader in loaders:
+        nested = getattr(loader, 'loaders', None)
+        if nested is not None:
+            yield from _loader_dirs(nested)
+        else:
+            yield from loader.get_dirs()
+
+
+def template_names(engine):
+    """Имена всех шаблонов в каталогах загрузчиков `engine` без
+    повторов: одноимённый шаблон ниже по списку всё равно не
+    загрузится.
+    """
+    names = []
+    for directory in _loader_dirs(engine.template_loaders):
+        directory = Path(directory)
+        if not directory.is_dir():
+            continue
+        for path in sorted(directory.rglob('*')):
+            name = path.relative_to(directory).as_posix()
+            if (path.is_file() and not path.name.startswith('.')
+                    and name not in names):
+                names.append(name)
+    return names
+
+
+def precompile(names=None):
+    """Разбирает шаблоны всех движков Django (или только `names`).
+
+    Возвращает число разобранных шаблонов и список пар (имя, ошибка).
+    """
+    compiled, errors = 0, []
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for name in names or template_names(engine):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError,
+                    UnicodeDecodeError) as error:
+                errors.append((name, error))
+            else:
+                compiled += 1
+    return compiled, errors
+
+
+def warm_up():
+    """Хук старта воркера из wsgi.py и asgi.py: при
+    TEMPLATE_PRECOMPILE разбирает шаблоны заранее.
+
+    Ошибки не мешают воркеру подняться — сломанный шаблон всё равно
+    упадёт на своём запросе, — но попадают в лог.
+    """
+    if not settings.TEMPLATE_PRECOMPILE:
+        return
+    try:
+        _, errors = precompile()
+    except Exception:
+        logger.exception('Не удалось предкомпилировать шаблоны')
+        return
+    for name, error in errors:
+        logger.error('Шаблон %s не разбирается: %s', name, error,
+                     exc_info=error)
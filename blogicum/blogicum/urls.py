@@ -14,10 +14,12 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import include, path
+from django.urls import include, path, re_path
 from pages.views import RegistrationView
 from django.conf import settings
-from django.conf.urls.static import static
+
+from blogicum.media import serve_media
+from blogicum.metrics import metrics_view
 
 urlpatterns = [
     path('', include('blog.urls')),
@@ -27,10 +29,14 @@ path('auth/registration/', RegistrationView.as_view(), name='registration'),
     path('auth/', include('django.contrib.auth.urls')),
 
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
 ]
 
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+if settings.MEDIA_SERVE:
+    urlpatterns.append(re_path(
+        rf'^{settings.MEDIA_URL.strip("/")}/(?P<path>.+)$', serve_media,
+        name='media',
+    ))
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_wsgi_application()
+
+# Разбираем шаблоны при старте воркера, а не на первом запросе
+from blogicum.templating import warm_up  # noqa: E402
+
+warm_up()
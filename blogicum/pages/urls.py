@@ -1,11 +1,13 @@
 from django.urls import path
 
+from blogicum.routers import replica_reads
+
 from .views import AboutView, RulesView
 
 app_name = 'pages'
 
 
 urlpatterns = [
-    path('about/', AboutView.as_view(), name='about'),
-    path('rules/', RulesView.as_view(), name='rules'),
+    path('about/', replica_reads(AboutView.as_view()), name='about'),
+    path('rules/', replica_reads(RulesView.as_view()), name='rules'),
 ]
@@ -0,0 +1,131 @@
+"""Чтение под конкурентной записью комментариев: обычный
+django.db.backends.sqlite3 против blogicum.db.sqlite3.
+
+    python tests/benchmarks/bench_sqlite_concurrency.py --seconds 10
+
+Для каждого движка в отдельном процессе создаётся файловая БД во
+временном каталоге и засевается (harness.seed), после чего читатели
+открывают страницы постов, а писатели добавляют комментарии через add_comment.
+Кеш отключён (DummyCache), чтобы чтения шли в БД. Итог — JSON со
+скоростью чтения, задержками и числом ошибок «database is locked».
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import harness
+
+ENGINES = {
+    'stock': ('django.db.backends.sqlite3', {}, 0),
+    'tuned': ('blogicum.db.sqlite3', {'transaction_mode': 'IMMEDIATE'}, 60),
+}
+
+
+def percentile(values, share):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def worker(deadline, action, latencies, errors):
+    from django.db import connections
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            status = action().status_code
+        except Exception as error:
+            errors.append(type(error).__name__)
+            continue
+        if status >= 400:
+            errors.append(f'HTTP {status}')
+        else:
+            latencies.append(time.perf_counter() - started)
+    connections.close_all()
+
+
+def run(engine, seconds, readers, writers, posts):
+    name, options, max_age = ENGINES[engine]
+    tmp = Path(tempfile.mkdtemp(prefix='bench-sqlite-'))
+    harness.setup_django(tmp / 'bench.sqlite3', name, options, max_age)
+    from django.test import Client
+
+    from blog.models import Post
+    author = harness.seed(posts)['author']
+    ids = list(Post.objects.published().values_list('pk', flat=True))
+
+    def read_action():
+        client = Client()
+        return lambda: client.get(f'/posts/{random.choice(ids)}/')
+
+    def write_action():
+        client = Client()
+        client.force_login(author)
+        return lambda: client.post(
+            f'/posts/{random.choice(ids)}/comment/', {'text': 'Комментарий'}
+        )
+
+    reads, writes, errors = [], [], []
+    deadline = time.monotonic() + seconds
+    threads = [
+        threading.Thread(target=worker,
+                         args=(deadline, read_action(), reads, errors))
+        for _ in range(readers)
+    ] + [
+        threading.Thread(target=worker,
+                         args=(deadline, write_action(), writes, errors))
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        'engine': engine,
+        'reads_per_second': round(len(reads) / seconds, 1),
+        'writes_per_second': round(len(writes) / seconds, 1),
+        'read_p50_ms': round(percentile(reads, 0.5) * 1000, 2),
+        'read_p95_ms': round(percentile(reads, 0.95) * 1000, 2),
+        'errors': len(errors),
+        'error_types': sorted(set(errors)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--posts', type=int, default=50)
+    parser.add_argument('--engine', choices=ENGINES)
+    parser.add_argument('--output', help='куда записать JSON с итогами')
+    args = parser.parse_args()
+    if args.engine:
+        print(json.dumps(run(args.engine, args.seconds, args.readers,
+                             args.writers, args.posts)))
+        return
+    results = []
+    for engine in ENGINES:
+        # Каждый движок — в своём процессе: настройки БД не меняются
+        # после первого соединения
+        out = subprocess.run(
+            [sys.executable, __file__, '--engine', engine,
+             '--seconds', str(args.seconds), '--readers', str(args.readers),
+             '--writers', str(args.writers), '--posts', str(args.posts)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    report = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(report, encoding='utf-8')
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+r"""Задержки и число SQL-запросов основных страниц блога на больших
+объёмах данных.
+
+    python tests/benchmarks/bench_views.py --volume 100k \
+        --output bench-$(git rev-parse --short HEAD).json
+    python tests/benchmarks/bench_views.py --volume 100k \
+        --compare bench-old.json
+
+Засеянная БД хранится в --db (по умолчанию во временном каталоге
+системы, отдельно для каждого объёма) и переиспользуется следующими
+прогонами: засев 1M постов занимает минуты. Результаты — JSON с
+коммитом, версиями и по каждому сценарию p50/p95/p99 и числом
+запросов к БД; --compare сравнивает с прошлым прогоном и завершается
+с кодом 1 при регрессии p95 или числа запросов больше --threshold.
+"""
+import argparse
+import json
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import harness
+
+
+def scenarios(objects):
+    """Имя сценария -> (нужен ли вход: None/'user'/'admin', функция
+    клиента -> ответ).
+    """
+    post, author, category = (
+        objects['post'], objects['author'], objects['category']
+    )
+    return {
+        'index': (None, lambda client: client.get('/')),
+        'index_page_50': (None, lambda client: client.get('/?page=50')),
+        'category_posts': (
+            None, lambda client: client.get(f'/category/{category.slug}/')
+        ),
+        'profile': (
+            None, lambda client: client.get(f'/profile/{author.username}/')
+        ),
+        'post_detail': (None, lambda client: client.get(f'/posts/{post.pk}/')),
+        'add_comment': ('user', lambda client: client.post(
+            f'/posts/{post.pk}/comment/', {'text': 'Бенчмарк'}
+        )),
+        'admin_posts': ('admin', lambda client: client.get(
+            '/admin/blog/post/'
+        )),
+        'admin_comments': ('admin', lambda client: client.get(
+            '/admin/blog/comment/'
+        )),
+    }
+
+
+def run_scenario(login, action, requests, concurrency, objects):
+    from django.db import connections
+    from django.test import Client
+
+    def client_for_thread():
+        client = Client()
+        if login == 'user':
+            client.force_login(objects['author'])
+        elif login == 'admin':
+            client.force_login(objects['admin'])
+        return client
+
+    if concurrency == 1:
+        client = client_for_thread()
+        return harness.measure(lambda: action(client), requests)
+
+    def one_thread(_):
+        try:
+            client = client_for_thread()
+            return harness.measure(lambda: action(client),
+                                   max(requests // concurrency, 2))
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        parts = list(pool.map(one_thread, range(concurrency)))
+    # Перцентили по потокам не складываются: берём худший поток
+    return {
+        metric: max(part[metric] for part in parts)
+        for metric in parts[0] if metric != 'statuses'
+    } | {'statuses': sorted({s for part in parts for s in part['statuses']})}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--volume', choices=harness.VOLUMES, default='10k')
+    parser.add_argument('--posts', type=int,
+                        help='число постов вместо --volume')
+    parser.add_argument('--db', help='файл SQLite с засеянными данными')
+    parser.add_argument('--requests', type=int, default=30)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--cache', action='store_true',
+                        help='с LocMemCache вместо DummyCache')
+    parser.add_argument('--only', nargs='*', help='только эти сценарии')
+    parser.add_argument('--output', help='куда записать JSON с итогами')
+    parser.add_argument('--compare', help='JSON прошлого прогона')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    posts = args.posts or harness.VOLUMES[args.volume]
+    db = Path(args.db or Path(tempfile.gettempdir())
+              / f'blogicum-bench-{posts}.sqlite3')
+    harness.setup_django(
+        db, cache_backend=(
+            harness.LOCMEM_CACHE if args.cache else harness.DUMMY_CACHE
+        ),
+    )
+    objects = harness.seed(
+        posts, progress=lambda text: print(text, file=sys.stderr)
+    )
+    results = {}
+    for name, (login, action) in scenarios(objects).items():
+        if args.only and name not in args.only:
+            continue
+        print(f'{name}...', file=sys.stderr)
+        results[name] = run_scenario(login, action, args.requests,
+                                     args.concurrency, objects)
+    report = {
+        'environment': harness.environment(),
+        'posts': posts,
+        'cache': args.cache,
+        'concurrency': args.concurrency,
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding='utf-8')
+    print(text)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        lines, regressed = harness.compare(baseline, report, args.threshold)
+        print('\n'.join(lines), file=sys.stderr)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
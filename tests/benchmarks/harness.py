@@ -0,0 +1,228 @@
+"""Общие части бенчмарков: настройка Django на отдельной БД, засев
+данных, замеры запросов к сайту и сравнение результатов.
+
+Бенчмарки — обычные скрипты (bench_*.py), pytest их не собирает.
+"""
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+FIXTURE = ROOT / 'blogicum' / 'db.json'
+VOLUMES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+DUMMY_CACHE = 'django.core.cache.backends.dummy.DummyCache'
+LOCMEM_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+
+
+def setup_django(db_path, engine='blogicum.db.sqlite3', options=None,
+                 conn_max_age=60, cache_backend=DUMMY_CACHE, media_root=None):
+    """Настройки проекта поверх одной файловой БД `db_path`.
+
+    По умолчанию кеш отключён (DummyCache), чтобы замерять путь
+    через БД, а не попадания в кеш страниц.
+    """
+    sys.path[:0] = [str(ROOT / 'blogicum'), str(ROOT)]
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
+    from django.conf import settings
+    if options is None:
+        options = {'transaction_mode': 'IMMEDIATE'}
+    settings.DATABASES = {'default': {
+        'ENGINE': engine, 'NAME': str(db_path),
+        'OPTIONS': options, 'CONN_MAX_AGE': conn_max_age,
+    }}
+    settings.DATABASE_REPLICAS = []
+    settings.CACHES = {'default': {
+        'BACKEND': cache_backend, 'LOCATION': 'bench',
+    }}
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    settings.MEDIA_ROOT = media_root or str(Path(db_path).parent)
+    settings.TASKS_EAGER = False
+    settings.SERVER_TIMING = False
+    import django
+    django.setup()
+
+
+def _fixture_rows(model):
+    with open(FIXTURE, encoding='utf-8') as fixture:
+        return [row for row in json.load(fixture) if row['model'] == model]
+
+
+def seed(posts, comments_per_post=0.5, batch_size=5000, progress=None):
+    """Засевает БД: пользователи, категории и местоположения из
+    db.json, `posts` постов с текстами оттуда же и комментарии.
+
+    Посты создаются bulk_create без сигналов, поэтому лента и поиск
+    пересобираются целиком в конце. Возвращает словарь с объектами,
+    нужными сценариям (автор, категория, пост).
+    """
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import transaction
+    from django.utils import timezone
+
+    from blog import feed, search
+    from blog.models import Category, Comment, Location, Post
+
+    User = get_user_model()
+    call_command('migrate', verbosity=0)
+    rng = random.Random(20240101)
+    if Post.objects.exists():
+        return scenario_objects()
+    with transaction.atomic():
+        authors = [
+            User.objects.create_user(row['fields']['username'],
+                                     password='bench')
+            for row in _fixture_rows('auth.user')
+        ]
+        User.objects.create_superuser('bench-admin', password='bench')
+        categories = [
+            Category.objects.create(
+                title=row['fields']['title'], slug=row['fields']['slug'],
+                description=row['fields']['description'],
+                is_published=row['fields']['is_published'],
+            )
+            for row in _fixture_rows('blog.category')
+        ]
+        locations = [
+            Location.objects.create(name=row['fields']['name'],
+                                    is_published=row['fields']['is_published'])
+            for row in _fixture_rows('blog.location')
+        ]
+        corpus = [
+            (row['fields']['title'], row['fields']['text'])
+            for row in _fixture_rows('blog.post')
+        ]
+        now = timezone.now()
+        batch = []
+        for number in range(posts):
+            title, text = corpus[number % len(corpus)]
+            batch.append(Post(
+                title=title[:256], text=text, author=rng.choice(authors),
+                category=rng.choice(categories),
+                location=rng.choice(locations + [None]),
+                # Год истории и немного отложенных и скрытых постов
+                pub_date=now - timedelta(minutes=rng.randint(-10_000,
+                                                             525_600)),
+                is_published=rng.random() > 0.05,
+            ))
+            if len(batch) >= batch_size:
+                Post.objects.bulk_create(batch)
+                batch = []
+                if progress:
+                    progress(f'посты: {number + 1}/{posts}')
+        Post.objects.bulk_create(batch)
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        batch = []
+        for number in range(int(posts * comments_per_post)):
+            batch.append(Comment(
+                text=corpus[number % len(corpus)][1][:200],
+                post_id=rng.choice(post_ids), author=rng.choice(authors),
+            ))
+            if len(batch) >= batch_size:
+                Comment.objects.bulk_create(batch)
+                batch = []
+        Comment.objects.bulk_create(batch)
+        if progress:
+            progress('лента и поисковый индекс')
+        feed.rebuild(batch_size)
+        search.rebuild(batch_size)
+    return scenario_objects()
+
+
+def scenario_objects():
+    """Объекты для адресов сценариев: автор, категория и пост с
+    наибольшим числом комментариев среди видимых.
+    """
+    from django.contrib.auth import get_user_model
+    from django.db.models import Count
+
+    from blog.models import Post
+    post = Post.objects.published().annotate(
+        total=Count('comments')
+    ).order_by('-total').select_related('author', 'category').first()
+    return {
+        'post': post,
+        'author': post.author,
+        'category': post.category,
+        'admin': get_user_model().objects.get(username='bench-admin'),
+    }
+
+
+def measure(action, requests, warmup=3):
+    """Выполняет `action` (возвращает ответ) `requests` раз и
+    возвращает перцентили задержки и число SQL-запросов на запрос.
+    """
+    from blogicum.middleware import QueryCounter
+    for _ in range(warmup):
+        action()
+    latencies, queries, statuses = [], [], set()
+    for _ in range(requests):
+        with QueryCounter() as counter:
+            started = time.perf_counter()
+            response = action()
+            latencies.append(time.perf_counter() - started)
+        queries.append(len(counter))
+        statuses.add(response.status_code)
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+    return {
+        'requests': requests,
+        'statuses': sorted(statuses),
+        'p50_ms': round(cuts[49] * 1000, 2),
+        'p95_ms': round(cuts[94] * 1000, 2),
+        'p99_ms': round(cuts[98] * 1000, 2),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2),
+        'queries_per_request': round(statistics.fmean(queries), 2),
+        'max_queries': max(queries),
+    }
+
+
+def environment():
+    """Откуда результаты: коммит, версии и машина."""
+    import django
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'machine': platform.platform(),
+    }
+
+
+def compare(baseline, current, threshold):
+    """Строки отчёта и признак регрессии: p95 или число запросов
+    выросли больше чем на `threshold` (доля).
+    """
+    lines, regressed = [], False
+    for key in ('posts', 'cache', 'concurrency'):
+        if baseline.get(key) != current.get(key):
+            lines.append(f'внимание: {key} отличается '
+                         f'({baseline.get(key)} -> {current.get(key)})')
+    for name, new in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            lines.append(f'{name}: нет в базовом прогоне')
+            continue
+        for metric in ('p50_ms', 'p95_ms', 'queries_per_request'):
+            change = (new[metric] - old[metric]) / (old[metric] or 1)
+            flag = ''
+            if metric != 'p50_ms' and change > threshold:
+                flag, regressed = '  <-- регрессия', True
+            lines.append(f'{name} {metric}: {old[metric]} -> '
+                         f'{new[metric]} ({change:+.0%}){flag}')
+    return lines, regressed
@@ -3,6 +3,7 @@ import re
 import time
 from http import HTTPStatus
 from inspect import getsource
+from io import StringIO
 from pathlib import Path
 from typing import (
     Iterable,
@@ -19,6 +20,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -41,6 +43,39 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def enforce_query_budget():
+    with override_settings(QUERY_BUDGET=20, QUERY_BUDGET_RAISE=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кеш не откатывается вместе с транзакцией теста
+    cache.clear()
+    yield
+
+
+@pytest.fixture
+def run_jobs():
+    """Выполняет накопившиеся фоновые задачи в процессе теста."""
+    from django.core.management import call_command
+
+    def run():
+        call_command('run_worker', '--once', '--concurrency', '0',
+                     stdout=StringIO())
+    return run
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path_factory):
+    # Загрузки и производные картинки (в том числе .webp) — во временный
+    # каталог, а не в MEDIA_ROOT проекта
+    path = tmp_path_factory.mktemp('media')
+    with override_settings(MEDIA_ROOT=path):
+        yield path
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -92,6 +127,7 @@ pytest_plugins = [
     "fixtures.locations",
     "fixtures.categories",
     "fixtures.comments",
+    "fixtures.smtp",
     "adapters.comment",
 ]
 
@@ -0,0 +1,93 @@
+"""Локальный SMTP-сервер для тестов: принимает письма в память."""
+import socketserver
+import threading
+from email import message_from_bytes
+from email.policy import default as default_policy
+
+import pytest
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost ESMTP test')
+        self.envelope = {'from': None, 'to': []}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            # RSET, NOOP и прочее — просто соглашаемся
+            handler = getattr(self, f'smtp_{verb.lower()}', None)
+            self.reply(handler(command) if handler else '250 OK')
+
+    def smtp_ehlo(self, command):
+        self.reply('250-localhost')
+        return '250 8BITMIME'
+
+    def smtp_helo(self, command):
+        return '250 localhost'
+
+    def smtp_mail(self, command):
+        self.envelope = {'from': command[10:].strip('<> '), 'to': []}
+        return '250 OK'
+
+    def smtp_rcpt(self, command):
+        self.envelope['to'].append(command[8:].strip('<> '))
+        return '250 OK'
+
+    def smtp_data(self, command):
+        self.reply('354 End data with <CR><LF>.<CR><LF>')
+        data = []
+        for raw in iter(self.rfile.readline, b''):
+            if raw == b'.\r\n':
+                break
+            data.append(raw[1:] if raw.startswith(b'..') else raw)
+        self.server.messages.append({
+            **self.envelope,
+            'message': message_from_bytes(
+                b''.join(data), policy=default_policy
+            ),
+        })
+        return '250 OK'
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.messages = []
+        self.connections = 0
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+@pytest.fixture
+def smtp_server(settings):
+    """SMTP-сервер на свободном порту; почта уходит в него через
+    EMAIL_DELIVERY_BACKEND.
+    """
+    server = SMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.EMAIL_DELIVERY_BACKEND = (
+        'django.core.mail.backends.smtp.EmailBackend'
+    )
+    settings.EMAIL_HOST = '127.0.0.1'
+    settings.EMAIL_PORT = server.port
+    settings.EMAIL_USE_TLS = settings.EMAIL_USE_SSL = False
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,80 @@
+from io import StringIO
+
+import pytest
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.test import RequestFactory
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _stored_count(post):
+    post.refresh_from_db(fields=['comment_count'])
+    return post.comment_count
+
+
+def test_add_and_delete_comment_update_counter(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    url = f'/posts/{post.id}/comment/'
+    user_client.post(url, data={'text': 'первый'})
+    user_client.post(url, data={'text': 'второй'})
+    assert _stored_count(post) == 2, (
+        'Убедитесь, что добавление комментария увеличивает comment_count.'
+    )
+
+    comment = post.comments.first()
+    user_client.post(f'/posts/{post.id}/delete_comment/{comment.id}/')
+    assert _stored_count(post) == 1, (
+        'Убедитесь, что удаление комментария уменьшает comment_count.'
+    )
+
+
+def test_admin_bulk_delete_updates_counter(
+        mixer, admin_user, post_with_published_location):
+    from blog.models import Comment
+
+    post = post_with_published_location
+    mixer.cycle(3).blend('blog.Comment', post=post)
+    post.__class__.objects.filter(pk=post.pk).update(comment_count=3)
+
+    request = RequestFactory().post('/')
+    request.user = admin_user
+    model_admin = site._registry[Comment]
+    to_delete = list(Comment.objects.values_list('pk', flat=True)[:2])
+    model_admin.delete_queryset(
+        request, Comment.objects.filter(pk__in=to_delete)
+    )
+    assert _stored_count(post) == 1
+
+
+def test_recount_command_repairs_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend('blog.Comment', post=post)
+    assert _stored_count(post) == 0
+
+    out = StringIO()
+    call_command('recount_comments', '--dry-run', stdout=out)
+    assert _stored_count(post) == 0
+    assert 'Найдено расхождений: 1' in out.getvalue()
+
+    call_command('recount_comments', stdout=StringIO())
+    assert _stored_count(post) == 2
+
+
+def test_feed_copies_stored_counter(
+        user_client, mixer, post_with_published_location):
+    from blog.models import FeedEntry
+
+    post = post_with_published_location
+    user_client.post(f'/posts/{post.id}/comment/', data={'text': 'текст'})
+    mixer.blend('blog.Comment', post=post)
+
+    def entry_count():
+        return FeedEntry.objects.get(pk=post.pk).comment_count
+
+    assert entry_count() == _stored_count(post) == 1, (
+        'Убедитесь, что лента берёт счётчик из Post.comment_count.'
+    )
+    call_command('recount_comments', stdout=StringIO())
+    assert entry_count() == _stored_count(post) == 2
@@ -0,0 +1,90 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.utils import COMMENTS_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def commented_post(mixer, post_with_published_location):
+    mixer.cycle(COMMENTS_PER_PAGE * 2 + 5).blend(
+        'blog.Comment', post=post_with_published_location
+    )
+    return post_with_published_location
+
+
+def _detail_queries(client, post):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(f'/posts/{post.id}/')
+    assert response.status_code == 200
+    return response, len(ctx.captured_queries)
+
+
+def test_detail_renders_one_page_of_comments(client, commented_post):
+    response = client.get(f'/posts/{commented_post.id}/')
+    comments = response.context['comments']
+    assert len(comments) == COMMENTS_PER_PAGE, (
+        'Убедитесь, что на странице поста выводится только первая '
+        'страница комментариев.'
+    )
+    assert comments.has_next()
+    assert 'data-comments-more' in response.content.decode()
+
+
+def test_load_more_walks_all_comments(client, commented_post):
+    response = client.get(f'/posts/{commented_post.id}/')
+    seen = [comment.id for comment in response.context['comments']]
+    cursor = response.context['comments'].next_cursor
+    while cursor:
+        data = client.get(
+            f'/posts/{commented_post.id}/comments/',
+            {'after': cursor},
+            HTTP_ACCEPT='application/json',
+        ).json()
+        seen.extend(
+            int(chunk.split('"', 1)[0])
+            for chunk in data['html'].split('name="comment_')[1:]
+        )
+        cursor = data['next_cursor']
+    expected = list(
+        commented_post.comments.order_by('created_at', 'pk')
+        .values_list('pk', flat=True)
+    )
+    assert seen == expected, (
+        'Убедитесь, что «Показать ещё» выдаёт все комментарии '
+        'по порядку без пропусков и повторов.'
+    )
+
+
+def test_fragment_endpoint_returns_html(client, commented_post):
+    response = client.get(f'/posts/{commented_post.id}/comments/')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/html')
+    assert response.content.decode().count('name="comment_') == (
+        COMMENTS_PER_PAGE
+    )
+
+
+def test_fragment_endpoint_hides_unpublished_post(
+        client, commented_post):
+    commented_post.is_published = False
+    commented_post.save()
+    response = client.get(f'/posts/{commented_post.id}/comments/')
+    assert response.status_code == 404, (
+        'Убедитесь, что комментарии скрытого поста недоступны.'
+    )
+
+
+def test_detail_queries_do_not_depend_on_comments(
+        client, mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.blend('blog.Comment', post=post)
+    _, one_comment = _detail_queries(client, post)
+    mixer.cycle(COMMENTS_PER_PAGE * 3).blend('blog.Comment', post=post)
+    _, many_comments = _detail_queries(client, post)
+    assert one_comment == many_comments, (
+        'Убедитесь, что число запросов на странице поста не зависит '
+        'от числа комментариев.'
+    )
@@ -0,0 +1,232 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def page_urls(user, published_category, post_with_published_location):
+    return [
+        '/',
+        f'/category/{published_category.slug}/',
+        f'/profile/{user.username}/',
+        f'/posts/{post_with_published_location.pk}/',
+    ]
+
+
+def test_pages_have_validators(client, page_urls):
+    for url in page_urls:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response['ETag'].startswith('W/"'), (
+            f'Убедитесь, что страница {url} отдаёт ETag.'
+        )
+        assert response.has_header('Last-Modified'), (
+            f'Убедитесь, что страница {url} отдаёт Last-Modified.'
+        )
+
+
+def test_not_modified_skips_rendering(
+        client, page_urls, django_assert_num_queries):
+    for url in page_urls:
+        etag = client.get(url)['ETag']
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            f'Убедитесь, что {url} отвечает 304 на совпавший ETag.'
+        )
+        assert not response.templates
+        assert response['ETag'] == etag
+
+
+def test_if_modified_since(client, page_urls):
+    for url in page_urls:
+        last_modified = client.get(url)['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304
+
+
+def test_post_change_changes_validators(
+        client, post_with_published_location):
+    post = post_with_published_location
+    url = f'/posts/{post.pk}/'
+    feed_etag = client.get('/')['ETag']
+    post_etag = client.get(url)['ETag']
+    post.title = 'Новый заголовок'
+    post.save()
+    for url, etag in (('/', feed_etag), (url, post_etag)):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Убедитесь, что после правки поста ETag страниц меняется.'
+        )
+        assert post.title in response.content.decode()
+
+
+def test_comment_changes_post_validators(
+        client, mixer, user, post_with_published_location):
+    post = post_with_published_location
+    url = f'/posts/{post.pk}/'
+    etag = client.get(url)['ETag']
+    comment = mixer.blend('blog.Comment', post=post, author=user)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    etag = response['ETag']
+    comment.delete()
+    # Удаление не оставляет отметки времени: ETag меняет версия лент
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_comment_edit_changes_validators_in_other_processes(
+        client, mixer, user, settings, monkeypatch,
+        post_with_published_location):
+    post = post_with_published_location
+    url = f'/posts/{post.pk}/'
+    comment = mixer.blend('blog.Comment', post=post, author=user,
+                          text='Старый текст')
+    # Другой процесс со своим LocMemCache: сброса версий он не видит,
+    # а отметку последней правки берёт из БД, когда её кеш истечёт
+    settings.FEED_PAGE_CACHE_TIMEOUT = 0
+    monkeypatch.setattr('blog.signals.bump_versions', lambda *scopes: None)
+    etag = client.get(url)['ETag']
+    comment.text = 'Новый текст'
+    comment.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        'Убедитесь, что правка комментария меняет ETag страницы поста '
+        'через БД, а не только через кеш процесса.'
+    )
+    assert 'Новый текст' in response.content.decode()
+
+
+def test_etag_depends_on_user(client, user_client, page_urls):
+    for url in page_urls:
+        etag = client.get(url)['ETag']
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Убедитесь, что ETag страницы зависит от пользователя.'
+        )
+
+
+def test_cache_control(client, user_client, page_urls, settings):
+    settings.FEED_HTTP_MAX_AGE = 30
+    settings.FEED_STALE_WHILE_REVALIDATE = 300
+    for url in page_urls:
+        cache.clear()
+        anonymous = client.get(url)['Cache-Control']
+        assert 'public' in anonymous
+        assert 'max-age=30' in anonymous
+        assert 'stale-while-revalidate=300' in anonymous
+        private = user_client.get(url)['Cache-Control']
+        assert 'private' in private and 'no-cache' in private, (
+            'Убедитесь, что ответ авторизованному пользователю не '
+            'кешируется общими кешами.'
+        )
+
+
+def test_hidden_post_is_not_served_as_not_modified(
+        client, post_with_published_location):
+    post = post_with_published_location
+    url = f'/posts/{post.pk}/'
+    etag = client.get(url)['ETag']
+    post.is_published = False
+    post.save()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 404
+
+
+@pytest.mark.parametrize('change', ['unpublish', 'hide_category', 'delete'])
+def test_removal_changes_last_modified(
+        client, mixer, change, published_category,
+        post_with_published_location):
+    post = post_with_published_location
+    # В ленте остаётся другой пост, по которому тоже есть отметки
+    mixer.blend('blog.Post', author=post.author,
+                category=published_category,
+                pub_date=post.pub_date - timedelta(days=1))
+    urls = ['/', f'/category/{published_category.slug}/']
+    stamps = {url: client.get(url)['Last-Modified'] for url in urls}
+    # Last-Modified — с точностью до секунды
+    time.sleep(1.1)
+    if change == 'unpublish':
+        post.is_published = False
+        post.save()
+    elif change == 'hide_category':
+        published_category.is_published = False
+        published_category.save()
+    else:
+        post.delete()
+    for url, stamp in stamps.items():
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=stamp)
+        assert response.status_code != 304, (
+            'Убедитесь, что после снятия поста с публикации '
+            'Last-Modified ленты меняется.'
+        )
+
+
+def test_etag_changes_after_new_login(
+        user_client, user, post_with_published_location):
+    url = f'/posts/{post_with_published_location.pk}/'
+    # Первый ответ ставит cookie с CSRF-токеном
+    user_client.get(url)
+    etag = user_client.get(url)['ETag']
+    assert user_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    user_client.logout()
+    user_client.force_login(user)
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        'Убедитесь, что после нового входа страница с формой '
+        'отрисовывается заново, с новым CSRF-токеном.'
+    )
+
+
+FUTURE = 'Fri, 01 Jan 2100 00:00:00 GMT'
+
+
+@pytest.mark.parametrize('headers', [
+    {'HTTP_IF_NONE_MATCH': '*'},
+    {'HTTP_IF_MODIFIED_SINCE': FUTURE},
+])
+def test_missing_pages_are_not_served_as_not_modified(client, headers):
+    for url in ('/posts/99999/', '/category/nope/', '/profile/nobody/'):
+        assert client.get(url, **headers).status_code == 404, (
+            f'Убедитесь, что {url} отвечает 404, а не 304, на '
+            'условный запрос к несуществующему объекту.'
+        )
+
+
+@pytest.mark.parametrize('hide', ['post', 'category', 'future'])
+def test_hidden_pages_ignore_wildcard_validators(
+        client, hide, published_category, post_with_published_location):
+    post = post_with_published_location
+    if hide == 'post':
+        post.is_published = False
+        post.save()
+    elif hide == 'category':
+        published_category.is_published = False
+        published_category.save()
+    else:
+        post.pub_date = timezone.now() + timedelta(days=1)
+        post.save()
+    urls = [f'/posts/{post.pk}/']
+    if hide == 'category':
+        urls.append(f'/category/{published_category.slug}/')
+    for url in urls:
+        for headers in ({'HTTP_IF_NONE_MATCH': '*'},
+                        {'HTTP_IF_MODIFIED_SINCE': FUTURE}):
+            assert client.get(url, **headers).status_code == 404, (
+                f'Убедитесь, что скрытая страница {url} отвечает 404, '
+                'а не 304.'
+            )
+
+
+def test_author_sees_own_hidden_post(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    response = user_client.get(f'/posts/{post.pk}/',
+                               HTTP_IF_NONE_MATCH='*')
+    assert response.status_code == 200
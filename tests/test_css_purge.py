@@ -0,0 +1,96 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from blog.templatetags import blog_tags
+from blogicum import csspurge
+from blogicum.csspurge import purge
+
+CSS = (
+    '@charset "UTF-8";/*! license */:root{--x:1}body{margin:0}'
+    '.btn,.unused{color:red}.nav .nav-link:not(.a,.b){x:1}'
+    '@media (min-width:576px){.col-sm{flex:1}.gone{x:1}}'
+    '@media print{.gone{x:1}}@keyframes spin{to{transform:rotate(1turn)}}'
+)
+
+
+def test_purge_keeps_only_used_classes():
+    result = purge(CSS, {'btn', 'nav', 'nav-link', 'a', 'b', 'col-sm'})
+    assert result.startswith('@charset "UTF-8";/*! license */'), (
+        'Убедитесь, что @charset и лицензия остаются в начале.'
+    )
+    for kept in (':root{--x:1}', 'body{margin:0}', '.btn{color:red}',
+                 '.nav .nav-link:not(.a,.b){x:1}',
+                 '@media (min-width:576px){.col-sm{flex:1}}',
+                 '@keyframes spin{to{transform:rotate(1turn)}}'):
+        assert kept in result, f'Убедитесь, что правило {kept} осталось.'
+    assert 'unused' not in result and 'gone' not in result
+    assert '@media print' not in result, (
+        'Убедитесь, что опустевшие @media удаляются.'
+    )
+
+
+@pytest.fixture
+def site_css(settings, tmp_path):
+    settings.STATICFILES_DIRS = [*settings.STATICFILES_DIRS, tmp_path]
+    csspurge.purged_available.cache_clear()
+    csspurge._critical_text.cache_clear()
+    yield tmp_path
+    csspurge.purged_available.cache_clear()
+    csspurge._critical_text.cache_clear()
+
+
+def _head(client):
+    cache.clear()
+    return client.get('/').content.decode().split('</head>')[0]
+
+
+@pytest.mark.django_db
+def test_purge_css_command_and_site_css_tag(site_css, client, settings):
+    assert 'cdn.jsdelivr.net' in _head(client), (
+        'Убедитесь, что без собранного CSS подключается Bootstrap с CDN.'
+    )
+    call_command('purge_css', '--critical', '--output-dir', site_css,
+                 stdout=StringIO())
+    # Наличие файла запоминается на процесс — собирают до запуска
+    csspurge.purged_available.cache_clear()
+    purged = (site_css / settings.SITE_CSS).read_text(encoding='utf-8')
+    full = (settings.BASE_DIR / 'static/css/bootstrap.min.css').stat()
+    assert len(purged) < full.st_size / 2, (
+        'Убедитесь, что урезанный CSS заметно меньше полного.'
+    )
+    for used in ('.navbar', '.card', '.form-control', '.is-invalid'):
+        assert used in purged, f'Убедитесь, что в CSS остался {used}.'
+    assert '.carousel' not in purged
+
+    head = _head(client)
+    assert 'cdn.jsdelivr.net' not in head
+    assert f'<link rel="stylesheet" href="/static/{settings.SITE_CSS}">' in (
+        head
+    ), 'Убедитесь, что страница подключает урезанный CSS.'
+
+    settings.SITE_CSS_INLINE_CRITICAL = True
+    head = _head(client)
+    assert '<style>' in head and 'rel="preload"' in head, (
+        'Убедитесь, что критический CSS встраивается в страницу.'
+    )
+    critical = (site_css / settings.SITE_CSS_CRITICAL).read_text(
+        encoding='utf-8'
+    )
+    assert '>' in critical
+    assert head.split('<style>')[1].split('</style>')[0] == critical, (
+        'Убедитесь, что критический CSS встраивается без HTML-экранирования.'
+    )
+
+
+def test_inline_css_cannot_close_style(monkeypatch):
+    monkeypatch.setattr(blog_tags, 'purged_available', lambda: True)
+    monkeypatch.setattr(blog_tags, 'critical_css',
+                        lambda: '.a>.b{content:"</style><script>"}')
+    html = blog_tags.site_css()
+    assert html.startswith('<style>.a>.b{content:"<\\/style><script>"}'
+                           '</style>'), (
+        'Убедитесь, что </style> внутри CSS не закрывает тег раньше времени.'
+    )
@@ -0,0 +1,109 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from blog.cache import CARDS_SCOPE, FEED_SCOPE, get_versions
+from blog.models import FeedEntry
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _entry(post):
+    return FeedEntry.objects.get(pk=post.pk)
+
+
+def test_entry_follows_post(post_with_published_location):
+    post = post_with_published_location
+    entry = _entry(post)
+    assert entry.title == post.title
+    assert entry.is_visible
+    post.is_published = False
+    post.save()
+    assert not _entry(post).is_visible
+    post.delete()
+    assert not FeedEntry.objects.exists()
+
+
+def test_entry_follows_related_objects(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    post.category.is_published = False
+    post.category.save()
+    assert not _entry(post).is_visible
+    post.category.is_published = True
+    post.category.save()
+    assert _entry(post).is_visible
+
+    post.location.name = 'Новое место'
+    post.location.save()
+    assert _entry(post).location_name == 'Новое место'
+
+    post.author.username = 'renamed'
+    post.author.save()
+    assert _entry(post).author_username == 'renamed'
+
+    user_client.post(f'/posts/{post.id}/comment/', data={'text': 'текст'})
+    assert _entry(post).comment_count == 1
+
+    post.location.delete()
+    assert _entry(post).location_name is None
+
+
+def test_user_save_invalidates_only_on_visible_changes(
+        client, user, post_with_published_location):
+    entry_stamp = _entry(post_with_published_location).updated_at
+    versions = get_versions(CARDS_SCOPE, FEED_SCOPE)
+    # Вход на сайт и сохранение без изменений
+    client.force_login(user)
+    user.save()
+    assert get_versions(CARDS_SCOPE, FEED_SCOPE) == versions, (
+        'Убедитесь, что вход и сохранение пользователя без изменений '
+        'не сбрасывают кеши лент и карточек.'
+    )
+    assert _entry(post_with_published_location).updated_at == entry_stamp
+
+    user.first_name = 'Иван'
+    user.save()
+    cards, feed = get_versions(CARDS_SCOPE, FEED_SCOPE)
+    assert cards == versions[0] and feed != versions[1], (
+        'Убедитесь, что правка имени сбрасывает версию страниц, '
+        'но не карточек.'
+    )
+
+    user.username = 'renamed'
+    user.save()
+    assert get_versions(CARDS_SCOPE)[0] != cards
+
+
+def test_feed_page_is_join_free(client, post_with_published_location):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get('/')
+    feed_queries = [
+        q['sql'] for q in ctx.captured_queries
+        if 'blog_feedentry' in q['sql']
+    ]
+    # Кроме самой ленты — агрегат Last-Modified (conditional_page)
+    listing = [sql for sql in feed_queries if 'MAX(' not in sql]
+    assert len(listing) == 1
+    assert not any('JOIN' in sql for sql in feed_queries), (
+        'Убедитесь, что главная страница читает ленту одним запросом '
+        'без JOIN.'
+    )
+    assert post_with_published_location.title in response.content.decode()
+
+
+def test_check_and_rebuild_feed(post_with_published_location):
+    post = post_with_published_location
+    FeedEntry.objects.filter(pk=post.pk).update(title='устарело')
+    with pytest.raises(CommandError):
+        call_command('check_feed', stdout=StringIO())
+    call_command('check_feed', '--repair', stdout=StringIO())
+    assert _entry(post).title == post.title
+
+    FeedEntry.objects.all().delete()
+    call_command('rebuild_feed', stdout=StringIO())
+    call_command('check_feed', stdout=StringIO())
+    assert _entry(post).title == post.title
@@ -0,0 +1,91 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.cache import feed_now
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_schedule_mode_gives_identical_sql(post_with_published_location):
+    first = str(Post.objects.published().query)
+    time.sleep(0.01)
+    second = str(Post.objects.published().query)
+    assert first == second, (
+        'Убедитесь, что запросы лент в пределах окна используют один и '
+        'тот же момент времени.'
+    )
+
+
+def test_anchor_moves_on_post_change(post_with_published_location):
+    anchor = feed_now()
+    time.sleep(0.01)
+    post_with_published_location.save()
+    assert feed_now() > anchor
+
+
+def test_scheduled_post_appears_on_time(
+        client, mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=timezone.now() + timedelta(seconds=1.5),
+    )
+    assert post.title not in client.get('/').content.decode()
+    time.sleep(1.6)
+    assert post.title in client.get('/').content.decode(), (
+        'Убедитесь, что отложенный пост появляется в ленте, как только '
+        'наступает его дата публикации.'
+    )
+
+
+@override_settings(FEED_NOW_MODE='bucket', FEED_NOW_BUCKET=60)
+def test_bucket_mode_rounds_down():
+    now = timezone.now()
+    bucketed = feed_now()
+    assert bucketed <= now
+    assert bucketed.second == bucketed.microsecond == 0
+    assert now - bucketed < timedelta(seconds=60)
+
+
+def test_detail_uses_exact_time(client, post_with_published_location):
+    post = post_with_published_location
+    feed_now()
+    # Пост опубликован из другого процесса: якорь лент здесь не сдвинут
+    Post.objects.filter(pk=post.pk).update(pub_date=timezone.now())
+    assert client.get(f'/posts/{post.pk}/').status_code == 200, (
+        'Убедитесь, что страница поста доступна сразу после даты '
+        'публикации.'
+    )
+
+
+def test_publish_scheduled_remembers_runs_in_db(
+        mixer, user, published_category):
+    from io import StringIO
+
+    from django.core.cache import cache
+    from django.core.management import call_command
+
+    from blog.models import FeedEntry
+
+    post = mixer.blend('blog.Post', author=user, category=published_category,
+                       pub_date=timezone.now() + timedelta(hours=1))
+    # Пост запланировали час назад, и его дата наступила
+    published = timezone.now() - timedelta(minutes=1)
+    Post.objects.filter(pk=post.pk).update(pub_date=published)
+    FeedEntry.objects.filter(pk=post.pk).update(
+        pub_date=published, updated_at=published - timedelta(hours=1)
+    )
+    out = StringIO()
+    call_command('publish_scheduled', stdout=out)
+    assert 'постов: 1' in out.getvalue()
+    # Каждый запуск manage.py — новый процесс с пустым кешем
+    cache.clear()
+    out = StringIO()
+    call_command('publish_scheduled', stdout=out)
+    assert 'постов: 0' in out.getvalue(), (
+        'Убедитесь, что publish_scheduled помнит прошлые запуски без кеша.'
+    )
@@ -0,0 +1,67 @@
+import pytest
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+CARD_INNER_TEMPLATE = 'includes/category_link.html'
+
+
+def _card_rendered(response):
+    return CARD_INNER_TEMPLATE in [t.name for t in response.templates]
+
+
+def test_post_card_is_cached(client, post_with_published_location):
+    assert _card_rendered(client.get('/'))
+    response = client.get('/')
+    assert not _card_rendered(response), (
+        'Убедитесь, что повторная отрисовка ленты берёт карточку поста '
+        'из кеша.'
+    )
+    assert post_with_published_location.title in response.content.decode()
+
+
+def test_post_change_invalidates_card(client, post_with_published_location):
+    post = post_with_published_location
+    client.get('/')
+    post.title = 'Новый заголовок'
+    post.save()
+    content = client.get('/').content.decode()
+    assert 'Новый заголовок' in content
+
+
+def test_category_change_invalidates_cards(
+        client, post_with_published_location):
+    category = post_with_published_location.category
+    client.get('/')
+    category.title = 'Другая категория'
+    category.save()
+    content = client.get('/').content.decode()
+    assert 'Другая категория' in content
+
+
+def test_new_comment_updates_card(user_client, post_with_published_location):
+    post = post_with_published_location
+    assert 'Комментарии (0)' in user_client.get('/').content.decode()
+    user_client.post(f'/posts/{post.id}/comment/', data={'text': 'текст'})
+    assert 'Комментарии (1)' in user_client.get('/').content.decode()
+
+
+@pytest.mark.parametrize('field', ['title', 'category_title',
+                                   'author_username'])
+def test_card_follows_row_without_version_bump(
+        user_client, field, post_with_published_location):
+    # Правка в другом процессе сайта: строка ленты обновлена, а сброс
+    # версий остался в его LocMemCache. Страницы пользователя целиком
+    # не кешируются, так что проверяется именно карточка
+    from blog.models import FeedEntry
+
+    post = post_with_published_location
+    user_client.get('/')
+    FeedEntry.objects.filter(pk=post.pk).update(
+        **{field: 'Правка из другого процесса'},
+        updated_at=timezone.now(),
+    )
+    content = user_client.get('/').content.decode()
+    assert 'Правка из другого процесса' in content, (
+        'Убедитесь, что ключ кеша карточки зависит от updated_at строки.'
+    )
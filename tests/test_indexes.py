@@ -0,0 +1,40 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+pytestmark = [pytest.mark.django_db]
+
+FEED_INDEXES = {
+    'post_published_pub_date_idx',
+    'post_category_pub_date_idx',
+    'post_author_pub_date_idx',
+    'post_live_pub_date_idx',
+}
+
+
+def test_feed_indexes_exist():
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, 'blog_post'
+        )
+    missing = FEED_INDEXES - set(constraints)
+    assert not missing, (
+        f'Убедитесь, что для ленты созданы индексы: {", ".join(missing)}.'
+    )
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='план SQLite')
+def test_feed_plans_use_indexes(many_posts_with_published_locations):
+    out = StringIO()
+    call_command(
+        'explain_feeds', '--compare', '--strict', '--runs', '1', stdout=out
+    )
+    with_indexes = out.getvalue().split('С индексами ленты')[1]
+    assert 'USING INDEX feed_' in with_indexes, (
+        'Убедитесь, что запросы лент читают blog_feedentry по индексам.'
+    )
+    assert 'USING INDEX post_' in with_indexes, (
+        'Убедитесь, что запросы по постам используют индексы ленты.'
+    )
@@ -0,0 +1,184 @@
+import threading
+
+import pytest
+from django.core import mail
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog import jobs, tasks
+from blog.models import Job, Post
+
+pytestmark = [pytest.mark.django_db]
+
+calls = []
+
+
+@jobs.task('tests.flaky', max_attempts=2)
+def flaky(fail):
+    calls.append(fail)
+    if fail:
+        raise RuntimeError('сбой')
+
+
+@jobs.task('tests.slow_io', max_attempts=1)
+def slow_io(post_id):
+    # Пока задача ждёт, например, SMTP, сайт пишет из другого потока
+    def web_write():
+        try:
+            Post.objects.filter(pk=post_id).update(title='Правка с сайта')
+        except Exception as error:
+            calls.append(error)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=web_write)
+    thread.start()
+    thread.join()
+
+
+def _due_now():
+    Job.objects.update(run_at=timezone.now())
+
+
+def test_comment_notification_runs_in_background(
+        another_user_client, run_jobs, user, post_with_published_location):
+    user.email = 'author@example.com'
+    user.save()
+    post = post_with_published_location
+    another_user_client.post(f'/posts/{post.id}/comment/',
+                             data={'text': 'Отличный пост'})
+    assert not mail.outbox, (
+        'Убедитесь, что письмо о комментарии отправляется в фоне, '
+        'а не во время запроса.'
+    )
+    assert Job.objects.filter(name='blog.notify_comment').exists()
+    run_jobs()
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == ['author@example.com']
+    assert 'Отличный пост' in mail.outbox[0].body
+    assert not Job.objects.exists()
+
+
+def test_no_notification_for_own_comment(
+        user_client, run_jobs, user, post_with_published_location):
+    user.email = 'author@example.com'
+    user.save()
+    user_client.post(f'/posts/{post_with_published_location.id}/comment/',
+                     data={'text': 'Сам себе'})
+    run_jobs()
+    assert not mail.outbox
+
+
+def test_post_edit_enqueues_cache_warming(
+        user_client, run_jobs, post_with_published_location):
+    post = post_with_published_location
+    response = user_client.post(f'/posts/{post.id}/edit/', data={
+        'title': 'Новое название',
+        'text': post.text,
+        'category': post.category_id,
+        'location': post.location_id,
+        'pub_date': post.pub_date.strftime('%Y-%m-%d %H:%M'),
+    })
+    assert response.status_code == 302, response.context['form'].errors
+    assert Job.objects.filter(name='blog.warm_feed_cache').exists()
+    run_jobs()
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.__class__().get('/')
+    assert 'Новое название' in response.content.decode()
+    assert not ctx.captured_queries, (
+        'Убедитесь, что фоновая задача прогревает кеш ленты.'
+    )
+
+
+def test_failed_job_is_retried_then_marked_failed(run_jobs):
+    calls.clear()
+    job = jobs.enqueue(flaky, fail=True)
+    run_jobs()
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (Job.QUEUED, 1)
+    assert job.run_at > timezone.now(), (
+        'Убедитесь, что повтор упавшей задачи откладывается.'
+    )
+    assert 'сбой' in job.last_error
+
+    _due_now()
+    run_jobs()
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (Job.FAILED, 2)
+    assert calls == [True, True]
+
+
+def test_unique_key_deduplicates_queued_jobs():
+    first = jobs.enqueue(flaky, unique_key='once', fail=False)
+    second = jobs.enqueue(flaky, unique_key='once', fail=False)
+    assert first.pk == second.pk
+    assert Job.objects.count() == 1
+
+
+def test_enqueue_race_with_claimed_duplicate(monkeypatch):
+    # Дубль вставил параллельный запрос, а воркер уже забрал его
+    def save(job, *args, **kwargs):
+        raise IntegrityError('UNIQUE constraint failed')
+
+    monkeypatch.setattr(Job, 'save', save)
+    assert jobs.enqueue(flaky, unique_key='once', fail=False) is None, (
+        'Убедитесь, что enqueue не падает, если дубль задачи уже '
+        'выполняется.'
+    )
+
+
+def test_claim_takes_each_job_once():
+    for _ in range(3):
+        jobs.enqueue(flaky, fail=False)
+    first = jobs.claim(2)
+    second = jobs.claim(2)
+    assert len(first) == 2 and len(second) == 1
+    assert not set(first) & set(second)
+
+
+def test_stale_jobs_are_requeued(settings):
+    job = jobs.enqueue(flaky, fail=False)
+    jobs.claim(1)
+    Job.objects.update(
+        locked_at=timezone.now() - timezone.timedelta(
+            seconds=settings.TASKS_LOCK_TIMEOUT + 1
+        )
+    )
+    assert jobs.requeue_stale() == 1
+    job.refresh_from_db()
+    assert job.status == Job.QUEUED
+
+
+def test_eager_mode_runs_after_commit(
+        settings, django_capture_on_commit_callbacks):
+    settings.TASKS_EAGER = True
+    calls.clear()
+    with django_capture_on_commit_callbacks(execute=True):
+        assert jobs.enqueue(flaky, fail=False) is None
+        assert calls == []
+    assert calls == [False]
+    assert not Job.objects.exists()
+
+
+def test_tasks_are_registered():
+    for func in (tasks.build_renditions, tasks.notify_comment,
+                 tasks.warm_feed_cache):
+        assert jobs.TASKS[func.task_name] is func
+
+
+@pytest.mark.django_db(transaction=True)
+def test_web_write_succeeds_while_job_runs(
+        run_jobs, post_with_published_location):
+    calls.clear()
+    post = post_with_published_location
+    jobs.enqueue(slow_io, post_id=post.pk)
+    run_jobs()
+    assert calls == [], (
+        'Убедитесь, что задача не держит блокировку записи БД, пока '
+        'выполняется.'
+    )
+    post.refresh_from_db()
+    assert post.title == 'Правка с сайта'
+    assert not Job.objects.exists()
@@ -0,0 +1,120 @@
+import socket
+from datetime import timedelta
+
+import pytest
+from django.core.mail import send_mail
+from django.utils import timezone
+
+from blog.models import Job, OutgoingEmail
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def queued_mail(settings):
+    settings.EMAIL_BACKEND = 'blog.mail.QueuedEmailBackend'
+
+
+def test_password_reset_mail_is_queued(
+        queued_mail, smtp_server, run_jobs, client, user):
+    user.email = 'reader@example.com'
+    user.save()
+    response = client.post('/auth/password_reset/',
+                           {'email': 'reader@example.com'})
+    assert response.status_code == 302
+    assert smtp_server.connections == 0, (
+        'Убедитесь, что письмо не отправляется во время запроса.'
+    )
+    assert OutgoingEmail.objects.count() == 1
+    assert Job.objects.filter(name='blog.deliver_email').count() == 1
+
+    run_jobs()
+    assert [m['to'] for m in smtp_server.messages] == [
+        ['reader@example.com']
+    ], 'Убедитесь, что воркер отправляет письма из очереди.'
+    assert not OutgoingEmail.objects.exists()
+
+
+def test_password_reset_without_worker_in_eager_mode(
+        queued_mail, smtp_server, settings, client, user,
+        django_capture_on_commit_callbacks):
+    # BLOGICUM_TASKS_EAGER=1: сайт запущен без run_worker
+    settings.TASKS_EAGER = True
+    user.email = 'reader@example.com'
+    user.save()
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post('/auth/password_reset/', {'email': 'reader@example.com'})
+    assert [m['to'] for m in smtp_server.messages] == [
+        ['reader@example.com']
+    ], 'Убедитесь, что без воркера в режиме TASKS_EAGER письмо уходит.'
+    assert not OutgoingEmail.objects.exists()
+
+
+def test_batch_reuses_one_connection(queued_mail, smtp_server, run_jobs):
+    for i in range(5):
+        send_mail(f'Письмо {i}', 'Текст', None, [f'user{i}@example.com'])
+    assert Job.objects.count() == 1, (
+        'Убедитесь, что письма одной пачки отправляет одна задача.'
+    )
+    run_jobs()
+    assert len(smtp_server.messages) == 5
+    assert smtp_server.connections == 1, (
+        'Убедитесь, что пачка писем уходит через одно соединение.'
+    )
+    subjects = [m['message']['Subject'] for m in smtp_server.messages]
+    assert subjects == [f'Письмо {i}' for i in range(5)]
+
+
+def test_large_queue_is_split_into_batches(
+        settings, queued_mail, smtp_server, run_jobs):
+    settings.EMAIL_BATCH_SIZE = 2
+    for i in range(5):
+        send_mail('Тема', 'Текст', None, [f'user{i}@example.com'])
+    run_jobs()
+    assert len(smtp_server.messages) == 5
+    assert smtp_server.connections == 3
+
+
+def test_delivery_failure_keeps_mail_queued(
+        settings, queued_mail, run_jobs):
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        closed_port = probe.getsockname()[1]
+    settings.EMAIL_DELIVERY_BACKEND = (
+        'django.core.mail.backends.smtp.EmailBackend'
+    )
+    settings.EMAIL_HOST = '127.0.0.1'
+    settings.EMAIL_PORT = closed_port
+    send_mail('Тема', 'Текст', None, ['user@example.com'])
+    run_jobs()
+    job = Job.objects.get(name='blog.deliver_email')
+    assert (job.status, job.attempts) == (Job.QUEUED, 1), (
+        'Убедитесь, что при недоступном SMTP доставка повторяется позже.'
+    )
+    assert OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING
+    ).count() == 1
+
+
+def test_claimed_mail_is_not_sent_twice(
+        settings, queued_mail, smtp_server):
+    from blog import mail
+
+    for i in range(3):
+        send_mail(f'Письмо {i}', 'Текст', None, [f'user{i}@example.com'])
+    # Две первые уже отправляет другой воркер
+    taken = mail.claim(2)
+    assert mail.deliver_pending() == (1, 0, 0)
+    assert [m['message']['Subject'] for m in smtp_server.messages] == [
+        'Письмо 2'
+    ], 'Убедитесь, что письма, взятые другим воркером, не отправляются.'
+    assert OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENDING
+    ).count() == len(taken) == 2
+
+    # Воркер упал: его письма возвращаются в очередь по таймауту
+    OutgoingEmail.objects.update(locked_at=timezone.now() - timedelta(
+        seconds=settings.TASKS_LOCK_TIMEOUT + 1
+    ))
+    assert mail.deliver_pending() == (2, 0, 0)
+    assert not OutgoingEmail.objects.exists()
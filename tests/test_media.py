@@ -0,0 +1,107 @@
+import pytest
+
+from blogicum.media import UnsatisfiableRange, parse_range
+
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture
+def media_file(media_root):
+    (media_root / 'post_images').mkdir()
+    path = media_root / 'post_images' / 'photo.jpg'
+    path.write_bytes(CONTENT)
+    return '/media/post_images/photo.jpg'
+
+
+def _body(response):
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-9', (0, 9)),
+    ('bytes=1000-', (1000, 1023)),
+    ('bytes=-24', (1000, 1023)),
+    ('bytes=1000-5000', (1000, 1023)),
+    ('bytes=0-1,5-6', None),
+    ('bytes=9-1', None),
+    ('items=0-1', None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, len(CONTENT)) == expected
+
+
+@pytest.mark.parametrize('header', ['bytes=1024-', 'bytes=-0'])
+def test_parse_unsatisfiable_range(header):
+    with pytest.raises(UnsatisfiableRange):
+        parse_range(header, len(CONTENT))
+
+
+@pytest.mark.django_db
+def test_serves_file_with_validators(client, media_file, settings):
+    response = client.get(media_file)
+    assert response.status_code == 200
+    assert _body(response) == CONTENT
+    assert response['Content-Type'] == 'image/jpeg'
+    assert response['Content-Length'] == str(len(CONTENT))
+    assert response['Accept-Ranges'] == 'bytes'
+    assert response['Cache-Control'] == (
+        f'public, max-age={settings.MEDIA_MAX_AGE}'
+    )
+    assert not response.has_header('Content-Disposition')
+
+    cached = client.get(media_file, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert cached.status_code == 304, (
+        'Убедитесь, что по совпавшему ETag отдаётся 304.'
+    )
+
+
+@pytest.mark.django_db
+def test_serves_ranges(client, media_file):
+    response = client.get(media_file, HTTP_RANGE='bytes=10-19')
+    assert response.status_code == 206, (
+        'Убедитесь, что медиафайлы поддерживают запросы Range.'
+    )
+    assert response['Content-Range'] == f'bytes 10-19/{len(CONTENT)}'
+    assert response['Content-Length'] == '10'
+    assert _body(response) == CONTENT[10:20]
+
+    etag = client.get(media_file)['ETag']
+    assert client.get(media_file, HTTP_RANGE='bytes=10-19',
+                      HTTP_IF_RANGE=etag).status_code == 206
+    stale = client.get(media_file, HTTP_RANGE='bytes=10-19',
+                       HTTP_IF_RANGE='"old"')
+    assert stale.status_code == 200 and _body(stale) == CONTENT, (
+        'Убедитесь, что при устаревшем If-Range отдаётся весь файл.'
+    )
+    missing = client.get(media_file, HTTP_RANGE='bytes=5000-')
+    assert missing.status_code == 416
+    assert missing['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('offload, header, value', [
+    ('x-accel', 'X-Accel-Redirect', '/protected-media/post_images/photo.jpg'),
+    ('x-sendfile', 'X-Sendfile', None),
+])
+def test_offload_headers(client, media_file, media_root, settings, offload,
+                         header, value):
+    settings.MEDIA_OFFLOAD = offload
+    response = client.get(media_file)
+    assert response.status_code == 200
+    assert response.content == b'', (
+        'Убедитесь, что при выгрузке на прокси байты не идут через Django.'
+    )
+    expected = value or str(media_root / 'post_images' / 'photo.jpg')
+    assert response[header] == expected
+    assert response.has_header('ETag')
+
+
+@pytest.mark.django_db
+def test_renditions_are_immutable_and_paths_are_safe(client, media_root):
+    (media_root / 'renditions').mkdir()
+    (media_root / 'renditions' / 'a-1.webp').write_bytes(b'webp')
+    response = client.get('/media/renditions/a-1.webp')
+    assert 'immutable' in response['Cache-Control']
+    assert client.get('/media/renditions/').status_code == 404
+    assert client.get('/media/../blogicum/settings.py').status_code == 404
+    assert client.get('/media/nope.jpg').status_code == 404
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from blogicum.metrics import registry
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+@pytest.fixture
+def feed(mixer, user, published_category):
+    return mixer.cycle(3).blend(
+        'blog.Post', author=user, category=published_category,
+        location=None,
+    )
+
+
+def test_staff_sees_server_timing(admin_client, feed):
+    timing = admin_client.get('/')['Server-Timing']
+    for part in ('total;dur=', 'db;dur=', 'queries, slowest',
+                 'desc="blog/index.html x1"',
+                 'desc="includes/post_card.html x3"',
+                 'cache-fragment;desc="hits=0 misses=3"'):
+        assert part in timing, (
+            f'Убедитесь, что Server-Timing содержит {part}: {timing}'
+        )
+    timing = admin_client.get('/')['Server-Timing']
+    assert 'cache-fragment;desc="hits=3 misses=0"' in timing, (
+        'Убедитесь, что Server-Timing показывает попадания в кеш.'
+    )
+
+
+def test_server_timing_hidden_from_visitors(client, settings, feed):
+    assert not client.get('/').has_header('Server-Timing'), (
+        'Убедитесь, что посетители не видят Server-Timing.'
+    )
+    settings.SERVER_TIMING = True
+    assert 'cache-page;desc="hits=1 misses=0"' in (
+        client.get('/')['Server-Timing']
+    ), 'Убедитесь, что попадание в кеш страниц попадает в Server-Timing.'
+
+
+def test_metrics_endpoint(client, admin_client, feed):
+    client.get('/')
+    client.get('/')
+    response = client.get('/metrics/')
+    assert response.status_code == 302, (
+        'Убедитесь, что сводка замеров доступна только персоналу.'
+    )
+    stats = json.loads(admin_client.get('/metrics/').content)['blog:index']
+    assert stats['requests'] == 2
+    assert stats['buckets']['+Inf'] == 2
+    assert stats['cache']['page'] == {'hits': 1, 'misses': 1}
+    assert stats['queries'] > 0 and stats['template_seconds'] > 0
+
+    text = admin_client.get('/metrics/?format=prometheus')
+    assert text['Content-Type'].startswith('text/plain; version=0.0.4')
+    body = text.content.decode()
+    for line in (
+        'blogicum_request_seconds_bucket{view="blog:index",le="+Inf"} 2',
+        'blogicum_request_seconds_count{view="blog:index"} 2',
+        'blogicum_cache_total{view="blog:index",cache="page",'
+        'result="hit"} 1',
+    ):
+        assert line in body, (
+            f'Убедитесь, что выгрузка Prometheus содержит {line}'
+        )
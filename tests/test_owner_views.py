@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def own_comment(mixer, user, post_with_published_location):
+    return mixer.blend(
+        'blog.Comment', post=post_with_published_location, author=user
+    )
+
+
+@pytest.fixture
+def owner_urls(post_with_published_location, own_comment):
+    post_id = post_with_published_location.id
+    return {
+        'post': [f'/posts/{post_id}/edit/', f'/posts/{post_id}/delete/'],
+        'comment': [
+            f'/posts/{post_id}/edit_comment/{own_comment.id}/',
+            f'/posts/{post_id}/delete_comment/{own_comment.id}/',
+        ],
+    }
+
+
+def _selects(client, url, table, expected_status):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == expected_status
+    return [
+        q['sql'] for q in ctx.captured_queries
+        if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']
+    ]
+
+
+@pytest.mark.parametrize('client_fixture, status', [
+    ('user_client', 200),
+    ('another_user_client', 302),
+])
+def test_owner_views_fetch_object_once(
+        request, client_fixture, status, owner_urls):
+    client = request.getfixturevalue(client_fixture)
+    for kind, urls in owner_urls.items():
+        for url in urls:
+            selects = _selects(client, url, f'blog_{kind}', status)
+            assert len(selects) == 1, (
+                f'Убедитесь, что страница {url} выбирает объект из БД '
+                'один раз.'
+            )
+
+
+def test_comment_redirect_does_not_load_post(
+        another_user_client, owner_urls, post_with_published_location):
+    for url in owner_urls['comment']:
+        assert not _selects(another_user_client, url, 'blog_post', 302), (
+            'Убедитесь, что перенаправление чужого пользователя не '
+            'загружает пост комментария.'
+        )
+        response = another_user_client.get(url)
+        assert response.url == (
+            f'/posts/{post_with_published_location.id}/'
+        )
+
+
+def test_comment_edit_query_count(user_client, owner_urls):
+    with CaptureQueriesContext(connection) as ctx:
+        response = user_client.get(owner_urls['comment'][0])
+    assert response.status_code == 200
+    # Сессия, пользователь и сам комментарий
+    assert len(ctx.captured_queries) == 3, (
+        'Убедитесь, что страница редактирования комментария выполняет '
+        'три запроса к БД.'
+    )
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+import pytest
+from django.test import override_settings
+from django.utils import timezone
+
+from blog.cache import page_timeout
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_feed_is_served_from_cache(
+        client, post_with_published_location, django_assert_num_queries):
+    client.get('/')
+    with django_assert_num_queries(0):
+        response = client.get('/')
+    assert post_with_published_location.title in response.content.decode()
+    assert 'Cookie' in response['Vary']
+
+
+def test_authenticated_feed_is_not_cached(
+        user_client, post_with_published_location):
+    user_client.get('/')
+    response = user_client.get('/')
+    assert 'page_obj' in response.context, (
+        'Убедитесь, что для авторизованных пользователей лента не '
+        'отдаётся из общего кеша.'
+    )
+
+
+def test_post_change_invalidates_page(client, post_with_published_location):
+    post = post_with_published_location
+    client.get('/')
+    post.is_published = False
+    post.save()
+    assert post.title not in client.get('/').content.decode()
+
+
+def test_timeout_is_capped_by_scheduled_post(
+        mixer, user, published_category):
+    mixer.blend('blog.Post', author=user, category=published_category,
+                pub_date=timezone.now() + timedelta(seconds=30))
+    with override_settings(FEED_PAGE_CACHE_TIMEOUT=600):
+        assert 0 < page_timeout() <= 30
+
+
+def test_locked_page_is_rendered_after_wait(
+        client, post_with_published_location):
+    from django.core.cache import cache
+
+    original_add = cache.add
+    cache.add = lambda key, *args, **kwargs: (
+        False if key.endswith(':lock') else original_add(key, *args, **kwargs)
+    )
+    try:
+        with override_settings(FEED_PAGE_LOCK_WAIT=0.1):
+            response = client.get('/')
+    finally:
+        cache.add = original_add
+    assert response.status_code == 200
+    assert post_with_published_location.title in response.content.decode()
@@ -0,0 +1,139 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category):
+    now = timezone.now()
+    # Одинаковые даты у пар постов проверяют разрешение «ничьих» по id.
+    pub_dates = (now - timedelta(hours=i // 2) for i in range(N_PER_PAGE * 3))
+    return mixer.cycle(N_PER_PAGE * 3).blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=pub_dates,
+    )
+
+
+def _walk(client, url, param, cursor_attr):
+    seen = []
+    query = ''
+    while True:
+        page = client.get(url + query).context['page_obj']
+        seen.extend(post.id for post in page)
+        cursor = getattr(page, cursor_attr)
+        if cursor is None:
+            return seen
+        query = f'?{param}={cursor}'
+
+
+def test_keyset_walk_covers_feed_once(client, feed_posts):
+    ids = _walk(client, '/', 'after', 'next_cursor')
+    expected = [
+        post.id for post in sorted(
+            feed_posts, key=lambda p: (p.pub_date, p.id), reverse=True
+        )
+    ]
+    assert ids == expected, (
+        'Убедитесь, что переход по курсорам ?after= обходит ленту '
+        'без пропусков и повторов.'
+    )
+
+
+def test_keyset_backward_walk(client, feed_posts):
+    last_page = client.get('/?before=').context['page_obj']
+    assert len(last_page) == N_PER_PAGE
+    assert not last_page.has_next()
+    ids = []
+    page = last_page
+    while True:
+        ids[:0] = [post.id for post in page]
+        if page.previous_cursor is None:
+            break
+        page = client.get(
+            f'/?before={page.previous_cursor}'
+        ).context['page_obj']
+    assert len(ids) == len(set(ids)) == len(feed_posts)
+
+
+def test_invalid_cursor_falls_back_to_first_page(client, feed_posts):
+    first = client.get('/').context['page_obj']
+    broken = client.get('/?after=not-a-cursor').context['page_obj']
+    assert [p.id for p in broken] == [p.id for p in first]
+
+
+def test_legacy_page_links(client, feed_posts):
+    response = client.get('/?page=2')
+    page = response.context['page_obj']
+    assert page.number == 2
+    assert len(page) == N_PER_PAGE
+
+
+def test_keyset_page_skips_count(client, feed_posts):
+    with CaptureQueriesContext(connection) as ctx:
+        page = client.get('/').context['page_obj']
+    assert page.paginator.count is None
+    assert not any('COUNT(' in q['sql'] for q in ctx.captured_queries), (
+        'Убедитесь, что seek-пагинация не выполняет COUNT(*).'
+    )
+
+
+def _count_queries(ctx):
+    return sum('COUNT(' in q['sql'] for q in ctx.captured_queries)
+
+
+def test_page_count_is_cached(user_client, mixer, user, feed_posts):
+    with CaptureQueriesContext(connection) as ctx:
+        assert user_client.get('/?page=1').status_code == 200
+        page = user_client.get('/?page=2').context['page_obj']
+    assert _count_queries(ctx) == 1, (
+        'Убедитесь, что число постов для ?page=N кешируется.'
+    )
+    assert page.paginator.num_pages == 3
+
+    mixer.blend('blog.Post', author=user, category=feed_posts[0].category,
+                is_published=True, pub_date=timezone.now())
+    page = user_client.get('/?page=2').context['page_obj']
+    assert page.paginator.count == len(feed_posts) + 1, (
+        'Убедитесь, что кешированное число постов сбрасывается при '
+        'изменении постов.'
+    )
+
+
+def test_probe_pages_skip_count(user_client, settings, feed_posts):
+    settings.FEED_PAGE_COUNT = 'probe'
+    with CaptureQueriesContext(connection) as ctx:
+        middle = user_client.get('/?page=2').context['page_obj']
+        last = user_client.get('/?page=3').context['page_obj']
+        beyond = user_client.get('/?page=9').context['page_obj']
+    assert not _count_queries(ctx), (
+        'Убедитесь, что в режиме probe не выполняется COUNT(*).'
+    )
+    assert middle.has_next() and middle.has_previous()
+    assert len(last) == N_PER_PAGE and not last.has_next()
+    assert beyond.number == 1
+
+
+def test_page_window_is_elided():
+    from django.core.paginator import Paginator
+
+    from blog.paginators import ProbePaginator
+    from blog.templatetags.blog_tags import page_window
+
+    ellipsis = Paginator.ELLIPSIS
+    page = Paginator(range(10_000), N_PER_PAGE).page(500)
+    assert page_window(page) == [
+        1, ellipsis, 498, 499, 500, 501, 502, ellipsis, 1000
+    ], 'Убедитесь, что ссылки на страницы выводятся окном с многоточиями.'
+
+    page = ProbePaginator(range(10_000), N_PER_PAGE).page(500)
+    assert page_window(page) == [1, ellipsis, 498, 499, 500, 501]
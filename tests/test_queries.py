@@ -0,0 +1,67 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_urls(user, published_category):
+    # Адрес ленты -> ожидаемое число запросов для анонимного посетителя
+    # при холодном кеше; каждая лента один раз спрашивает дату ближайшей
+    # отложенной публикации (см. blog.cache.feed_now) и один раз — время
+    # последней правки для ETag (см. blog.cache.conditional_page)
+    return {
+        '/': 3,
+        f'/category/{published_category.slug}/': 4,
+        f'/profile/{user.username}/': 4,
+    }
+
+
+def _query_counts(client, urls):
+    counts = {}
+    for url in urls:
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        assert response.status_code == 200
+        counts[url] = len(ctx.captured_queries)
+    return counts
+
+
+def _blend_posts(mixer, n, user, category, location):
+    return mixer.cycle(n).blend(
+        'blog.Post', author=user, category=category, location=location
+    )
+
+
+def test_feed_query_count_is_fixed(
+        client, mixer, user, published_category, published_location,
+        feed_urls):
+    _blend_posts(mixer, N_PER_PAGE, user, published_category,
+                 published_location)
+    assert _query_counts(client, feed_urls) == feed_urls, (
+        'Убедитесь, что страницы лент выполняют фиксированное число '
+        'запросов к БД.'
+    )
+
+
+@pytest.mark.parametrize('client_fixture', ['client', 'user_client'])
+def test_feed_query_count_does_not_depend_on_page_size(
+        request, client_fixture, mixer, user, published_category,
+        published_location, feed_urls):
+    client = request.getfixturevalue(client_fixture)
+
+    _blend_posts(mixer, 1, user, published_category, published_location)
+    one_post = _query_counts(client, feed_urls)
+
+    _blend_posts(mixer, N_PER_PAGE, user, published_category,
+                 published_location)
+    full_page = _query_counts(client, feed_urls)
+    assert one_post == full_page, (
+        'Убедитесь, что число запросов к БД на страницах лент не зависит '
+        'от количества постов на странице.'
+    )
@@ -0,0 +1,37 @@
+import pytest
+from django.test import override_settings
+
+from blogicum.middleware import QueryBudgetExceeded, fingerprint
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_fingerprint_strips_literals():
+    first = fingerprint(
+        "SELECT * FROM blog_post WHERE id IN (1, 2, 3) AND title = 'a'"
+    )
+    second = fingerprint(
+        "SELECT *  FROM blog_post WHERE id IN (7) AND title = 'b''c'"
+    )
+    assert first == second == (
+        'SELECT * FROM blog_post WHERE id IN (...) AND title = ?'
+    )
+
+
+def test_view_over_budget_fails(client, post_with_published_location):
+    with override_settings(QUERY_BUDGET_VIEWS={'blog:index': 0}):
+        with pytest.raises(QueryBudgetExceeded) as exc_info:
+            client.get('/')
+    assert 'blog:index' in str(exc_info.value)
+    assert 'blog_post' in str(exc_info.value)
+
+
+def test_view_within_budget_passes(client, post_with_published_location):
+    with override_settings(QUERY_BUDGET_VIEWS={'blog:index': 3}):
+        assert client.get('/').status_code == 200
+
+
+def test_budget_disabled(client, post_with_published_location):
+    with override_settings(QUERY_BUDGET=None,
+                           QUERY_BUDGET_VIEWS={'blog:index': 0}):
+        assert client.get('/').status_code == 200
@@ -0,0 +1,106 @@
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from blog.models import FeedEntry, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _jpeg(size, color=(200, 40, 40)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color=color).save(buffer, 'JPEG')
+    return ContentFile(buffer.getvalue(), name='big.jpg')
+
+
+@pytest.fixture
+def big_image_post(mixer, user, published_category, run_jobs):
+    post = mixer.blend('blog.Post', author=user, is_published=True,
+                       category=published_category,
+                       image=_jpeg((2000, 1000)))
+    run_jobs()
+    post.refresh_from_db()
+    return post
+
+
+def test_renditions_created_on_upload(big_image_post):
+    renditions = big_image_post.image_renditions
+    assert renditions['source'] == big_image_post.image.name
+    assert (renditions['card']['width'],
+            renditions['card']['height']) == (640, 320)
+    assert renditions['detail']['width'] == 1280
+    for rendition in ('card', 'detail'):
+        for key in ('jpeg', 'webp'):
+            assert default_storage.exists(renditions[rendition][key]), (
+                'Убедитесь, что уменьшенные копии фото сохраняются '
+                'в хранилище.'
+            )
+    assert renditions['card']['webp'].endswith('.webp')
+    entry = FeedEntry.objects.get(pk=big_image_post.pk)
+    assert entry.image_renditions == renditions
+
+
+def test_small_images_are_not_upscaled(
+        post_with_published_location, run_jobs):
+    run_jobs()
+    post_with_published_location.refresh_from_db()
+    renditions = post_with_published_location.image_renditions
+    assert renditions['card']['width'] == 100
+    # Одинаковое содержимое — одинаковые имена с хешем
+    assert renditions['card']['jpeg'] == renditions['detail']['jpeg']
+
+
+def test_card_uses_srcset(client, big_image_post):
+    content = client.get('/').content.decode()
+    card = big_image_post.image_renditions['card']
+    assert 'type="image/webp"' in content
+    assert f'{default_storage.url(card["webp"])} 640w' in content, (
+        'Убедитесь, что карточка поста выводит копии фото через srcset.'
+    )
+    assert f'src="{default_storage.url(card["jpeg"])}"' in content
+    assert content.count('<picture') == 1
+
+
+def test_renditions_follow_image_changes(big_image_post, run_jobs):
+    old = big_image_post.image_renditions
+    big_image_post.title = 'Новый заголовок'
+    big_image_post.save()
+    big_image_post.refresh_from_db()
+    assert big_image_post.image_renditions == old
+
+    big_image_post.image = _jpeg((1000, 1000), color=(0, 0, 255))
+    big_image_post.save()
+    run_jobs()
+    big_image_post.refresh_from_db()
+    assert big_image_post.image_renditions['card']['height'] == 640
+
+
+def test_backfill_command(big_image_post):
+    Post.objects.update(image_renditions={})
+    FeedEntry.objects.update(image_renditions={})
+    call_command('rebuild_renditions', stdout=StringIO())
+    big_image_post.refresh_from_db()
+    assert big_image_post.image_renditions['card']['width'] == 640
+    assert FeedEntry.objects.get(pk=big_image_post.pk).image_renditions == (
+        big_image_post.image_renditions
+    ), 'Убедитесь, что команда обновляет и ленту.'
+
+
+def test_card_follows_renditions_without_version_bump(
+        user_client, big_image_post):
+    # Воркер в другом процессе: строки обновлены, а сброс версий до
+    # кеша сайта не дошёл
+    from blog import feed
+
+    assert '<picture' in user_client.get('/').content.decode()
+    Post.objects.filter(pk=big_image_post.pk).update(
+        image_renditions={'source': big_image_post.image.name}
+    )
+    feed.refresh_posts([big_image_post.pk])
+    assert '<picture' not in user_client.get('/').content.decode(), (
+        'Убедитесь, что ключ кеша карточки зависит от копий фото.'
+    )
@@ -0,0 +1,128 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+
+from blog.models import Post
+from blogicum import routers
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def replica_calls(settings, monkeypatch):
+    """Включает реплики и считает чтения, ушедшие бы на них.
+
+    Реплика в тестах — тот же default, поэтому сами запросы идут в
+    основную БД, а проверяется только решение роутера. Окно после
+    сброса кешей выключено: его проверяет отдельный тест.
+    """
+    settings.DATABASE_REPLICAS = ['replica_1']
+    settings.REPLICA_MAX_LAG = 0
+    calls = []
+
+    def choose_replica():
+        calls.append(True)
+        return routers.PRIMARY
+
+    monkeypatch.setattr(routers, 'choose_replica', choose_replica)
+    return calls
+
+
+def test_router_decisions(settings):
+    settings.DATABASE_REPLICAS = ['replica_1', 'replica_2']
+    router = routers.ReplicaRouter()
+    assert router.db_for_read(Post) == 'default'
+
+    @routers.replica_reads
+    def view(request):
+        return {
+            'post': router.db_for_read(Post),
+            'user': router.db_for_read(get_user_model()),
+            'session': router.db_for_read(Session),
+            'write': router.db_for_write(Post),
+        }
+
+    decisions = view(object())
+    assert decisions['post'] in settings.DATABASE_REPLICAS, (
+        'Убедитесь, что помеченные страницы читают посты с реплик.'
+    )
+    assert decisions['user'] == decisions['session'] == 'default'
+    assert decisions['write'] == 'default'
+    assert router.db_for_read(Post) == 'default'
+    assert not router.allow_migrate('replica_1', 'blog')
+
+
+def test_index_uses_replicas(client, replica_calls, mixer, user,
+                             published_category):
+    mixer.blend('blog.Post', author=user, category=published_category)
+    client.get('/')
+    assert replica_calls, 'Убедитесь, что лента читает с реплик.'
+
+
+def test_static_pages_render_in_replica_context(
+        settings, monkeypatch, client):
+    # TemplateView отдаёт ленивый TemplateResponse: шаблон должен
+    # рисоваться ещё внутри replica_reads
+    settings.DATABASE_REPLICAS = ['replica_1']
+    seen = []
+    monkeypatch.setattr(
+        'django.template.response.SimpleTemplateResponse.rendered_content',
+        property(lambda self: seen.append(routers._replica_reads.get()) or ''),
+    )
+    for url in ('/pages/about/', '/pages/rules/'):
+        client.get(url)
+    assert seen == [True, True], (
+        'Убедитесь, что статические страницы читают с реплик.'
+    )
+
+
+def test_detail_and_profile_use_replicas(
+        client, replica_calls, user, post_with_published_location):
+    client.get(f'/posts/{post_with_published_location.id}/')
+    client.get(f'/profile/{user.username}/')
+    assert len(replica_calls) >= 2
+
+
+def test_write_pins_session_to_primary(
+        user_client, replica_calls, post_with_published_location):
+    post = post_with_published_location
+    response = user_client.post(f'/posts/{post.id}/comment/',
+                                data={'text': 'Комментарий'})
+    assert response.status_code == 302
+    replica_calls.clear()
+    response = user_client.get(response.url)
+    assert 'Комментарий' in response.content.decode()
+    assert not replica_calls, (
+        'Убедитесь, что после записи пользователь читает с основной БД.'
+    )
+
+
+def test_pin_expires(settings, user_client, replica_calls,
+                     post_with_published_location):
+    settings.REPLICA_PIN_SECONDS = -1
+    user_client.post(
+        f'/posts/{post_with_published_location.id}/comment/',
+        data={'text': 'Комментарий'},
+    )
+    replica_calls.clear()
+    user_client.get(f'/posts/{post_with_published_location.id}/')
+    assert replica_calls
+
+
+def test_cache_bump_holds_reads_on_primary(
+        client, replica_calls, settings, post_with_published_location):
+    from django.core.cache import cache
+
+    settings.REPLICA_MAX_LAG = 5
+    post = post_with_published_location
+    post.title = 'Новый заголовок'
+    post.save()
+    assert 'Новый заголовок' in client.get('/').content.decode()
+    assert not replica_calls, (
+        'Убедитесь, что после сброса кешей страницы строятся по '
+        'основной БД, а не по отстающей реплике.'
+    )
+    # Окно отставания прошло
+    cache.delete(routers.HOLD_KEY)
+    client.get(f'/posts/{post.id}/')
+    assert replica_calls
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from blog import search
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(params=['sqlite', 'simple'])
+def search_backend(request, settings):
+    settings.SEARCH_BACKEND = request.param
+    return request.param
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category, search_backend):
+    def make(title, text='', **kwargs):
+        kwargs.setdefault('is_published', True)
+        kwargs.setdefault('category', published_category)
+        return mixer.blend('blog.Post', author=user, title=title, text=text,
+                           **kwargs)
+    return make
+
+
+def _found(client, query):
+    response = client.get('/search/', {'q': query})
+    assert response.status_code == 200
+    return [post.id for post in response.context['page_obj']]
+
+
+def test_search_by_words_and_prefix(client, make_post):
+    tree = make_post('Новогодняя ёлка', 'Игрушки и гирлянды на ёлке')
+    make_post('Летний отпуск', 'Море и солнце')
+    assert _found(client, 'ёлка') == [tree.id]
+    assert _found(client, 'елка гирл') == [tree.id], (
+        'Убедитесь, что поиск учитывает все слова запроса, последнее '
+        'как префикс, и не различает «е» и «ё».'
+    )
+    assert _found(client, 'ёлка море') == []
+
+
+def test_title_matches_rank_first(client, make_post):
+    in_text = make_post('Заметки', 'Заметка про путешествия')
+    in_title = make_post('Путешествия', 'Заметки в дороге')
+    assert _found(client, 'путешествия') == [in_title.id, in_text.id]
+
+
+def test_search_respects_visibility(client, make_post, mixer):
+    visible = make_post('Видимый пост про горы')
+    make_post('Скрытый пост про горы', is_published=False)
+    make_post('Будущий пост про горы',
+              pub_date=timezone.now() + timedelta(days=1))
+    make_post('Пост про горы без категории',
+              category=mixer.blend('blog.Category', is_published=False))
+    assert _found(client, 'горы') == [visible.id], (
+        'Убедитесь, что поиск показывает только опубликованные посты.'
+    )
+
+
+def test_index_follows_edits_and_deletes(client, make_post):
+    post = make_post('Старый заголовок')
+    post.title = 'Новый заголовок'
+    post.save()
+    assert _found(client, 'старый') == []
+    assert _found(client, 'новый') == [post.id]
+    post.delete()
+    assert search.search('новый') == []
+
+
+def test_admin_search_uses_index(admin_client, make_post):
+    post = make_post('Выставка', 'Картины и скульптуры', is_published=False)
+    make_post('Концерт', 'Музыка')
+    response = admin_client.get('/admin/blog/post/', {'q': 'скульп'})
+    assert [obj.id for obj in response.context['cl'].result_list] == [
+        post.id
+    ], 'Убедитесь, что поиск в админке использует поисковый индекс.'
+
+
+def test_admin_search_finds_all_matches(admin_client, make_post, settings):
+    for number in range(3):
+        make_post(f'Выставка {number}')
+    settings.SEARCH_MAX_RESULTS = 2
+    response = admin_client.get('/admin/blog/post/', {'q': 'выставка'})
+    assert len(response.context['cl'].result_list) == 3, (
+        'Убедитесь, что поиск в админке находит все совпадения, а не '
+        'первые SEARCH_MAX_RESULTS.'
+    )
+    assert len(_found(admin_client, 'выставка')) == 2
+
+
+def test_matches_is_a_subquery(make_post):
+    from blog.models import Post
+
+    post = make_post('Рецепт пирога', 'Тесто и ягоды')
+    make_post('Летний отпуск')
+    found = Post.objects.filter(pk__in=search.matches('тесто ягод'))
+    assert list(found.values_list('pk', flat=True)) == [post.id]
+    assert 'IN (SELECT' in str(found.query)
+    assert list(Post.objects.filter(pk__in=search.matches(' '))) == []
+
+
+def test_rebuild_command(make_post, search_backend):
+    post = make_post('Рецепт пирога')
+    search.get_backend().clear()
+    assert search.search('пирог') == []
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert search.search('пирог') == [post.id]
+
+
+def test_migration_builds_same_index(make_post, search_backend):
+    post = make_post('Рецепт пирога', 'Тесто и ягоды')
+    search.get_backend().clear()
+    migration = import_module('blog.migrations.0007_search_index')
+    migration.build_index(apps, SimpleNamespace(connection=connection))
+    assert search.search('ягод') == [post.id], (
+        'Убедитесь, что миграция строит индекс так же, как blog.search.'
+    )
@@ -0,0 +1,69 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+from blogicum.db.sqlite3.base import DatabaseWrapper
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != 'sqlite', reason='только SQLite'),
+]
+
+
+def _wrapper(path, **options):
+    return DatabaseWrapper({
+        'NAME': str(path), 'OPTIONS': options, 'TIME_ZONE': None,
+        'CONN_MAX_AGE': 0, 'AUTOCOMMIT': True, 'ATOMIC_REQUESTS': False,
+        'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '', 'TEST': {},
+    }, alias='tuned')
+
+
+def _pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+def test_file_database_gets_pragmas(tmp_path):
+    wrapper = _wrapper(tmp_path / 'db.sqlite3',
+                       pragmas={'cache_size': -2000})
+    try:
+        assert _pragma(wrapper, 'journal_mode') == 'wal', (
+            'Убедитесь, что SQLite работает в режиме WAL.'
+        )
+        assert _pragma(wrapper, 'synchronous') == 1, (
+            'Убедитесь, что для SQLite выставлен synchronous=NORMAL.'
+        )
+        assert _pragma(wrapper, 'busy_timeout') == 5000
+        assert _pragma(wrapper, 'mmap_size') > 0
+        assert _pragma(wrapper, 'cache_size') == -2000, (
+            'Убедитесь, что OPTIONS["pragmas"] переопределяет PRAGMA.'
+        )
+        assert _pragma(wrapper, 'foreign_keys') == 1
+    finally:
+        wrapper.close()
+
+
+def test_atomic_begins_immediate(tmp_path):
+    wrapper = _wrapper(tmp_path / 'db.sqlite3',
+                       transaction_mode='immediate')
+    statements = []
+    try:
+        with wrapper.execute_wrapper(
+            lambda execute, sql, *args: statements.append(sql)
+            or execute(sql, *args)
+        ):
+            wrapper.ensure_connection()
+            wrapper._start_transaction_under_autocommit()
+            wrapper.connection.rollback()
+    finally:
+        wrapper.close()
+    assert 'BEGIN IMMEDIATE' in statements, (
+        'Убедитесь, что транзакции открываются BEGIN IMMEDIATE.'
+    )
+
+
+def test_unknown_transaction_mode(tmp_path):
+    wrapper = _wrapper(tmp_path / 'db.sqlite3', transaction_mode='eager')
+    with pytest.raises(ImproperlyConfigured):
+        wrapper.ensure_connection()
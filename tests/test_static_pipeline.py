@@ -0,0 +1,83 @@
+import gzip
+
+import pytest
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+
+from blogicum.staticfiles import accepted_encodings
+
+CSS = 'css/bootstrap.min.css'
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    settings.STATICFILES_STORAGE = (
+        'blogicum.staticfiles.CompressedManifestStorage'
+    )
+    settings.STATIC_SERVE = True
+    call_command('collectstatic', '--noinput', '-i', 'admin', verbosity=0)
+    return tmp_path
+
+
+def _body(response):
+    return b''.join(response.streaming_content)
+
+
+def test_collectstatic_writes_hashed_and_compressed(collected):
+    hashed = staticfiles_storage.stored_name(CSS)
+    assert hashed != CSS, 'Убедитесь, что у статики имена с хешем.'
+    original = (collected / CSS).read_bytes()
+    packed = (collected / f'{hashed}.gz').read_bytes()
+    assert gzip.decompress(packed) == original, (
+        'Убедитесь, что collectstatic кладёт рядом сжатую копию .gz.'
+    )
+    assert not (collected / 'img/logo.png.gz').exists(), (
+        'Убедитесь, что уже сжатые картинки не сжимаются повторно.'
+    )
+
+
+@pytest.mark.django_db
+def test_pages_link_hashed_static(collected, client):
+    content = client.get('/').content.decode()
+    assert staticfiles_storage.stored_name('img/logo.png') in content
+
+
+def test_serves_compressed_with_far_future_cache(collected, client):
+    hashed = staticfiles_storage.stored_name(CSS)
+    response = client.get(f'/static/{hashed}',
+                          HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response.status_code == 200
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Content-Type'].startswith('text/css')
+    assert 'immutable' in response['Cache-Control']
+    assert 'Accept-Encoding' in response['Vary']
+    assert not response.has_header('Content-Disposition')
+    assert gzip.decompress(_body(response)) == (collected / CSS).read_bytes()
+
+    plain = client.get(f'/static/{hashed}')
+    assert not plain.has_header('Content-Encoding'), (
+        'Убедитесь, что без Accept-Encoding отдаётся несжатый файл.'
+    )
+    assert _body(plain) == (collected / CSS).read_bytes()
+
+    again = client.get(f'/static/{hashed}',
+                       HTTP_IF_NONE_MATCH=plain['ETag'])
+    assert again.status_code == 304
+
+
+def test_unhashed_names_get_short_cache(collected, client, settings):
+    response = client.get(f'/static/{CSS}')
+    assert response['Cache-Control'] == (
+        f'public, max-age={settings.STATIC_MAX_AGE}'
+    )
+
+
+@pytest.mark.django_db
+def test_missing_and_escaping_paths_fall_through(collected, client):
+    assert client.get('/static/nope.css').status_code == 404
+    assert client.get('/static/../settings.py').status_code == 404
+
+
+def test_accepted_encodings():
+    assert accepted_encodings('gzip;q=0, br;q=0.5, *') == {'br', '*'}
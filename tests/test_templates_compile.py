@@ -0,0 +1,69 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.template import engines
+
+from blogicum.templating import precompile, template_names, warm_up
+
+CACHED_TEMPLATES = {
+    'loaders': [('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ])],
+}
+
+
+@pytest.fixture
+def template_settings(settings):
+    def configure(dirs=None, **options):
+        backend = dict(settings.TEMPLATES[0])
+        backend['OPTIONS'] = {**backend['OPTIONS'], **options}
+        if dirs is not None:
+            backend['DIRS'] = dirs
+        settings.TEMPLATES = [backend]
+    return configure
+
+
+def test_names_cover_project_and_app_templates():
+    names = template_names(engines['django'].engine)
+    for name in ('blog/index.html', 'includes/post_card.html',
+                 'django_bootstrap5/form_errors.html'):
+        assert name in names, (
+            f'Убедитесь, что предкомпиляция видит шаблон {name}.'
+        )
+
+
+def test_precompile_fills_cached_loader(template_settings):
+    template_settings(**CACHED_TEMPLATES)
+    compiled, errors = precompile()
+    assert not errors and compiled
+    loader = engines['django'].engine.template_loaders[0]
+    assert 'blog/index.html' in {
+        key.split('-')[0] for key in loader.get_template_cache
+    }, 'Убедитесь, что шаблоны разобраны заранее и лежат в кеше.'
+
+
+def test_compile_templates_command(tmp_path, template_settings):
+    out = StringIO()
+    call_command('compile_templates', stdout=out)
+    assert 'Разобрано шаблонов' in out.getvalue()
+
+    (tmp_path / 'broken.html').write_text('{% if %}', encoding='utf-8')
+    template_settings(dirs=[tmp_path])
+    with pytest.raises(CommandError):
+        call_command('compile_templates', stdout=out, stderr=StringIO())
+
+
+def test_warm_up_logs_broken_templates(
+        tmp_path, template_settings, settings, caplog):
+    (tmp_path / 'broken.html').write_text('{% if %}', encoding='utf-8')
+    template_settings(dirs=[tmp_path])
+    settings.TEMPLATE_PRECOMPILE = True
+    with caplog.at_level('ERROR', logger='blogicum.templating'):
+        warm_up()
+    assert any('broken.html' in record.getMessage()
+               for record in caplog.records), (
+        'Убедитесь, что ошибки предкомпиляции при старте воркера '
+        'попадают в лог.'
+    )